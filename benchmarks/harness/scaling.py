@@ -0,0 +1,336 @@
+import importlib
+import itertools
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.harness.stand_ins import FakeKrakenServer, InMemoryMinioOPS
+from benchmarks.synthetic import make_pairs
+from src.utils.logger import logger
+from src.utils.metrics import Span, metrics
+
+TIMEFRAMES = ("daily", "weekly", "monthly")
+
+
+class SpanCollector:
+    def __init__(self):
+        """Metrics hook keeping every finished span of a scenario"""
+        self.spans = []
+
+    def on_span_start(self, span: Span):
+        pass
+
+    def on_span_end(self, span: Span):
+        stage = span.labels.get("stage")
+        self.spans.append(
+            {
+                "stage": f"{span.name}:{stage}" if stage else span.name,
+                "wall_seconds": span.wall_seconds,
+                **span.counters,
+            }
+        )
+
+    def summary(self) -> dict:
+        """Latency percentiles and throughput per stage"""
+        stages = {}
+        for span in self.spans:
+            stages.setdefault(span["stage"], []).append(span)
+
+        summary = {}
+        for stage, spans in sorted(stages.items()):
+            latencies = sorted(span["wall_seconds"] for span in spans)
+            total_seconds = sum(latencies)
+            rows = sum(max(span["rows_out"], span["rows_in"]) for span in spans)
+            summary[stage] = {
+                "count": len(spans),
+                "total_seconds": total_seconds,
+                "p50_seconds": statistics.median(latencies),
+                "p95_seconds": latencies[max(int(len(latencies) * 0.95 + 0.5) - 1, 0)],
+                "rows": rows,
+                "rows_per_second": rows / total_seconds if total_seconds else None,
+                "bytes": sum(span["bytes_in"] + span["bytes_out"] for span in spans),
+                "db_round_trips": sum(span["db_round_trips"] for span in spans),
+            }
+        return summary
+
+
+def configure_environment(kraken_base_url: str, database: dict, bucket_name: str):
+    """Point the settings at the stand-ins (must run before the pipelines are used)"""
+    from src.config import get_settings
+
+    os.environ["KRAKEN_BASE_URL"] = kraken_base_url
+    os.environ["BUCKET_NAME"] = bucket_name
+    for key, value in database.items():
+        os.environ[f"POSTGRES_{key.upper()}"] = str(value)
+    get_settings.cache_clear()
+
+
+def reset_database(db_ops, create_schema: bool = False):
+    """Apply the declared schema (`src.schema`), then empty the tables"""
+    from psycopg2 import sql
+
+    if create_schema:
+        from src.schema import SchemaManager
+
+        SchemaManager(db_ops).apply()
+
+    tables = ["bronze.ohlc"] + [
+        f"{layer}.ohlc{'_ta' if layer == 'gold' else ''}_{timeframe}"
+        for layer in ("silver", "gold")
+        for timeframe in TIMEFRAMES
+    ]
+    db_ops.execute_query(
+        sql.SQL("TRUNCATE {tables}").format(
+            tables=sql.SQL(", ").join(
+                sql.Identifier(*table.split(".")) for table in tables
+            )
+        )
+    )
+
+
+def run_scenario(
+    pairs: int,
+    intervals: list[int],
+    years: float,
+    end_date: datetime,
+    connection_pool,
+    minio_ops,
+    workers: int = 4,
+    queue_depth: int = 4,
+) -> dict:
+    """Run source -> bronze -> silver -> gold for one load
+
+    Args:
+        pairs (int): number of pairs.
+        intervals (list[int]): intervals in minutes, each pair is loaded for every interval.
+        years (float): years of history.
+        end_date (datetime): end of the history (naive UTC).
+        connection_pool (ThreadedConnectionPool): pool shared by the pipelines.
+        minio_ops: MinIO operations (real or in-memory).
+        workers (int, optional): pairs x intervals loaded at the same time. Defaults to 4.
+        queue_depth (int, optional): queue depth of the streaming pipeline. Defaults to 4.
+
+    Returns:
+        dict: load, wall time per phase and the stage summary.
+    """
+    from pipelines.gold.ohlc_ta import DataPipeline as GoldPipeline
+    from pipelines.source_to_minio.kraken_ohlc_streaming import (
+        DataPipeline as StreamingPipeline,
+    )
+
+    start_date = end_date - timedelta(days=365 * years)
+    collector = SpanCollector()
+    metrics.add_hook(collector)
+    try:
+        # Source -> MinIO and bronze, one streaming pipeline per pair and interval
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            loads = [
+                executor.submit(
+                    StreamingPipeline(
+                        pair=pair,
+                        interval=interval,
+                        start_date=start_date,
+                        end_date=end_date,
+                        queue_depth=queue_depth,
+                        minio_ops=minio_ops,
+                        connection_pool=connection_pool,
+                    ).run
+                )
+                for pair, interval in itertools.product(make_pairs(pairs), intervals)
+            ]
+            if not all(load.result() for load in loads):
+                raise RuntimeError("Streaming load failed, see the pipeline logs")
+        ingest_seconds = time.perf_counter() - started
+
+        # Silver and gold per timeframe
+        started = time.perf_counter()
+        for timeframe in TIMEFRAMES:
+            silver_module = importlib.import_module(
+                f"pipelines.silver.ohlc_{timeframe}"
+            )
+            if not silver_module.DataPipeline(
+                source="bronze.ohlc",
+                target=f"silver.ohlc_{timeframe}",
+                start_date=start_date,
+                end_date=end_date,
+                connection_pool=connection_pool,
+            ).run():
+                raise RuntimeError(
+                    f"silver.ohlc_{timeframe} failed, see the pipeline logs"
+                )
+            if not GoldPipeline(
+                source=f"silver.ohlc_{timeframe}",
+                target=f"gold.ohlc_ta_{timeframe}",
+                start_date=start_date,
+                end_date=end_date,
+                connection_pool=connection_pool,
+            ).run():
+                raise RuntimeError(
+                    f"gold.ohlc_ta_{timeframe} failed, see the pipeline logs"
+                )
+        transform_seconds = time.perf_counter() - started
+    finally:
+        metrics.remove_hook(collector)
+
+    bars = (
+        sum(
+            int(timedelta(days=365 * years).total_seconds() // (interval * 60))
+            for interval in intervals
+        )
+        * pairs
+    )
+    return {
+        "pairs": pairs,
+        "intervals": intervals,
+        "years": years,
+        "bars": bars,
+        "ingest_seconds": ingest_seconds,
+        "transform_seconds": transform_seconds,
+        "bars_per_second": bars / (ingest_seconds + transform_seconds),
+        "stages": collector.summary(),
+    }
+
+
+def run_scaling(
+    pairs: list[int],
+    intervals: list[int],
+    years: list[float],
+    database: dict,
+    minio: str = "memory",
+    workers: int = 4,
+    kraken_latency: float = 0.0,
+    create_schema: bool = True,
+) -> dict:
+    """Run every scenario of the grid pairs x years (each with all intervals)
+
+    Args:
+        pairs (list[int]): numbers of pairs.
+        intervals (list[int]): intervals in minutes loaded for every pair.
+        years (list[float]): years of history.
+        database (dict): host, port, db, user and password of the harness database.
+        minio (str, optional): "memory" for the in-process stand-in or "container" for
+            the MinIO of the settings. Defaults to "memory".
+        workers (int, optional): pipelines running at the same time. Defaults to 4.
+        kraken_latency (float, optional): seconds added to every fake Kraken response. Defaults to 0.0.
+        create_schema (bool, optional): create the tables before the first scenario. Defaults to True.
+
+    Returns:
+        dict: parameters and the result of every scenario.
+    """
+    end_date = datetime.now(timezone.utc).replace(
+        hour=0, minute=0, second=0, microsecond=0, tzinfo=None
+    )
+    scenarios = []
+    with FakeKrakenServer(
+        end_time=int(end_date.replace(tzinfo=timezone.utc).timestamp()),
+        latency=kraken_latency,
+    ) as kraken:
+        configure_environment(kraken.base_url, database, bucket_name="harness")
+
+        from src.minio_ops import MinioOPS
+        from src.timescaledb_ops import TimescaleDBOps
+
+        connection_pool = TimescaleDBOps.create_pool(maxconn=workers + 2)
+        minio_ops = InMemoryMinioOPS() if minio == "memory" else MinioOPS()
+        try:
+            for index, (pair_count, year_count) in enumerate(
+                itertools.product(pairs, years)
+            ):
+                db_ops = TimescaleDBOps(connection_pool)
+                reset_database(db_ops, create_schema=create_schema and index == 0)
+                db_ops.close_connection()
+
+                logger.info(
+                    f"Scenario {pair_count} pairs x {intervals} x {year_count} years ..."
+                )
+                result = run_scenario(
+                    pairs=pair_count,
+                    intervals=intervals,
+                    years=year_count,
+                    end_date=end_date,
+                    connection_pool=connection_pool,
+                    minio_ops=minio_ops,
+                    workers=workers,
+                )
+                result["kraken_requests"] = kraken.requests
+                scenarios.append(result)
+                logger.info(
+                    f"{result['bars']} bars in {result['ingest_seconds'] + result['transform_seconds']:.1f}s "
+                    f"({result['bars_per_second']:.0f} bars/s)"
+                )
+        finally:
+            connection_pool.closeall()
+
+    return {
+        "parameters": {
+            "pairs": pairs,
+            "intervals": intervals,
+            "years": years,
+            "minio": minio,
+            "workers": workers,
+            "kraken_latency": kraken_latency,
+        },
+        "scenarios": scenarios,
+    }
+
+
+def print_report(report: dict):
+    """Print throughput and latency per stage for every scenario"""
+    for scenario in report["scenarios"]:
+        print(
+            f"\n{scenario['pairs']} pairs x {scenario['intervals']} x {scenario['years']} years: "
+            f"{scenario['bars']} bars, ingest {scenario['ingest_seconds']:.1f}s, "
+            f"transform {scenario['transform_seconds']:.1f}s, {scenario['bars_per_second']:.0f} bars/s"
+        )
+        print(f"  {'stage':<42} {'count':>6} {'p50 s':>8} {'p95 s':>8} {'rows/s':>10}")
+        for stage, values in scenario["stages"].items():
+            rows_per_second = values["rows_per_second"]
+            print(
+                f"  {stage:<42} {values['count']:>6} {values['p50_seconds']:>8.3f} "
+                f"{values['p95_seconds']:>8.3f} "
+                f"{rows_per_second if rows_per_second is not None else 0:>10.0f}"
+            )
+
+
+def plot_report(report: dict, path: str):
+    """Write throughput and p95 latency curves per stage (x: bars of the scenario) as HTML"""
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    fig = make_subplots(
+        rows=2, cols=1, subplot_titles=("Throughput (rows/s)", "p95 latency (s)")
+    )
+    stages = sorted({stage for s in report["scenarios"] for stage in s["stages"]})
+    scenarios = sorted(report["scenarios"], key=lambda s: s["bars"])
+    for stage in stages:
+        points = [
+            (s["bars"], s["stages"][stage]) for s in scenarios if stage in s["stages"]
+        ]
+        x = [bars for bars, _ in points]
+        fig.add_trace(
+            go.Scatter(
+                x=x,
+                y=[v["rows_per_second"] for _, v in points],
+                name=stage,
+                legendgroup=stage,
+            ),
+            row=1,
+            col=1,
+        )
+        fig.add_trace(
+            go.Scatter(
+                x=x,
+                y=[v["p95_seconds"] for _, v in points],
+                name=stage,
+                legendgroup=stage,
+                showlegend=False,
+            ),
+            row=2,
+            col=1,
+        )
+    fig.update_xaxes(title_text="bars loaded", type="log")
+    fig.write_html(path)
+    logger.info(f"Scaling curves written to {path}")
@@ -0,0 +1,225 @@
+import hashlib
+import io
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from src.utils.logger import logger
+
+# Kraken returns at most 720 bars per OHLC request
+PAGE_SIZE = 720
+
+
+class FakeKrakenServer:
+    def __init__(
+        self,
+        end_time: int,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        page_size: int = PAGE_SIZE,
+        latency: float = 0.0,
+    ):
+        """Local HTTP server imitating Kraken's `/0/public/OHLC` endpoint
+
+        Bars are synthetic and deterministic per pair, interval and time, so every
+        run of the harness loads the same data. Responses are paginated with the
+        `last` cursor like the real API, the data stops at `end_time`.
+
+        Args:
+            end_time (int): Unix timestamp of the last available bar.
+            host (str, optional): host to bind. Defaults to "127.0.0.1".
+            port (int, optional): port to bind, 0 picks a free port. Defaults to 0.
+            page_size (int, optional): bars per response. Defaults to 720.
+            latency (float, optional): seconds added to every response. Defaults to 0.0.
+        """
+        self.end_time = end_time
+        self.page_size = page_size
+        self.latency = latency
+        self.requests = 0
+        self.__lock = threading.Lock()
+        self.__server = ThreadingHTTPServer((host, port), self.__handler())
+        self.__thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.__server.server_address[:2]
+        return f"http://{host}:{port}/0"
+
+    def start(self) -> "FakeKrakenServer":
+        self.__thread = threading.Thread(
+            target=self.__server.serve_forever, name="fake-kraken", daemon=True
+        )
+        self.__thread.start()
+        logger.info(f"Fake Kraken API listening on {self.base_url}")
+        return self
+
+    def stop(self):
+        self.__server.shutdown()
+        self.__server.server_close()
+
+    def __enter__(self) -> "FakeKrakenServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def count_request(self):
+        with self.__lock:
+            self.requests += 1
+
+    def get_page(self, pair: str, interval: int, since: int) -> dict:
+        """Build the response of one OHLC request
+
+        Args:
+            pair (str): pair of the bars.
+            interval (int): bar size in minutes.
+            since (int): bars strictly after this Unix timestamp are returned.
+
+        Returns:
+            dict: Kraken-like response.
+        """
+        seconds = interval * 60
+        first = (since // seconds + 1) * seconds
+        last_available = self.end_time // seconds * seconds
+        times = np.arange(first, last_available + 1, seconds, dtype=np.int64)[
+            : self.page_size
+        ]
+        if len(times) == 0:
+            return {"error": [], "result": {pair: [], "last": since}}
+
+        # Seeded by pair, interval and first bar so any page can be rebuilt on its own
+        seed = int.from_bytes(
+            hashlib.sha256(f"{pair}:{interval}:{first}".encode()).digest()[:8], "little"
+        )
+        rng = np.random.default_rng(seed)
+        base_price = 10 ** (int(hashlib.sha256(pair.encode()).hexdigest(), 16) % 5)
+        level = base_price * np.exp(np.sin(times / (86400 * 365)))
+        close = level * np.exp(np.cumsum(rng.normal(0, 0.002, len(times))))
+        open_ = np.concatenate(([level[0]], close[:-1]))
+        high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.001, len(times))))
+        low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.001, len(times))))
+        volume = rng.gamma(2.0, 50.0, len(times))
+        count = rng.integers(1, 5000, len(times))
+
+        rows = [
+            [
+                int(times[index]),
+                f"{open_[index]:.5f}",
+                f"{high[index]:.5f}",
+                f"{low[index]:.5f}",
+                f"{close[index]:.5f}",
+                f"{(high[index] + low[index] + close[index]) / 3:.5f}",
+                f"{volume[index]:.8f}",
+                int(count[index]),
+            ]
+            for index in range(len(times))
+        ]
+        return {"error": [], "result": {pair: rows, "last": int(times[-1])}}
+
+    def __handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {key: values[0] for key, values in parse_qs(url.query).items()}
+                if url.path != "/0/public/OHLC" or "pair" not in params:
+                    body = {"error": ["EGeneral:Invalid arguments"]}
+                else:
+                    server.count_request()
+                    if server.latency:
+                        time.sleep(server.latency)
+                    body = server.get_page(
+                        params["pair"],
+                        int(params.get("interval", 1)),
+                        int(params.get("since", 0)),
+                    )
+
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+class InMemoryMinioOPS:
+    def __init__(self):
+        """In-process stand-in of `MinioOPS`, objects are kept in memory"""
+        self.buckets = {}
+        self.__lock = threading.Lock()
+
+    def create_bucket(self, bucket_name: str):
+        with self.__lock:
+            self.buckets.setdefault(bucket_name, {})
+
+    def write_object(
+        self, bucket_name: str, destination_file: str, source_file: str
+    ) -> bool:
+        with open(source_file, "rb") as file:
+            data = file.read()
+        with self.__lock:
+            self.buckets.setdefault(bucket_name, {})[destination_file] = data
+        return True
+
+    def write_stream(
+        self,
+        bucket_name: str,
+        destination_file: str,
+        stream,
+        part_size: int = 5 * 1024 * 1024,
+    ):
+        buffer = io.BytesIO()
+        while chunk := stream.read(part_size):
+            buffer.write(chunk)
+        with self.__lock:
+            self.buckets.setdefault(bucket_name, {})[
+                destination_file
+            ] = buffer.getvalue()
+
+    def write_bytes(self, bucket_name: str, destination_file: str, data: bytes) -> bool:
+        with self.__lock:
+            self.buckets.setdefault(bucket_name, {})[destination_file] = bytes(data)
+        return True
+
+    def read_object(self, bucket_name: str, object_name: str) -> bytes:
+        with self.__lock:
+            return self.buckets[bucket_name][object_name]
+
+    def list_objects(self, bucket_name: str, prefix: str = "") -> list[str]:
+        with self.__lock:
+            return sorted(
+                name
+                for name in self.buckets.get(bucket_name, {})
+                if name.startswith(prefix)
+            )
+
+    def object_sizes(self, bucket_name: str, prefix: str = "") -> dict[str, int]:
+        with self.__lock:
+            return {
+                name: len(data)
+                for name, data in sorted(self.buckets.get(bucket_name, {}).items())
+                if name.startswith(prefix)
+            }
+
+    def delete_object(self, bucket_name: str, object_name: str):
+        with self.__lock:
+            self.buckets.get(bucket_name, {}).pop(object_name, None)
+
+    @property
+    def stored_bytes(self) -> int:
+        with self.__lock:
+            return sum(
+                len(data)
+                for objects in self.buckets.values()
+                for data in objects.values()
+            )
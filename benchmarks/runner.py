@@ -0,0 +1,200 @@
+import fnmatch
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from src.utils.logger import logger
+
+
+def time_case(
+    run, state, repeat: int = 5, min_time: float = 0.2, max_number: int | None = None
+) -> dict:
+    """Time a function the way `timeit` does
+
+    The number of calls per repeat is calibrated so one repeat lasts about
+    `min_time` seconds, the statistics are per call.
+
+    Args:
+        run (Callable): timed function.
+        state: argument of the function.
+        repeat (int, optional): number of repeats. Defaults to 5.
+        min_time (float, optional): target seconds per repeat. Defaults to 0.2.
+        max_number (int | None, optional): maximum calls per repeat. Defaults to None.
+
+    Returns:
+        dict: min, median, mean and stdev seconds per call, number of calls per repeat.
+    """
+    # The first call warms up imports and caches and calibrates the number of calls
+    started = time.perf_counter()
+    run(state)
+    first = time.perf_counter() - started
+    number = max(1, math.ceil(min_time / max(first, 1e-9)))
+    if max_number is not None:
+        number = min(number, max_number)
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            run(state)
+        timings.append((time.perf_counter() - started) / number)
+
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+        "stdev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def get_environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": commit or None,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "node": platform.node(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run_benchmarks(
+    pattern: str = "*",
+    scale: str = "quick",
+    repeat: int = 5,
+    min_time: float = 0.2,
+) -> dict:
+    """Run the benchmark cases matching a pattern
+
+    Args:
+        pattern (str, optional): glob pattern of the case names, e.g. "gold_*". Defaults to "*".
+        scale (str, optional): "quick" (subset of the parameters) or "full". Defaults to "quick".
+        repeat (int, optional): number of repeats per case. Defaults to 5.
+        min_time (float, optional): target seconds per repeat. Defaults to 0.2.
+
+    Returns:
+        dict: environment, results by case name, and skipped cases with the reason.
+    """
+    # Imported here so comparing results does not need the benchmark dependencies
+    from benchmarks.suite import BENCHMARKS
+
+    results, skipped = {}, {}
+    for benchmark in BENCHMARKS:
+        for case, param in benchmark.cases(scale):
+            if not fnmatch.fnmatch(case, pattern):
+                continue
+            try:
+                state = benchmark.setup(param)
+                results[case] = time_case(
+                    benchmark.run,
+                    state,
+                    repeat=repeat,
+                    min_time=min_time,
+                    max_number=benchmark.max_number,
+                )
+            except ImportError as e:
+                # e.g. Kaleido is not installed on this machine
+                skipped[case] = str(e)
+                logger.warning(f"{case} skipped: {e}")
+                continue
+            logger.info(
+                f"{case}: median {format_seconds(results[case]['median'])} "
+                f"(min {format_seconds(results[case]['min'])}, x{results[case]['number']})"
+            )
+    return {
+        "environment": get_environment(),
+        "scale": scale,
+        "results": results,
+        "skipped": skipped,
+    }
+
+
+def format_seconds(seconds: float) -> str:
+    for unit, factor in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= factor:
+            return f"{seconds / factor:.3g} {unit}"
+    return f"{seconds / 1e-9:.3g} ns"
+
+
+def save_results(results: dict, path: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as file:
+        json.dump(results, file, indent=2, sort_keys=True)
+    logger.info(f"Benchmark results written to {path}")
+
+
+def load_results(path: str) -> dict:
+    with open(path) as file:
+        return json.load(file)
+
+
+def compare_results(
+    baseline: dict, current: dict, threshold: float = 0.10, statistic: str = "median"
+) -> tuple[list[dict], list[str]]:
+    """Compare two benchmark runs
+
+    Args:
+        baseline (dict): results of the reference run.
+        current (dict): results of the new run.
+        threshold (float, optional): allowed slowdown ratio, 0.10 means 10%. Defaults to 0.10.
+        statistic (str, optional): statistic compared ("min", "median" or "mean"). Defaults to "median".
+
+    Returns:
+        tuple[list[dict], list[str]]: comparison per common case, and the regressed cases.
+    """
+    rows, regressions = [], []
+    for case in sorted(set(baseline["results"]) & set(current["results"])):
+        before = baseline["results"][case][statistic]
+        after = current["results"][case][statistic]
+        ratio = after / before if before else math.inf
+        if ratio > 1 + threshold:
+            status = "REGRESSION"
+            regressions.append(case)
+        elif ratio < 1 / (1 + threshold):
+            status = "improved"
+        else:
+            status = "ok"
+        rows.append(
+            {
+                "case": case,
+                "baseline": before,
+                "current": after,
+                "ratio": ratio,
+                "status": status,
+            }
+        )
+    return rows, regressions
+
+
+def print_comparison(baseline: dict, current: dict, rows: list[dict]):
+    print(f"{'case':<32} {'baseline':>10} {'current':>10} {'ratio':>7}  status")
+    for row in rows:
+        print(
+            f"{row['case']:<32} {format_seconds(row['baseline']):>10} "
+            f"{format_seconds(row['current']):>10} {row['ratio']:>7.2f}  {row['status']}"
+        )
+    for case in sorted(set(baseline["results"]) - set(current["results"])):
+        print(f"{case:<32} missing from the current run")
+    for case in sorted(set(current["results"]) - set(baseline["results"])):
+        print(f"{case:<32} new, no baseline")
+    if baseline.get("environment", {}).get("node") != current.get(
+        "environment", {}
+    ).get("node"):
+        print(
+            "Warning: the runs come from different hosts, ratios may not be meaningful."
+        )
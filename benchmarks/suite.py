@@ -0,0 +1,168 @@
+from typing import Any, Callable
+
+from benchmarks.synthetic import (
+    INTERVALS,
+    generate_ohlc,
+    make_analysis_json,
+    to_kraken_payload,
+    to_raw_frame,
+    to_silver_frame,
+)
+
+
+class Benchmark:
+    def __init__(
+        self,
+        name: str,
+        setup: Callable[[Any], Any],
+        run: Callable[[Any], Any],
+        params: dict[str, Any],
+        quick: list[str] | None = None,
+        max_number: int | None = None,
+    ):
+        """Hot path timed for a set of parameters
+
+        Args:
+            name (str): name of the benchmark, cases are named "name[param]".
+            setup (Callable[[Any], Any]): builds the input of `run` from a parameter, not timed.
+            run (Callable[[Any], Any]): timed function receiving the output of `setup`.
+            params (dict[str, Any]): parameters by label.
+            quick (list[str] | None, optional): labels run by the "quick" scale. Defaults to every label.
+            max_number (int | None, optional): maximum calls per repeat (for slow cases). Defaults to None.
+        """
+        self.name = name
+        self.setup = setup
+        self.run = run
+        self.params = params
+        self.quick = quick
+        self.max_number = max_number
+
+    def cases(self, scale: str = "quick") -> list[tuple[str, Any]]:
+        labels = self.params if scale == "full" or self.quick is None else self.quick
+        return [(f"{self.name}[{label}]", self.params[label]) for label in labels]
+
+
+# =========================================================================
+# Kraken payload parse
+# =========================================================================
+def setup_kraken_parse(rows: int) -> dict:
+    return to_kraken_payload(generate_ohlc(rows, interval=1), "SYN0001USD")
+
+
+def run_kraken_parse(payload: dict):
+    from src.extractors.kraken_extractor import KrakenExtractor
+
+    return KrakenExtractor.parse_ohlc_data(payload)
+
+
+# =========================================================================
+# Bronze row transform
+# =========================================================================
+def setup_bronze_transform(rows: int):
+    return to_raw_frame(generate_ohlc(rows, interval=1), "SYN0001USD")
+
+
+def run_bronze_transform(df):
+    from pipelines.bronze.ohlc import transform_rows
+
+    return transform_rows(df, "SYN0001USD", 1)
+
+
+# =========================================================================
+# Gold indicator pass (EMA, stochastic, MACD)
+# =========================================================================
+def setup_gold_indicators(param: tuple[str, int, int]):
+    interval, bars, pairs = param
+    return to_silver_frame(
+        generate_ohlc(bars, interval=INTERVALS[interval], pairs=pairs)
+    )
+
+
+def run_gold_indicators(df):
+    from pipelines.gold.ohlc_ta import calculate_indicators
+
+    return calculate_indicators(df)
+
+
+# =========================================================================
+# Chart figure construction and PNG encode
+# =========================================================================
+def make_gold_frame(bars: int):
+    from pipelines.gold.ohlc_ta import calculate_indicators
+
+    return calculate_indicators(to_silver_frame(generate_ohlc(bars, interval=1440)))
+
+
+def run_chart_figure(df):
+    from src.charts.ta_chart import create_ta_chart
+
+    return create_ta_chart(df, "SYN0001USD")
+
+
+def setup_chart_png(bars: int):
+    from src.charts.image_encoder import ImageEncoder
+
+    return run_chart_figure(make_gold_frame(bars)), ImageEncoder()
+
+
+def run_chart_png(state):
+    fig, image_encoder = state
+    image_bytes = fig.to_image(format="png", width=1200, height=800, scale=2)
+    return image_encoder.encode(image_bytes)
+
+
+# =========================================================================
+# Analysis parsing
+# =========================================================================
+def run_analysis_parse(text: str):
+    from src.model.analysis import Analysis
+
+    return Analysis.model_validate_json(text)
+
+
+BENCHMARKS = [
+    Benchmark(
+        "kraken_parse",
+        setup=setup_kraken_parse,
+        run=run_kraken_parse,
+        params={"720": 720, "7200": 7200},  # one Kraken page, ten pages
+    ),
+    Benchmark(
+        "bronze_transform",
+        setup=setup_bronze_transform,
+        run=run_bronze_transform,
+        params={"1000": 1000, "10000": 10000, "100000": 100000},
+        quick=["1000", "10000"],
+    ),
+    Benchmark(
+        "gold_indicators",
+        setup=setup_gold_indicators,
+        run=run_gold_indicators,
+        params={
+            f"{interval}-{bars}x{pairs}": (interval, bars, pairs)
+            for interval, bars in (("1m", 1440), ("4h", 720), ("1d", 720), ("1mo", 120))
+            for pairs in (1, 50, 500)
+        },
+        quick=["1m-1440x1", "1d-720x1", "1d-720x50", "1mo-120x500"],
+    ),
+    Benchmark(
+        "chart_figure",
+        setup=make_gold_frame,
+        run=run_chart_figure,
+        params={"365": 365, "1825": 1825},
+        quick=["365"],
+    ),
+    Benchmark(
+        "chart_png",
+        setup=setup_chart_png,
+        run=run_chart_png,
+        params={"365": 365},
+        max_number=1,
+    ),
+    Benchmark(
+        "analysis_parse",
+        setup=make_analysis_json,
+        run=run_analysis_parse,
+        params={"4": 4, "12": 12},  # reasons per answer
+    ),
+]
@@ -0,0 +1,137 @@
+import json
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+# Bar sizes in minutes, from 1-minute to (30-day) monthly bars
+INTERVALS = {
+    "1m": 1,
+    "5m": 5,
+    "15m": 15,
+    "1h": 60,
+    "4h": 240,
+    "1d": 1440,
+    "1w": 10080,
+    "1mo": 43200,
+}
+
+
+def make_pairs(count: int) -> list[str]:
+    """Get `count` synthetic pair names (e.g. "SYN0001USD")"""
+    return [f"SYN{index:04d}USD" for index in range(1, count + 1)]
+
+
+def generate_ohlc(
+    bars: int,
+    interval: int = 1440,
+    pairs: int = 1,
+    end: datetime | None = None,
+    seed: int = 42,
+) -> pd.DataFrame:
+    """Generate OHLC bars following a geometric random walk
+
+    The columns match the rows returned by `KrakenExtractor.parse_ohlc_data`, plus
+    the pair. Bars are aligned to the interval like Kraken candles.
+
+    Args:
+        bars (int): number of bars per pair.
+        interval (int, optional): bar size in minutes. Defaults to 1440.
+        pairs (int, optional): number of pairs. Defaults to 1.
+        end (datetime | None, optional): time of the last bar. Defaults to 2025-01-01 UTC.
+        seed (int, optional): random seed, the same seed gives the same data. Defaults to 42.
+
+    Returns:
+        pd.DataFrame: time, pair, open, high, low, close, vwap, volume and count columns.
+    """
+    rng = np.random.default_rng(seed)
+    end = end or datetime(2025, 1, 1, tzinfo=timezone.utc)
+    seconds = interval * 60
+    last_time = int(end.timestamp()) // seconds * seconds
+    times = last_time - seconds * np.arange(bars - 1, -1, -1, dtype=np.int64)
+
+    frames = []
+    volatility = 0.02 * np.sqrt(interval / 1440)
+    for pair in make_pairs(pairs):
+        start_price = 10 ** rng.uniform(-1, 5)
+        returns = rng.normal(0, volatility, bars)
+        close = start_price * np.exp(np.cumsum(returns))
+        open_ = np.concatenate(([start_price], close[:-1]))
+        wick = np.abs(rng.normal(0, volatility / 2, (2, bars)))
+        high = np.maximum(open_, close) * (1 + wick[0])
+        low = np.minimum(open_, close) * (1 - wick[1])
+        frames.append(
+            pd.DataFrame(
+                {
+                    "time": times,
+                    "pair": pair,
+                    "open": open_,
+                    "high": high,
+                    "low": low,
+                    "close": close,
+                    "vwap": (high + low + close) / 3,
+                    "volume": rng.gamma(2.0, 50.0, bars),
+                    "count": rng.integers(1, 5000, bars),
+                }
+            )
+        )
+    return pd.concat(frames, ignore_index=True)
+
+
+def to_kraken_payload(df: pd.DataFrame, pair: str) -> dict:
+    """Build the JSON response of Kraken's OHLC endpoint for one pair
+
+    Prices and volumes are strings like in the real API.
+
+    Args:
+        df (pd.DataFrame): bars of `generate_ohlc`.
+        pair (str): pair of the bars.
+
+    Returns:
+        dict: `{"error": [], "result": {pair: [...], "last": ...}}`.
+    """
+    raw = to_raw_frame(df, pair)
+    rows = [
+        [int(time), *values, int(count)]
+        for time, *values, count in raw[
+            ["time", "open", "high", "low", "close", "vwap", "volume", "count"]
+        ].itertuples(index=False, name=None)
+    ]
+    return {"error": [], "result": {pair: rows, "last": int(raw["time"].iloc[-1])}}
+
+
+def to_raw_frame(df: pd.DataFrame, pair: str) -> pd.DataFrame:
+    """Get the bars of a pair as the source pipeline stores them (the input of bronze)
+
+    Args:
+        df (pd.DataFrame): bars of `generate_ohlc`.
+        pair (str): pair of the bars.
+
+    Returns:
+        pd.DataFrame: bars with prices and volumes as strings, like the `OHLC` model.
+    """
+    raw = df[df["pair"] == pair].drop(columns="pair").reset_index(drop=True)
+    for column in ("open", "high", "low", "close", "vwap", "volume"):
+        raw[column] = raw[column].map("{:.8f}".format)
+    return raw
+
+
+def to_silver_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Get the bars as rows of a silver table (the input of the gold layer)"""
+    silver = df[["pair", "open", "high", "low", "close", "volume", "count"]].copy()
+    silver.insert(0, "date", pd.to_datetime(df["time"], unit="s"))
+    return silver.sort_values("date", kind="stable").reset_index(drop=True)
+
+
+def make_analysis_json(reasons: int = 4) -> str:
+    """Get an LLM answer matching the `Analysis` schema"""
+    return json.dumps(
+        {
+            "action": "Buy",
+            "reasons": {
+                f"Indicator {index}": "The indicator crossed above its signal line "
+                "with increasing momentum while the price holds above the EMA. " * 3
+                for index in range(reasons)
+            },
+        }
+    )
@@ -1,11 +1,13 @@
+-- Same schema as src/schema.py (`python cli.py schema apply`), safe to run again:
+-- nothing is dropped, only what is missing is created
+
 -- Create Schemas
 CREATE SCHEMA IF NOT EXISTS bronze;
 CREATE SCHEMA IF NOT EXISTS silver;
 CREATE SCHEMA IF NOT EXISTS gold;
 
 -- Create bronze.ohlc
-drop table if exists bronze.ohlc;
-create table bronze.ohlc (
+create table if not exists bronze.ohlc (
     time TIMESTAMPTZ,
     interval INTEGER,
     pair TEXT,
@@ -17,12 +19,32 @@ create table bronze.ohlc (
     count INTEGER,
     primary key (time, pair)
 );
-select create_hypertable('bronze.ohlc', by_range('time', INTERVAL '1 day'));
-
+select create_hypertable('bronze.ohlc', by_range('time', INTERVAL '1 day'), if_not_exists => TRUE);
+create index if not exists ohlc_pair_interval_time_desc_idx on bronze.ohlc (pair, interval, time desc);
+-- Compress the chunks older than the incremental loads write into (the
+-- settings cannot be changed once chunks are compressed, so they are only set
+-- while compression is still disabled)
+do $$
+begin
+    if not exists (
+        select 1
+        from timescaledb_information.hypertables
+        where hypertable_schema = 'bronze'
+          and hypertable_name = 'ohlc'
+          and compression_enabled
+    ) then
+        alter table bronze.ohlc set (
+            timescaledb.compress,
+            timescaledb.compress_segmentby = 'pair',
+            timescaledb.compress_orderby = 'time DESC'
+        );
+    end if;
+end
+$$;
+select add_compression_policy('bronze.ohlc', INTERVAL '30 days', if_not_exists => true);
 
 -- Create silver.ohlc_daily
-drop table silver.ohlc_daily;
-create table silver.ohlc_daily (
+create table if not exists silver.ohlc_daily (
     date DATE,
     pair TEXT,
     open DOUBLE PRECISION,
@@ -33,11 +55,11 @@ create table silver.ohlc_daily (
     count INTEGER,
     primary key (date, pair)
 );
-select create_hypertable('silver.ohlc_daily', by_range('date', INTERVAL '1 day'));
+select create_hypertable('silver.ohlc_daily', by_range('date', INTERVAL '1 day'), if_not_exists => TRUE);
+create index if not exists ohlc_daily_pair_date_desc_idx on silver.ohlc_daily (pair, date desc);
 
 -- Create silver.ohlc_weekly
-drop table silver.ohlc_weekly;
-create table silver.ohlc_weekly (
+create table if not exists silver.ohlc_weekly (
     date DATE,
     pair TEXT,
     open DOUBLE PRECISION,
@@ -48,12 +70,11 @@ create table silver.ohlc_weekly (
     count INTEGER,
     primary key (date, pair)
 );
-select create_hypertable('silver.ohlc_weekly', by_range('date', INTERVAL '1 week'));
-
+select create_hypertable('silver.ohlc_weekly', by_range('date', INTERVAL '1 week'), if_not_exists => TRUE);
+create index if not exists ohlc_weekly_pair_date_desc_idx on silver.ohlc_weekly (pair, date desc);
 
 -- Create silver.ohlc_monthly
-drop table silver.ohlc_monthly;
-create table silver.ohlc_monthly (
+create table if not exists silver.ohlc_monthly (
     date DATE,
     pair TEXT,
     open DOUBLE PRECISION,
@@ -64,11 +85,11 @@ create table silver.ohlc_monthly (
     count INTEGER,
     primary key (date, pair)
 );
+select create_hypertable('silver.ohlc_monthly', by_range('date', INTERVAL '1 month'), if_not_exists => TRUE);
+create index if not exists ohlc_monthly_pair_date_desc_idx on silver.ohlc_monthly (pair, date desc);
 
 -- Create gold.ohlc_ta_daily
-select create_hypertable('silver.ohlc_monthly', by_range('date', INTERVAL '1 month'));
-drop table if exists gold.ohlc_ta_daily;
-create table if not exists gold.ohlc_ta_daily(
+create table if not exists gold.ohlc_ta_daily (
     date DATE,
     pair TEXT,
     open DOUBLE PRECISION,
@@ -86,11 +107,11 @@ create table if not exists gold.ohlc_ta_daily(
     macd_bar DOUBLE PRECISION,
     primary key (date, pair)
 );
-select create_hypertable('gold.ohlc_ta_daily', by_range('date', INTERVAL '1 day'));
+select create_hypertable('gold.ohlc_ta_daily', by_range('date', INTERVAL '1 day'), if_not_exists => TRUE);
+create index if not exists ohlc_ta_daily_pair_date_desc_idx on gold.ohlc_ta_daily (pair, date desc);
 
 -- Create gold.ohlc_ta_weekly
-drop table if exists gold.ohlc_ta_weekly;
-create table if not exists gold.ohlc_ta_weekly(
+create table if not exists gold.ohlc_ta_weekly (
     date DATE,
     pair TEXT,
     open DOUBLE PRECISION,
@@ -108,11 +129,11 @@ create table if not exists gold.ohlc_ta_weekly(
     macd_bar DOUBLE PRECISION,
     primary key (date, pair)
 );
-select create_hypertable('gold.ohlc_ta_weekly', by_range('date', INTERVAL '1 week'));
+select create_hypertable('gold.ohlc_ta_weekly', by_range('date', INTERVAL '1 week'), if_not_exists => TRUE);
+create index if not exists ohlc_ta_weekly_pair_date_desc_idx on gold.ohlc_ta_weekly (pair, date desc);
 
 -- Create gold.ohlc_ta_monthly
-drop table if exists gold.ohlc_ta_monthly;
-create table if not exists gold.ohlc_ta_monthly(
+create table if not exists gold.ohlc_ta_monthly (
     date DATE,
     pair TEXT,
     open DOUBLE PRECISION,
@@ -130,4 +151,5 @@ create table if not exists gold.ohlc_ta_monthly(
     macd_bar DOUBLE PRECISION,
     primary key (date, pair)
 );
-select create_hypertable('gold.ohlc_ta_monthly', by_range('date', INTERVAL '1 month'));
\ No newline at end of file
+select create_hypertable('gold.ohlc_ta_monthly', by_range('date', INTERVAL '1 month'), if_not_exists => TRUE);
+create index if not exists ohlc_ta_monthly_pair_date_desc_idx on gold.ohlc_ta_monthly (pair, date desc);
@@ -0,0 +1,1065 @@
+"""Single entry point for the pipelines and the LLM analysis.
+
+Heavy dependencies (pandas, plotly, langchain, psycopg2, minio) are imported
+inside each command so only the command that runs pays for them.
+"""
+
+import argparse
+import importlib
+import os
+import re
+import subprocess
+import sys
+from datetime import datetime
+
+from src.utils.profiling import add_profiling_arguments, profiling_session
+
+# Modules imported by each command, used by the `importtime` report
+COMMAND_MODULES = {
+    "analyze": ["src.ta_analysis"],
+    "serve": ["src.service.analyzer_service"],
+    "source": ["pipelines.source_to_minio.kraken_ohlc"],
+    "bronze": ["pipelines.bronze.ohlc"],
+    "silver": ["pipelines.silver.ohlc_daily"],
+    "gold": ["pipelines.gold.ohlc_ta"],
+    "checkpoints": ["src.utils.checkpoint"],
+    "hypertable": ["src.timescaledb_ops"],
+    "tier-bronze": ["pipelines.bronze.ohlc_tiering"],
+    "compact-minio": ["pipelines.source_to_minio.ohlc_compaction"],
+    "schema": ["src.schema"],
+    "coverage": ["src.orchestrator.fetch_planner", "src.timescaledb_ops"],
+    "orchestrate": ["pipelines.orchestrator.ohlc_dag"],
+    "schedule": ["pipelines.orchestrator.ohlc_schedule"],
+    "listen": ["pipelines.orchestrator.ohlc_refresh"],
+    "initial-load": ["initial_load"],
+    "bench": ["benchmarks.runner"],
+    "scale-test": ["benchmarks.harness.scaling"],
+    "cli": ["cli"],
+}
+
+
+def parse_date(value: str) -> datetime:
+    return datetime.strptime(value, "%Y-%m-%d")
+
+
+# =========================================================================
+# Commands
+# =========================================================================
+def run_analyze(args: argparse.Namespace):
+    from src.ta_analysis import TechnicalAnalysisRunner
+
+    runner = TechnicalAnalysisRunner(
+        mode=args.mode,
+        max_rows=args.max_rows,
+        token_budget=args.token_budget,
+        max_image_bytes=args.max_image_bytes,
+        max_image_tokens=args.max_image_tokens,
+    )
+    try:
+        runner.run(pair=args.pair, timeframe=args.timeframe, start_date=args.start_date)
+    finally:
+        runner.close()
+
+
+def run_serve(args: argparse.Namespace):
+    from src.service.analyzer_service import AnalyzerService
+    from src.ta_analysis import TechnicalAnalysisRunner
+
+    service = AnalyzerService(
+        TechnicalAnalysisRunner(
+            mode=args.mode,
+            max_rows=args.max_rows,
+            token_budget=args.token_budget,
+            max_image_bytes=args.max_image_bytes,
+            max_image_tokens=args.max_image_tokens,
+        )
+    )
+    server = service.create_server(host=args.host, port=args.port)
+    print(f"Serving on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+def run_layer(args: argparse.Namespace):
+    package = {
+        "source": "source_to_minio",
+        "bronze": "bronze",
+        "silver": "silver",
+        "gold": "gold",
+    }[args.command]
+    pipeline_module = importlib.import_module(
+        f"pipelines.{package}.{args.pipeline_name}"
+    )
+
+    checkpoint_store = None
+    if args.command in ("source", "bronze"):
+        kwargs = {"pair": args.pair, "interval": args.interval}
+        if args.command == "bronze":
+            kwargs["batch_size"] = args.batch_size
+        if args.checkpoint:
+            from src.utils.checkpoint import CheckpointStore
+
+            checkpoint_store = CheckpointStore()
+            kwargs.update(checkpoint_store=checkpoint_store, run_id=args.run_id)
+    else:
+        kwargs = {"source": args.source, "target": args.target}
+
+    if getattr(args, "with_cold", False):
+        if args.command != "silver" or args.source != "bronze.ohlc":
+            sys.exit("--with-cold only rebuilds silver from bronze.ohlc")
+        # Rebuild over the offloaded bronze chunks too
+        from pipelines.bronze.ohlc_tiering import BronzeLake
+
+        with BronzeLake().rehydrate(args.start_date, args.end_date) as source:
+            kwargs["source"] = source
+            succeeded = pipeline_module.DataPipeline(
+                start_date=args.start_date, end_date=args.end_date, **kwargs
+            ).run()
+        if not succeeded:
+            sys.exit(1)
+        return
+
+    pipeline = pipeline_module.DataPipeline(
+        start_date=args.start_date, end_date=args.end_date, **kwargs
+    )
+    succeeded = False
+    try:
+        succeeded = pipeline.run()
+    finally:
+        if checkpoint_store is not None:
+            if succeeded:
+                checkpoint_store.clear(pipeline.run_id)
+            else:
+                print(f"Resume with --checkpoint --run-id {pipeline.run_id}")
+            checkpoint_store.close()
+    if not succeeded:
+        sys.exit(1)
+
+
+def run_schema(args: argparse.Namespace):
+    from src.schema import SchemaManager, hot_queries
+    from src.timescaledb_ops import TimescaleDBOps
+
+    db_ops = TimescaleDBOps()
+    try:
+        manager = SchemaManager(db_ops)
+        if args.action == "apply":
+            manager.apply()
+            return
+        failures = manager.check_query_plans(hot_queries(pair=args.pair))
+    finally:
+        db_ops.close_connection()
+    for name, relations in failures.items():
+        print(f"{name}: sequential scan of {', '.join(relations)}", file=sys.stderr)
+    if failures:
+        print(
+            f"{len(failures)} hot query plan(s) fall back to sequential scans",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+    print("Every hot query is served by an index.")
+
+
+def run_tier_bronze(args: argparse.Namespace):
+    from datetime import timedelta
+
+    from pipelines.bronze.ohlc_tiering import DataPipeline
+
+    DataPipeline(
+        older_than=timedelta(days=args.older_than_days), dry_run=args.dry_run
+    ).run()
+
+
+def run_compact_minio(args: argparse.Namespace):
+    from pipelines.source_to_minio.ohlc_compaction import DataPipeline
+
+    if not DataPipeline(
+        min_files=args.min_files,
+        small_bytes=int(args.small_mb * 1024 * 1024),
+        dry_run=args.dry_run,
+    ).run():
+        sys.exit(1)
+
+
+def run_coverage(args: argparse.Namespace):
+    from src.orchestrator.fetch_planner import plan_fetch
+    from src.timescaledb_ops import TimescaleDBOps
+
+    db_ops = TimescaleDBOps()
+    try:
+        for pair in args.pairs:
+            for interval in args.intervals:
+                plan = plan_fetch(
+                    db_ops, pair, interval, args.start_date, args.end_date
+                )
+                print(plan.summary())
+                for start, end in plan.ranges:
+                    print(
+                        f"  {datetime.fromtimestamp(start):%Y-%m-%d %H:%M} -> "
+                        f"{datetime.fromtimestamp(end):%Y-%m-%d %H:%M}"
+                    )
+    finally:
+        db_ops.close_connection()
+
+
+def run_hypertable(args: argparse.Namespace):
+    from src.timescaledb_ops import TimescaleDBOps
+
+    db_ops = TimescaleDBOps()
+    try:
+        if args.chunk_interval:
+            db_ops.set_chunk_interval(args.table, args.chunk_interval)
+        if args.compress:
+            db_ops.enable_compression(
+                args.table, segmentby=args.segmentby, orderby=args.orderby
+            )
+        if args.remove_policies:
+            db_ops.remove_policies(args.table)
+        if args.compress_after:
+            db_ops.add_compression_policy(args.table, args.compress_after)
+        if args.drop_after:
+            db_ops.add_retention_policy(args.table, args.drop_after)
+
+        stats = db_ops.get_compression_stats(args.table)
+        if stats is None:
+            sys.exit(f"Could not read the statistics of {args.table}")
+        for key, value in stats.items():
+            print(f"{key:<32} {value}")
+        if args.chunks:
+            print(
+                f"\n{'chunk':<48} {'range start':<26} {'compressed':>10} {'bytes':>12}"
+            )
+            for chunk in db_ops.get_chunk_stats(args.table):
+                print(
+                    f"{chunk['chunk']:<48} {str(chunk['range_start']):<26} "
+                    f"{str(chunk['is_compressed']):>10} {chunk['total_bytes'] or 0:>12}"
+                )
+    finally:
+        db_ops.close_connection()
+
+
+def run_checkpoints(args: argparse.Namespace):
+    from src.utils.checkpoint import CheckpointStore
+
+    store = CheckpointStore()
+    try:
+        if args.clear:
+            store.clear(args.clear)
+            return
+        for run in store.runs():
+            updated_at = datetime.fromtimestamp(run["updated_at"]).strftime(
+                "%Y-%m-%d %H:%M:%S"
+            )
+            print(f"{run['run_id']:<48} {run['units']:>6} units  {updated_at}")
+    finally:
+        store.close()
+
+
+def run_orchestrate(args: argparse.Namespace):
+    from pipelines.orchestrator.ohlc_dag import build_dag
+
+    dag, connection_pool = build_dag(
+        pairs=args.pairs,
+        intervals=args.intervals,
+        timeframes=args.timeframes,
+        start_date=args.start_date,
+        end_date=args.end_date,
+        batch_size=args.batch_size,
+        max_workers=args.max_workers,
+        state_path=args.state_path,
+        incremental=args.incremental,
+    )
+    try:
+        status = dag.run()
+    finally:
+        connection_pool.closeall()
+    failed = [
+        name for name, value in status.items() if value in ("failed", "upstream_failed")
+    ]
+    if failed:
+        print(f"{len(failed)} node(s) failed: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+def run_schedule(args: argparse.Namespace):
+    from pipelines.orchestrator.ohlc_schedule import build_scheduler
+    from src.ta_analysis import TechnicalAnalysisRunner
+
+    scheduler, runner, connection_pool = build_scheduler(
+        pairs=args.pairs,
+        intervals=args.intervals,
+        timeframes=args.timeframes,
+        analysis_pair=args.analysis_pair,
+        chart_days=args.chart_days,
+        lookback_candles=args.lookback_candles,
+        settle_seconds=args.settle_seconds,
+        batch_size=args.batch_size,
+        max_workers=args.max_workers,
+        state_path=args.state_path,
+        latency_log_path=args.latency_log,
+        runner=TechnicalAnalysisRunner(
+            mode=args.mode,
+            max_rows=args.max_rows,
+            token_budget=args.token_budget,
+            max_image_bytes=args.max_image_bytes,
+            max_image_tokens=args.max_image_tokens,
+        ),
+    )
+    listener = None
+    if args.listen:
+        from pipelines.orchestrator.ohlc_refresh import build_refresh_listener
+
+        # Own pool, the DAG may use every connection of the scheduler's
+        listener, listener_pool = build_refresh_listener(
+            timeframes=args.timeframes, debounce_seconds=args.debounce_seconds
+        )
+        listener.start()
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scheduler.stop()
+        if listener is not None:
+            listener.stop()
+            listener_pool.closeall()
+        runner.close()
+        connection_pool.closeall()
+
+
+def run_listen(args: argparse.Namespace):
+    from pipelines.orchestrator.ohlc_refresh import build_refresh_listener
+
+    listener, connection_pool = build_refresh_listener(
+        timeframes=args.timeframes,
+        debounce_seconds=args.debounce_seconds,
+        max_delay_seconds=args.max_delay_seconds,
+    )
+    try:
+        listener.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        connection_pool.closeall()
+        print(f"{listener.notifications} notifications, {listener.refreshes} refreshes")
+
+
+def run_initial_load(args: argparse.Namespace):
+    from initial_load import run_initial_load
+
+    run_initial_load(bulk=args.bulk, workers=args.workers, chunk_days=args.chunk_days)
+
+
+def run_bench(args: argparse.Namespace):
+    from benchmarks.runner import (
+        compare_results,
+        load_results,
+        print_comparison,
+        run_benchmarks,
+        save_results,
+    )
+
+    current = run_benchmarks(
+        pattern=args.filter,
+        scale=args.scale,
+        repeat=args.repeat,
+        min_time=args.min_time,
+    )
+    save_results(current, args.output)
+    if args.baseline:
+        baseline = load_results(args.baseline)
+        rows, regressions = compare_results(baseline, current, threshold=args.threshold)
+        print_comparison(baseline, current, rows)
+        if regressions:
+            print(
+                f"{len(regressions)} benchmark(s) regressed more than {args.threshold:.0%}",
+                file=sys.stderr,
+            )
+            sys.exit(1)
+
+
+def run_bench_compare(args: argparse.Namespace):
+    from benchmarks.runner import compare_results, load_results, print_comparison
+
+    baseline, current = load_results(args.baseline), load_results(args.current)
+    rows, regressions = compare_results(
+        baseline, current, threshold=args.threshold, statistic=args.statistic
+    )
+    print_comparison(baseline, current, rows)
+    if regressions:
+        print(
+            f"{len(regressions)} benchmark(s) regressed more than {args.threshold:.0%}",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+
+def run_scale_test(args: argparse.Namespace):
+    import json
+
+    from benchmarks.harness.scaling import plot_report, print_report, run_scaling
+
+    report = run_scaling(
+        pairs=args.pairs,
+        intervals=args.intervals,
+        years=args.years,
+        database={
+            "host": args.db_host,
+            "port": args.db_port,
+            "db": args.db_name,
+            "user": args.db_user,
+            "password": args.db_password,
+        },
+        minio=args.minio,
+        workers=args.workers,
+        kraken_latency=args.kraken_latency,
+        create_schema=not args.keep_schema,
+    )
+    print_report(report)
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Report written to {args.output}")
+    if args.plot:
+        plot_report(report, args.plot)
+
+
+def run_importtime(args: argparse.Namespace):
+    """Report the import time of a command using `python -X importtime`"""
+    modules = COMMAND_MODULES[args.target]
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+        capture_output=True,
+        text=True,
+    )
+
+    # Lines look like: "import time:       123 |       4567 |   package.module"
+    pattern = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+    imports = []
+    for line in result.stderr.splitlines():
+        match = pattern.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            imports.append((int(cumulative_us), int(self_us), len(indent), module))
+
+    if result.returncode != 0 or not imports:
+        print(result.stderr, file=sys.stderr)
+        sys.exit(result.returncode or 1)
+
+    # Top-level imports (smallest indentation) add up to the total import time
+    top_level = min(indent for _, _, indent, _ in imports)
+    total_ms = sum(c for c, _, indent, _ in imports if indent == top_level) / 1000
+
+    print(f"Import time of '{args.target}': {total_ms:.1f} ms")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for cumulative_us, self_us, _, module in sorted(imports, reverse=True)[: args.top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {module}")
+
+    if args.max_ms is not None and total_ms > args.max_ms:
+        print(
+            f"Import time regression: {total_ms:.1f} ms > {args.max_ms} ms",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+
+# =========================================================================
+# Parser
+# =========================================================================
+def add_date_range_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--start-date",
+        type=parse_date,
+        required=True,
+        help="The start date to process the data in YYYY-MM-DD format",
+    )
+    parser.add_argument(
+        "--end-date",
+        type=parse_date,
+        required=True,
+        help="The end date to process the data in YYYY-MM-DD format",
+    )
+
+
+def add_analysis_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--mode",
+        type=str,
+        choices=["image", "numeric", "hybrid"],
+        default="image",
+        help="Context given to the LLM: chart image, numeric table of the latest rows, or both.",
+    )
+    parser.add_argument(
+        "--max-rows",
+        type=int,
+        default=60,
+        help="Maximum number of rows inside the numeric context.",
+    )
+    parser.add_argument(
+        "--token-budget",
+        type=int,
+        default=2000,
+        help="Target input-token budget of the numeric context.",
+    )
+    parser.add_argument(
+        "--max-image-bytes",
+        type=int,
+        default=500_000,
+        help="Byte budget of the chart image sent to the LLM and Discord.",
+    )
+    parser.add_argument(
+        "--max-image-tokens",
+        type=int,
+        default=1600,
+        help="Token budget of the chart image sent to the LLM.",
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="cli")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    # analyze
+    analyze = subparsers.add_parser("analyze", help="Analyze a chart with the LLM")
+    analyze.add_argument(
+        "--pair",
+        type=str,
+        required=True,
+        help="Cryptocurrency asset pair that wanted to be analyzed.",
+    )
+    analyze.add_argument(
+        "--timeframe",
+        type=str,
+        required=True,
+        help="Timeframe of the cryptocurrency asset.",
+    )
+    analyze.add_argument(
+        "--start-date",
+        type=str,
+        required=True,
+        help="The start date to process the data in YYYY-MM-DD format",
+    )
+    add_analysis_arguments(analyze)
+    analyze.set_defaults(func=run_analyze)
+
+    # serve
+    serve = subparsers.add_parser(
+        "serve", help="Serve /analyze over HTTP with warm caches"
+    )
+    serve.add_argument("--host", type=str, default="127.0.0.1", help="Host to bind")
+    serve.add_argument("--port", type=int, default=8080, help="Port to bind")
+    add_analysis_arguments(serve)
+    serve.set_defaults(func=run_serve)
+
+    # source / bronze
+    for command, help in (
+        ("source", "Ingest data from Kraken REST API to MinIO"),
+        ("bronze", "Ingest data from MinIO to the bronze layer"),
+    ):
+        layer = subparsers.add_parser(command, help=help)
+        layer.add_argument(
+            "--pipeline-name", type=str, required=True, help="Name of the pipeline"
+        )
+        layer.add_argument(
+            "--pair", type=str, required=True, help="Pair of the cryptocurrency"
+        )
+        layer.add_argument(
+            "--interval", type=int, required=True, help="Interval in minutes"
+        )
+        add_date_range_arguments(layer)
+        if command == "bronze":
+            layer.add_argument(
+                "--batch-size", type=int, required=True, help="Number of rows per batch"
+            )
+        layer.add_argument(
+            "--checkpoint",
+            action="store_true",
+            help="Record committed pages, objects and batches, a rerun resumes after them "
+            "(cleared once the run succeeded)",
+        )
+        layer.add_argument(
+            "--run-id",
+            type=str,
+            default=None,
+            help="Run id of the checkpoints, printed by a failed run to resume it "
+            "(defaults to one derived from the arguments)",
+        )
+        layer.set_defaults(func=run_layer)
+
+    # silver / gold
+    for command, help in (
+        ("silver", "Aggregate the bronze layer into the silver layer"),
+        ("gold", "Calculate technical indicators into the gold layer"),
+    ):
+        layer = subparsers.add_parser(command, help=help)
+        layer.add_argument(
+            "--pipeline-name", type=str, required=True, help="Name of the pipeline"
+        )
+        layer.add_argument("--source", type=str, required=True, help="Source table")
+        layer.add_argument("--target", type=str, required=True, help="Target table")
+        add_date_range_arguments(layer)
+        if command == "silver":
+            layer.add_argument(
+                "--with-cold",
+                action="store_true",
+                help="Read the bronze chunks offloaded to MinIO too (source must be bronze.ohlc)",
+            )
+        layer.set_defaults(func=run_layer)
+
+    # schema
+    schema = subparsers.add_parser(
+        "schema",
+        help="Apply the declared tables and indexes or check the hot query plans",
+    )
+    schema.add_argument(
+        "action",
+        choices=["apply", "check"],
+        help="apply: create what is missing (nothing is dropped), "
+        "check: fail when a hot query plans a sequential scan",
+    )
+    schema.add_argument(
+        "--pair", type=str, default="XXBTZUSD", help="Pair used in the checked plans"
+    )
+    schema.set_defaults(func=run_schema)
+
+    # tier-bronze
+    tier_bronze = subparsers.add_parser(
+        "tier-bronze", help="Offload the old bronze chunks to parquet in MinIO"
+    )
+    tier_bronze.add_argument(
+        "--older-than-days",
+        type=int,
+        required=True,
+        help="Offload the chunks ending more than this many days ago",
+    )
+    tier_bronze.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Export and verify the chunks without dropping them",
+    )
+    tier_bronze.set_defaults(func=run_tier_bronze)
+
+    # compact-minio
+    compact_minio = subparsers.add_parser(
+        "compact-minio",
+        help="Merge the small source objects into monthly parquet files",
+    )
+    compact_minio.add_argument(
+        "--min-files",
+        type=int,
+        default=2,
+        help="Small objects a pair and interval needs before being compacted",
+    )
+    compact_minio.add_argument(
+        "--small-mb",
+        type=float,
+        default=16.0,
+        help="Objects smaller than this are compacted",
+    )
+    compact_minio.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only report the files that would be written",
+    )
+    compact_minio.set_defaults(func=run_compact_minio)
+
+    # hypertable
+    hypertable = subparsers.add_parser(
+        "hypertable",
+        help="Manage chunk sizing, compression and retention of a hypertable",
+    )
+    hypertable.add_argument("table", type=str, help="Hypertable, e.g. bronze.ohlc")
+    hypertable.add_argument(
+        "--chunk-interval",
+        type=str,
+        default=None,
+        help="Time range of new chunks, e.g. '30 days'",
+    )
+    hypertable.add_argument(
+        "--compress", action="store_true", help="Enable native compression"
+    )
+    hypertable.add_argument(
+        "--segmentby",
+        type=str,
+        default="pair",
+        help="Columns segmenting the compressed data",
+    )
+    hypertable.add_argument(
+        "--orderby",
+        type=str,
+        default="time DESC",
+        help="Order inside a segment ('date DESC' for the silver and gold tables)",
+    )
+    hypertable.add_argument(
+        "--compress-after",
+        type=str,
+        default=None,
+        help="Compression policy, e.g. '30 days'",
+    )
+    hypertable.add_argument(
+        "--drop-after", type=str, default=None, help="Retention policy, e.g. '5 years'"
+    )
+    hypertable.add_argument(
+        "--remove-policies",
+        action="store_true",
+        help="Remove the compression and retention policies (before adding new ones)",
+    )
+    hypertable.add_argument("--chunks", action="store_true", help="List every chunk")
+    hypertable.set_defaults(func=run_hypertable)
+
+    # checkpoints
+    checkpoints = subparsers.add_parser(
+        "checkpoints", help="List the checkpointed runs or clear one of them"
+    )
+    checkpoints.add_argument(
+        "--clear", type=str, metavar="RUN_ID", default=None, help="Forget the run"
+    )
+    checkpoints.set_defaults(func=run_checkpoints)
+
+    # orchestrate
+    orchestrate = subparsers.add_parser(
+        "orchestrate", help="Run source -> bronze -> silver -> gold as one DAG"
+    )
+    orchestrate.add_argument(
+        "--pairs",
+        type=str,
+        nargs="+",
+        required=True,
+        help="Pairs of the cryptocurrencies",
+    )
+    orchestrate.add_argument(
+        "--intervals", type=int, nargs="+", required=True, help="Intervals in minutes"
+    )
+    orchestrate.add_argument(
+        "--timeframes",
+        type=str,
+        nargs="+",
+        default=["daily", "weekly", "monthly"],
+        choices=["daily", "weekly", "monthly"],
+        help="Timeframes of the silver and gold layers",
+    )
+    add_date_range_arguments(orchestrate)
+    orchestrate.add_argument(
+        "--batch-size", type=int, default=1000, help="Batch size of the bronze layer"
+    )
+    orchestrate.add_argument(
+        "--max-workers",
+        type=int,
+        default=4,
+        help="Number of nodes running at the same time",
+    )
+    orchestrate.add_argument(
+        "--state-path",
+        type=str,
+        default=".orchestrator_state.json",
+        help="File storing the fingerprints of the last run",
+    )
+    orchestrate.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Fetch only the ranges missing from the bronze layer",
+    )
+    orchestrate.set_defaults(func=run_orchestrate)
+
+    # coverage
+    coverage = subparsers.add_parser(
+        "coverage",
+        help="Report the bronze coverage and the ranges an incremental fetch would request",
+    )
+    coverage.add_argument(
+        "--pairs",
+        type=str,
+        nargs="+",
+        required=True,
+        help="Pairs of the cryptocurrencies",
+    )
+    coverage.add_argument(
+        "--intervals", type=int, nargs="+", required=True, help="Intervals in minutes"
+    )
+    add_date_range_arguments(coverage)
+    coverage.set_defaults(func=run_coverage)
+
+    # schedule
+    schedule = subparsers.add_parser(
+        "schedule",
+        help="Run the pipelines and the analysis right after each candle close",
+    )
+    schedule.add_argument(
+        "--pairs",
+        type=str,
+        nargs="+",
+        required=True,
+        help="Pairs of the cryptocurrencies",
+    )
+    schedule.add_argument(
+        "--intervals", type=int, nargs="+", required=True, help="Intervals in minutes"
+    )
+    schedule.add_argument(
+        "--timeframes",
+        type=str,
+        nargs="+",
+        default=["daily", "weekly", "monthly"],
+        choices=["daily", "weekly", "monthly"],
+        help="Timeframes of the silver and gold layers and of the analysis",
+    )
+    schedule.add_argument(
+        "--analysis-pair",
+        type=str,
+        required=True,
+        help="Pair analyzed by the LLM, as stored in the gold layer",
+    )
+    schedule.add_argument(
+        "--chart-days", type=int, default=365, help="Number of days shown in the chart"
+    )
+    schedule.add_argument(
+        "--lookback-candles",
+        type=int,
+        default=3,
+        help="Candles fetched again on each run",
+    )
+    schedule.add_argument(
+        "--settle-seconds",
+        type=float,
+        default=30.0,
+        help="Seconds waited after a close so Kraken publishes the closed candle",
+    )
+    schedule.add_argument(
+        "--batch-size", type=int, default=1000, help="Batch size of the bronze layer"
+    )
+    schedule.add_argument(
+        "--max-workers",
+        type=int,
+        default=4,
+        help="Number of nodes running at the same time",
+    )
+    schedule.add_argument(
+        "--state-path",
+        type=str,
+        default=".orchestrator_state.json",
+        help="File storing the fingerprints of the last run",
+    )
+    schedule.add_argument(
+        "--latency-log",
+        type=str,
+        default="scheduler_latency.jsonl",
+        help="JSON lines file receiving the close -> Discord latency of each run",
+    )
+    schedule.add_argument(
+        "--listen",
+        action="store_true",
+        help="Also refresh silver and gold when another process loads bronze",
+    )
+    schedule.add_argument(
+        "--debounce-seconds",
+        type=float,
+        default=2.0,
+        help="Quiet time before a refresh",
+    )
+    add_analysis_arguments(schedule)
+    schedule.set_defaults(func=run_schedule)
+
+    # listen
+    listen = subparsers.add_parser(
+        "listen", help="Refresh silver and gold as soon as bronze loads notify"
+    )
+    listen.add_argument(
+        "--timeframes",
+        type=str,
+        nargs="+",
+        default=["daily", "weekly", "monthly"],
+        choices=["daily", "weekly", "monthly"],
+        help="Timeframes of the silver and gold layers",
+    )
+    listen.add_argument(
+        "--debounce-seconds",
+        type=float,
+        default=2.0,
+        help="Refresh once no notification arrived for this long",
+    )
+    listen.add_argument(
+        "--max-delay-seconds",
+        type=float,
+        default=30.0,
+        help="Refresh at the latest this long after the first pending notification",
+    )
+    listen.set_defaults(func=run_listen)
+
+    # initial-load
+    initial_load = subparsers.add_parser(
+        "initial-load", help="Load the historical data into MinIO and the bronze layer"
+    )
+    initial_load.add_argument(
+        "--no-bulk",
+        dest="bulk",
+        action="store_false",
+        help="Load the history with batched upserts instead of the bulk COPY mode",
+    )
+    initial_load.add_argument(
+        "--workers", type=int, default=4, help="Time chunks loaded at the same time"
+    )
+    initial_load.add_argument(
+        "--chunk-days",
+        type=int,
+        default=30,
+        help="Days per time chunk of the bulk mode",
+    )
+    initial_load.set_defaults(func=run_initial_load)
+
+    # bench / bench-compare
+    bench = subparsers.add_parser(
+        "bench", help="Run the micro-benchmarks of the hot paths"
+    )
+    bench.add_argument(
+        "--filter",
+        type=str,
+        default="*",
+        help="Glob pattern of the cases, e.g. 'gold_*'",
+    )
+    bench.add_argument(
+        "--scale",
+        type=str,
+        choices=["quick", "full"],
+        default="quick",
+        help="Run a subset of the sizes or every size (up to 500 pairs)",
+    )
+    bench.add_argument("--repeat", type=int, default=5, help="Repeats per case")
+    bench.add_argument(
+        "--min-time", type=float, default=0.2, help="Target seconds per repeat"
+    )
+    bench.add_argument(
+        "--output",
+        type=str,
+        default="benchmarks/results/latest.json",
+        help="JSON file receiving the results (use it as a baseline later)",
+    )
+    bench.add_argument(
+        "--baseline", type=str, default=None, help="Compare with this JSON baseline"
+    )
+    bench.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="Allowed slowdown, 0.10 means 10%%",
+    )
+    bench.set_defaults(func=run_bench)
+
+    bench_compare = subparsers.add_parser(
+        "bench-compare", help="Compare two benchmark results, fails on regressions"
+    )
+    bench_compare.add_argument("baseline", type=str, help="Baseline JSON results")
+    bench_compare.add_argument("current", type=str, help="Current JSON results")
+    bench_compare.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="Allowed slowdown, 0.10 means 10%%",
+    )
+    bench_compare.add_argument(
+        "--statistic",
+        type=str,
+        choices=["min", "median", "mean"],
+        default="median",
+        help="Statistic compared",
+    )
+    bench_compare.set_defaults(func=run_bench_compare)
+
+    # scale-test
+    scale_test = subparsers.add_parser(
+        "scale-test",
+        help="Load-test source -> bronze -> silver -> gold against local stand-ins",
+    )
+    scale_test.add_argument(
+        "--pairs", type=int, nargs="+", default=[1, 10, 50], help="Numbers of pairs"
+    )
+    scale_test.add_argument(
+        "--intervals",
+        type=int,
+        nargs="+",
+        default=[240],
+        help="Intervals loaded per pair",
+    )
+    scale_test.add_argument(
+        "--years", type=float, nargs="+", default=[1, 5], help="Years of history"
+    )
+    scale_test.add_argument(
+        "--workers", type=int, default=4, help="Pipelines running at the same time"
+    )
+    scale_test.add_argument(
+        "--kraken-latency",
+        type=float,
+        default=0.0,
+        help="Seconds added to every fake Kraken response",
+    )
+    scale_test.add_argument(
+        "--minio",
+        type=str,
+        choices=["memory", "container"],
+        default="memory",
+        help="In-process MinIO stand-in or the MinIO configured in the settings",
+    )
+    scale_test.add_argument("--db-host", type=str, default="localhost")
+    scale_test.add_argument("--db-port", type=int, default=55432)
+    scale_test.add_argument("--db-name", type=str, default="harness")
+    scale_test.add_argument("--db-user", type=str, default="postgres")
+    scale_test.add_argument("--db-password", type=str, default="postgres")
+    scale_test.add_argument(
+        "--keep-schema",
+        action="store_true",
+        help="Do not apply the declared schema (the tables are still truncated)",
+    )
+    scale_test.add_argument(
+        "--output",
+        type=str,
+        default="benchmarks/results/scaling.json",
+        help="JSON report",
+    )
+    scale_test.add_argument(
+        "--plot", type=str, default=None, help="HTML file receiving the scaling curves"
+    )
+    scale_test.set_defaults(func=run_scale_test)
+
+    # importtime
+    importtime = subparsers.add_parser(
+        "importtime", help="Report the import time of a command"
+    )
+    importtime.add_argument(
+        "target", type=str, choices=sorted(COMMAND_MODULES), help="Command to measure"
+    )
+    importtime.add_argument(
+        "--top", type=int, default=15, help="Number of slowest modules to show"
+    )
+    importtime.add_argument(
+        "--max-ms",
+        type=float,
+        default=None,
+        help="Exit with an error when the import time exceeds this many milliseconds",
+    )
+    importtime.set_defaults(func=run_importtime)
+
+    # --profile / --trace-malloc on every command running the application
+    for command, subparser in subparsers.choices.items():
+        if command not in (
+            "importtime",
+            "bench-compare",
+            "checkpoints",
+            "hypertable",
+            "schema",
+        ):
+            add_profiling_arguments(subparser)
+
+    return parser
+
+
+def main(argv: list[str] | None = None):
+    args = build_parser().parse_args(argv)
+    with profiling_session(args, name=args.command):
+        args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,56 +1,104 @@
-from pipelines.source_to_minio.kraken_ohlc import DataPipeline as SourceToMinioDataPipeline
+from pipelines.source_to_minio.kraken_ohlc import (
+    DataPipeline as SourceToMinioDataPipeline,
+)
 from pipelines.bronze.ohlc import DataPipeline as MinioToTimescaleDBDataPipeline
+from pipelines.bronze.ohlc_bulk import (
+    DataPipeline as BulkMinioToTimescaleDBDataPipeline,
+)
 from datetime import datetime
-from minio_ops import MinioOPS
-import os
 
-if __name__ == "__main__":
+from src.config import get_settings
+from src.minio_ops import MinioOPS
+from src.utils.checkpoint import CheckpointStore
+
+
+def run_initial_load(bulk: bool = True, workers: int = 4, chunk_days: int = 30):
+    """Load the local history file and the recent data into MinIO and the bronze layer
+
+    Every step is checkpointed, rerunning after a failure resumes where it stopped
+    (the steps ending now are keyed by day). The checkpoints of a step are cleared
+    once it succeeded, so a later initial load starts from scratch.
+
+    Args:
+        bulk (bool, optional): load the history with parallel COPY and deferred
+            indexes instead of batched upserts. Defaults to True.
+        workers (int, optional): chunks loaded at the same time in bulk mode. Defaults to 4.
+        chunk_days (int, optional): days per chunk in bulk mode. Defaults to 30.
+    """
+    checkpoint_store = CheckpointStore()
+    now = datetime.now()
+
+    def today_run(name: str) -> str:
+        return CheckpointStore.make_run_id(name, day=now.date())
+
+    def run_step(pipeline):
+        if pipeline.run():
+            checkpoint_store.clear(pipeline.run_id)
+
     # =========================================================================
     # Load data from local file to MinIO
     # =========================================================================
     file = "20131006_20250331_XXBTZUSD_ohlc_240.parquet"
     minio_ops = MinioOPS()
-    minio_ops.create_bucket(os.getenv("BUCKET_NAME"))
+    minio_ops.create_bucket(get_settings().bucket_name)
     minio_ops.write_object(
-        os.getenv("BUCKET_NAME"),
+        get_settings().bucket_name,
         destination_file=f"{file}",
         source_file=f"tmp/{file}",
     )
-    
+
     # =========================================================================
     # Load data from local file to MinIO
     # =========================================================================
     pipeline = SourceToMinioDataPipeline(
-        pair="XXBTZUSD", 
+        pair="XXBTZUSD",
         interval=240,
-        start_date=datetime(2025, 4, 1), 
-        end_date=datetime.now()
+        start_date=datetime(2025, 4, 1),
+        end_date=now,
+        checkpoint_store=checkpoint_store,
+        run_id=today_run("initial_load.source"),
     )
-    pipeline.run()
-    
+    run_step(pipeline)
+
     # =========================================================================
     # Load from MinIO to TimescaleDB
     # =========================================================================
-    pipeline = MinioToTimescaleDBDataPipeline(
-        pair="XXBTZUSD",
-        interval=240,
-        batch_size=1000,
-        start_date=datetime(2013, 10, 6), 
-        end_date=datetime(2025, 3, 31)
-    )
-    pipeline.run()
-    
+    if bulk:
+        pipeline = BulkMinioToTimescaleDBDataPipeline(
+            pair="XXBTZUSD",
+            interval=240,
+            start_date=datetime(2013, 10, 6),
+            end_date=datetime(2025, 3, 31),
+            chunk_days=chunk_days,
+            workers=workers,
+            checkpoint_store=checkpoint_store,
+        )
+    else:
+        pipeline = MinioToTimescaleDBDataPipeline(
+            pair="XXBTZUSD",
+            interval=240,
+            batch_size=1000,
+            start_date=datetime(2013, 10, 6),
+            end_date=datetime(2025, 3, 31),
+            checkpoint_store=checkpoint_store,
+        )
+    run_step(pipeline)
+
     # =========================================================================
     # Load from MinIO to TimescaleDB (Bronze)
     # =========================================================================
     pipeline = MinioToTimescaleDBDataPipeline(
-        pair="XXBTZUSD", 
+        pair="XXBTZUSD",
         interval=240,
         batch_size=1000,
-        start_date=datetime(2025, 4, 1), 
-        end_date=datetime.now()
+        start_date=datetime(2025, 4, 1),
+        end_date=now,
+        checkpoint_store=checkpoint_store,
+        run_id=today_run("initial_load.bronze"),
     )
-    pipeline.run()
-    
-    
-    
+    run_step(pipeline)
+    checkpoint_store.close()
+
+
+if __name__ == "__main__":
+    run_initial_load()
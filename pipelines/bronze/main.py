@@ -3,6 +3,8 @@ import importlib
 from datetime import datetime
 from types import ModuleType
 
+from src.utils.profiling import add_profiling_arguments, profiling_session
+
 
 def get_pipeline_module(pipeline_name: str) -> ModuleType:
     """Get a pipeline by name inside the bronze folder.
@@ -59,6 +61,8 @@ if __name__ == "__main__":
         help="The end date to process the data in YYYY-MM-DD format",
     )
 
+    add_profiling_arguments(parser)
+
     args = parser.parse_args()
     pair = args.pair
     interval = args.interval
@@ -77,4 +81,5 @@ if __name__ == "__main__":
         end_date=end_date,
         batch_size=batch_size,
     )
-    pipeline.run()
+    with profiling_session(args, name=f"bronze_{args.pipeline_name}"):
+        pipeline.run()
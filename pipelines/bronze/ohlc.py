@@ -1,13 +1,59 @@
-import os
-from datetime import datetime
-from io import BytesIO
+from datetime import datetime, timezone
 
 import pandas as pd
-from dotenv import load_dotenv
+from psycopg2.pool import ThreadedConnectionPool
 
+from src.config import get_settings
 from src.minio_ops import MinioOPS
+from src.orchestrator.refresh_listener import BRONZE_CHANNEL
 from src.timescaledb_ops import TimescaleDBOps
+from src.utils.checkpoint import CheckpointStore
 from src.utils.logger import logger
+from src.utils.metrics import current_span, timed
+from src.utils.ohlc_objects import read_ohlc_object
+
+BRONZE_COLUMNS = (
+    "time",
+    "interval",
+    "pair",
+    "open",
+    "high",
+    "low",
+    "close",
+    "volume",
+    "count",
+)
+
+
+@timed("bronze.transform")
+def transform_rows(df: pd.DataFrame, pair: str, interval: int) -> list[list]:
+    """Convert raw OHLC rows into rows of the `bronze.ohlc` table
+
+    Args:
+        df (pd.DataFrame): raw OHLC data from Kraken.
+        pair (str): pair of the cryptocurrency.
+        interval (int): interval in minutes.
+
+    Returns:
+        list[list]: rows ordered like `BRONZE_COLUMNS`.
+    """
+    return [
+        [
+            datetime.strftime(
+                datetime.fromtimestamp(row["time"], tz=timezone.utc),
+                "%Y-%m-%dT%H:%M:%S.%fZ",
+            ),
+            interval,
+            pair,
+            float(row["open"]),
+            float(row["high"]),
+            float(row["low"]),
+            float(row["close"]),
+            float(row["volume"]),
+            int(row["count"]),
+        ]
+        for _, row in df.iterrows()
+    ]
 
 
 class DataPipeline:
@@ -18,15 +64,37 @@ class DataPipeline:
         batch_size: int,
         start_date: datetime,
         end_date: datetime,
+        data: pd.DataFrame | None = None,
+        minio_ops: MinioOPS | None = None,
+        connection_pool: ThreadedConnectionPool | None = None,
+        checkpoint_store: CheckpointStore | None = None,
+        run_id: str | None = None,
     ):
-        load_dotenv()
         self.pair = pair
         self.interval = interval
         self.batch_size = batch_size
         self.start_date = start_date
         self.end_date = end_date
+        self.data = data  # in-memory batch handed over by the source pipeline
+        self.minio_ops = minio_ops
+        self.connection_pool = connection_pool
+        # Committed batches are recorded so a rerun skips them
+        self.checkpoint_store = checkpoint_store
+        self.run_id = run_id or CheckpointStore.make_run_id(
+            "bronze.ohlc",
+            pair=pair,
+            interval=interval,
+            start_date=start_date,
+            end_date=end_date,
+        )
 
-    def run(self):
+    @timed("pipeline.bronze.ohlc")
+    def run(self) -> bool:
+        """Load the data into `bronze.ohlc`
+
+        Returns:
+            bool: every batch was committed.
+        """
         logger.info(
             f"Data will be ingested from MinIO to TimescaleDB ({self.start_date.strftime('%Y-%m-%d')} to {self.end_date.strftime('%Y-%m-%d')})"
         )
@@ -34,58 +102,80 @@ class DataPipeline:
             # =========================================================================
             # Read data from MinIO
             # =========================================================================
-            logger.info("Reading data from MinIO ...")
-            minio_ops = MinioOPS()
-            data = minio_ops.read_object(
-                bucket_name=os.getenv("BUCKET_NAME"),
-                object_name=f"{self.start_date.strftime('%Y%m%d')}_{self.end_date.strftime('%Y%m%d')}_{self.pair}_ohlc_{self.interval}.parquet"
-            )
-            df = pd.read_parquet(BytesIO(data))
-            logger.info("Successfully read data from MinIO.")
+            if self.data is not None:
+                df = self.data
+                logger.info("Using in-memory data, skipping MinIO read.")
+            else:
+                logger.info("Reading data from MinIO ...")
+                minio_ops = self.minio_ops or MinioOPS()
+                df = read_ohlc_object(
+                    minio_ops,
+                    bucket_name=get_settings().bucket_name,
+                    object_name=f"{self.start_date.strftime('%Y%m%d')}_{self.end_date.strftime('%Y%m%d')}_{self.pair}_ohlc_{self.interval}.parquet",
+                )
+                logger.info("Successfully read data from MinIO.")
 
             # =========================================================================
             # Ingest data into TimescaleDB
             # =========================================================================
             logger.info("Ingesting data from to TimescaleDB ...")
-            db_ops = TimescaleDBOps()
+            current_span().add(rows_in=len(df), rows_out=len(df))
+            db_ops = TimescaleDBOps(self.connection_pool)
+            done = (
+                self.checkpoint_store.done_units(self.run_id, prefix="batch:")
+                if self.checkpoint_store
+                else {}
+            )
+            skipped, failed, committed = 0, 0, 0
             for idx in range(0, len(df), self.batch_size):
                 df_chunk = df.iloc[idx : idx + self.batch_size]
-                data = [
-                    [
-                        datetime.strftime(
-                            datetime.fromtimestamp(row["time"]), "%Y-%m-%dT%H:%M:%S.%fZ"
-                        ),
-                        self.interval,
-                        self.pair,
-                        float(row["open"]),
-                        float(row["high"]),
-                        float(row["low"]),
-                        float(row["close"]),
-                        float(row["volume"]),
-                        int(row["count"]),
-                    ]
-                    for _, row in df_chunk.iterrows()
-                ]
-                db_ops.batch_insert_data(
+                # Keyed by time range so the key survives a change of batch size
+                unit = f"batch:{df_chunk['time'].iloc[0]}:{df_chunk['time'].iloc[-1]}"
+                if unit in done:
+                    skipped += 1
+                    continue
+                if not db_ops.batch_insert_data(
                     "ohlc",
                     schema="bronze",
-                    columns=(
-                        "time",
-                        "interval",
-                        "pair",
-                        "open",
-                        "high",
-                        "low",
-                        "close",
-                        "count",
-                        "volume",
-                    ),
-                    data=data,
+                    columns=BRONZE_COLUMNS,
+                    data=transform_rows(df_chunk, self.pair, self.interval),
                     conflict_columns=["time", "pair"],
+                ):
+                    failed += 1
+                    continue
+                committed += 1
+                if self.checkpoint_store:
+                    self.checkpoint_store.mark_done(
+                        self.run_id, unit, {"rows": len(df_chunk)}
+                    )
+            if committed:
+                # Listeners refresh the silver buckets and gold rows of the range
+                db_ops.notify(
+                    BRONZE_CHANNEL,
+                    {
+                        "pair": self.pair,
+                        "interval": self.interval,
+                        "start": int(df["time"].min()),
+                        "end": int(df["time"].max()),
+                    },
                 )
             db_ops.close_connection()
+            if skipped:
+                logger.info(
+                    f"{skipped} batches already committed by {self.run_id} were skipped."
+                )
+            if failed:
+                resume = (
+                    f", a rerun of {self.run_id} loads only those"
+                    if self.checkpoint_store
+                    else ""
+                )
+                logger.error(f"{failed} batches failed{resume}.")
+                return False
             logger.info("Successfully ingested data from to TimescaleDB.")
+            return True
         except Exception as e:
             logger.error(
                 f"An error occurred during the data pipeline ingestion process: {e}"
             )
+            return False
@@ -0,0 +1,422 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import pandas as pd
+from psycopg2 import sql
+from psycopg2.pool import ThreadedConnectionPool
+
+from pipelines.bronze.ohlc import BRONZE_COLUMNS, transform_rows
+from src.config import get_settings
+from src.minio_ops import MinioOPS
+from src.orchestrator.refresh_listener import BRONZE_CHANNEL
+from src.timescaledb_ops import TimescaleDBOps
+from src.utils.checkpoint import CheckpointStore
+from src.utils.logger import logger
+from src.utils.metrics import bind_span, current_span, timed
+from src.utils.ohlc_objects import read_ohlc_object
+
+SCHEMA = "bronze"
+TABLE = "ohlc"
+CONFLICT_COLUMNS = ["time", "pair"]
+
+
+def chunk_unit(df_chunk: pd.DataFrame) -> str:
+    """Checkpoint unit of a chunk, keyed by its first and last bar"""
+    return f"chunk:{df_chunk['time'].iloc[0]}:{df_chunk['time'].iloc[-1]}"
+
+
+def split_into_chunks(df: pd.DataFrame, chunk_days: int) -> list[pd.DataFrame]:
+    """Split raw OHLC rows into time chunks aligned to multiples of `chunk_days` since the epoch
+
+    TimescaleDB aligns the hypertable chunks the same way, so when `chunk_days`
+    is a multiple of the chunk interval (1 day for `bronze.ohlc`) every hypertable
+    chunk is written by a single worker.
+
+    Args:
+        df (pd.DataFrame): raw OHLC data with the time as Unix timestamps.
+        chunk_days (int): days per chunk.
+
+    Returns:
+        list[pd.DataFrame]: chunks ordered by time.
+    """
+    keys = df["time"].astype("int64") // (chunk_days * 86400)
+    return [chunk for _, chunk in df.groupby(keys, sort=True)]
+
+
+class DataPipeline:
+    def __init__(
+        self,
+        pair: str,
+        interval: int,
+        start_date: datetime,
+        end_date: datetime,
+        batch_size: int = 50000,
+        chunk_days: int = 30,
+        workers: int = 4,
+        data: pd.DataFrame | None = None,
+        minio_ops: MinioOPS | None = None,
+        connection_pool: ThreadedConnectionPool | None = None,
+        checkpoint_store: CheckpointStore | None = None,
+        run_id: str | None = None,
+    ):
+        """Bulk load of a pair's history into `bronze.ohlc`, for first loads
+
+        The range is split into time chunks loaded by parallel workers. When the
+        target range is empty the rows are copied without ON CONFLICT, the
+        secondary indexes are dropped during the load and rebuilt afterwards (the
+        primary key too when the whole table is empty). Otherwise every chunk
+        falls back to the COPY + upsert path. The table is analyzed at the end.
+
+        Args:
+            pair (str): pair of the cryptocurrency.
+            interval (int): interval in minutes.
+            start_date (datetime): start date of the data.
+            end_date (datetime): end date of the data.
+            batch_size (int, optional): maximum rows per COPY. Defaults to 50000.
+            chunk_days (int, optional): days per time chunk. Defaults to 30.
+            workers (int, optional): chunks loaded at the same time. Defaults to 4.
+            data (pd.DataFrame | None, optional): in-memory data, skips the MinIO read. Defaults to None.
+            minio_ops (MinioOPS | None, optional): MinIO operations. Defaults to None.
+            connection_pool (ThreadedConnectionPool | None, optional): pool with at
+                least `workers + 1` connections, a pool is created when missing. Defaults to None.
+            checkpoint_store (CheckpointStore | None, optional): records the loaded chunks,
+                a rerun with the same run id skips them. Defaults to None.
+            run_id (str | None, optional): run id of the checkpoints. Defaults to an id
+                derived from the pair, interval and dates.
+        """
+        self.pair = pair
+        self.interval = interval
+        self.start_date = start_date
+        self.end_date = end_date
+        self.batch_size = batch_size
+        self.chunk_days = chunk_days
+        self.workers = workers
+        self.data = data
+        self.minio_ops = minio_ops
+        self.connection_pool = connection_pool
+        self.checkpoint_store = checkpoint_store
+        self.run_id = run_id or CheckpointStore.make_run_id(
+            "bronze.ohlc_bulk",
+            pair=pair,
+            interval=interval,
+            start_date=start_date,
+            end_date=end_date,
+        )
+
+    def read_data(self) -> pd.DataFrame:
+        if self.data is not None:
+            logger.info("Using in-memory data, skipping MinIO read.")
+            return self.data
+
+        logger.info("Reading data from MinIO ...")
+        minio_ops = self.minio_ops or MinioOPS()
+        df = read_ohlc_object(
+            minio_ops,
+            bucket_name=get_settings().bucket_name,
+            object_name=f"{self.start_date.strftime('%Y%m%d')}_{self.end_date.strftime('%Y%m%d')}_{self.pair}_ohlc_{self.interval}.parquet",
+        )
+        logger.info("Successfully read data from MinIO.")
+        return df
+
+    def is_range_empty(
+        self, db_ops: TimescaleDBOps, start: int, end: int
+    ) -> tuple[bool, bool]:
+        """Check whether the table and the pair's range [start, end] hold rows
+
+        Returns:
+            tuple[bool, bool]: the range is empty, the whole table is empty.
+        """
+        query = sql.SQL(
+            """
+            SELECT
+                NOT EXISTS (
+                    SELECT 1 FROM {target}
+                    WHERE pair = %s AND time >= to_timestamp(%s) AND time <= to_timestamp(%s)
+                ),
+                NOT EXISTS (SELECT 1 FROM {target})
+            """
+        ).format(target=sql.Identifier(SCHEMA, TABLE))
+        result = db_ops.read_query(query, (self.pair, start, end))
+        if not result:
+            # Unknown state, the upsert path is always safe
+            return False, False
+        range_empty, table_empty = result[1][0]
+        return range_empty, table_empty
+
+    def load_chunk(self, df_chunk: pd.DataFrame, upsert: bool) -> int:
+        """Load one time chunk with a connection of its own
+
+        Returns:
+            int: rows loaded, the chunk is checkpointed when every row is loaded.
+        """
+        db_ops = TimescaleDBOps(self.connection_pool)
+        loaded = 0
+        try:
+            for idx in range(0, len(df_chunk), self.batch_size):
+                rows = transform_rows(
+                    df_chunk.iloc[idx : idx + self.batch_size], self.pair, self.interval
+                )
+                if upsert:
+                    committed = db_ops.copy_upsert_data(
+                        TABLE,
+                        schema=SCHEMA,
+                        columns=BRONZE_COLUMNS,
+                        data=rows,
+                        conflict_columns=CONFLICT_COLUMNS,
+                    )
+                    loaded += len(rows) if committed else 0
+                else:
+                    loaded += db_ops.copy_data(
+                        TABLE, schema=SCHEMA, columns=BRONZE_COLUMNS, data=rows
+                    )
+        finally:
+            db_ops.close_connection()
+        if self.checkpoint_store and loaded == len(df_chunk):
+            self.checkpoint_store.mark_done(
+                self.run_id, chunk_unit(df_chunk), {"rows": loaded}
+            )
+        return loaded
+
+    @timed("pipeline.bronze.ohlc_bulk")
+    def run(self) -> bool:
+        """Bulk load the range
+
+        Returns:
+            bool: every row of the range is loaded.
+        """
+        logger.info(
+            f"Data will be bulk loaded from MinIO to TimescaleDB ({self.start_date.strftime('%Y-%m-%d')} to {self.end_date.strftime('%Y-%m-%d')})"
+        )
+        own_pool = self.connection_pool is None
+        if own_pool:
+            self.connection_pool = TimescaleDBOps.create_pool(maxconn=self.workers + 1)
+
+        try:
+            df = self.read_data()
+            if df.empty:
+                logger.info("No data to load.")
+                return True
+
+            # Same bar twice in the source would fail the COPY
+            df = df.drop_duplicates(subset="time", keep="last").sort_values("time")
+            chunks = split_into_chunks(df, self.chunk_days)
+            current_span().add(rows_in=len(df))
+            if self.checkpoint_store:
+                done = self.checkpoint_store.done_units(self.run_id, prefix="chunk:")
+                skipped = [chunk for chunk in chunks if chunk_unit(chunk) in done]
+                chunks = [chunk for chunk in chunks if chunk_unit(chunk) not in done]
+                if skipped:
+                    logger.info(
+                        f"{len(skipped)} chunks already loaded by {self.run_id} are skipped."
+                    )
+                    df = pd.concat(chunks) if chunks else df.iloc[0:0]
+                if not chunks:
+                    logger.info("Every chunk is already loaded.")
+                    return self.restore_deferred()
+
+            db_ops = TimescaleDBOps(self.connection_pool)
+            try:
+                first = int(df["time"].iloc[0])
+                last = int(df["time"].iloc[-1])
+                range_empty, table_empty = self.is_range_empty(db_ops, first, last)
+                indexes, constraints = [], []
+                if range_empty:
+                    indexes = db_ops.get_indexes(TABLE, schema=SCHEMA)
+                    # Without its unique index the table would accept duplicates from
+                    # other writers, so the key is only dropped on a true first load.
+                    # TimescaleDB cannot add it back once compression is enabled.
+                    stats = db_ops.get_compression_stats(f"{SCHEMA}.{TABLE}") or {}
+                    defer_constraints = (
+                        table_empty and stats.get("compression_enabled") is False
+                    )
+                    constraints = (
+                        db_ops.get_constraints(TABLE, schema=SCHEMA)
+                        if defer_constraints
+                        else []
+                    )
+                    if self.checkpoint_store:
+                        # A killed run never reaches the rebuild, its rerun restores them
+                        deferred = (
+                            self.checkpoint_store.done_units(self.run_id).get(
+                                "deferred"
+                            )
+                            or {}
+                        )
+                        self.checkpoint_store.mark_done(
+                            self.run_id,
+                            "deferred",
+                            {
+                                "indexes": indexes + deferred.get("indexes", []),
+                                "constraints": constraints
+                                + deferred.get("constraints", []),
+                            },
+                        )
+                    self.drop_indexes(db_ops, indexes, constraints)
+                else:
+                    logger.info(
+                        f"{self.pair} already has rows between {datetime.fromtimestamp(first, timezone.utc)} "
+                        f"and {datetime.fromtimestamp(last, timezone.utc)}, falling back to upserts."
+                    )
+
+                try:
+                    logger.info(
+                        f"Loading {len(df)} rows in {len(chunks)} chunks of {self.chunk_days} days "
+                        f"with {self.workers} workers ({'COPY' if range_empty else 'COPY + upsert'}) ..."
+                    )
+                    with ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix="bulk-load"
+                    ) as executor:
+                        loaded = sum(
+                            executor.map(
+                                bind_span(
+                                    lambda chunk: self.load_chunk(
+                                        chunk, upsert=not range_empty
+                                    )
+                                ),
+                                chunks,
+                            )
+                        )
+                finally:
+                    if self.checkpoint_store:
+                        indexes, constraints = self.get_deferred()
+                    # Definitions that could not be restored stay recorded for the rerun
+                    missing = self.rebuild_indexes(db_ops, indexes, constraints)
+                    if self.checkpoint_store:
+                        self.checkpoint_store.mark_done(
+                            self.run_id,
+                            "deferred",
+                            {"indexes": missing[0], "constraints": missing[1]},
+                        )
+
+                logger.info(f"Analyzing {SCHEMA}.{TABLE} ...")
+                db_ops.analyze_table(TABLE, schema=SCHEMA)
+                if loaded:
+                    db_ops.notify(
+                        BRONZE_CHANNEL,
+                        {
+                            "pair": self.pair,
+                            "interval": self.interval,
+                            "start": first,
+                            "end": last,
+                        },
+                    )
+            finally:
+                db_ops.close_connection()
+
+            current_span().add(rows_out=loaded)
+            if loaded != len(df):
+                logger.error(
+                    f"Only {loaded} of {len(df)} rows were loaded into {SCHEMA}.{TABLE}."
+                )
+                return False
+            if any(missing):
+                return False
+            logger.info(
+                f"Successfully bulk loaded {loaded} rows into {SCHEMA}.{TABLE}."
+            )
+            return True
+        except Exception as e:
+            logger.error(f"An error occurred during the bulk load process: {e}")
+            return False
+        finally:
+            if own_pool:
+                self.connection_pool.closeall()
+                self.connection_pool = None
+
+    @staticmethod
+    def drop_indexes(
+        db_ops: TimescaleDBOps,
+        indexes: list[tuple[str, str]],
+        constraints: list[tuple[str, str]],
+    ):
+        for name, _ in indexes:
+            logger.info(f"Dropping index {name} until the load is done ...")
+            db_ops.execute_query(
+                sql.SQL("DROP INDEX IF EXISTS {index}").format(
+                    index=sql.Identifier(SCHEMA, name)
+                )
+            )
+        for name, _ in constraints:
+            logger.info(f"Dropping constraint {name} until the load is done ...")
+            db_ops.execute_query(
+                sql.SQL(
+                    "ALTER TABLE {target} DROP CONSTRAINT IF EXISTS {constraint}"
+                ).format(
+                    target=sql.Identifier(SCHEMA, TABLE),
+                    constraint=sql.Identifier(name),
+                )
+            )
+
+    def get_deferred(self) -> tuple[list[tuple[str, str]], list[tuple[str, str]]]:
+        """Indexes and constraints dropped by the run and not restored yet
+
+        Returns:
+            tuple[list[tuple[str, str]], list[tuple[str, str]]]: (name, definition) of the
+                indexes and of the constraints.
+        """
+        deferred = self.checkpoint_store.done_units(self.run_id).get("deferred") or {}
+        return (
+            list(dict.fromkeys(map(tuple, deferred.get("indexes", [])))),
+            list(dict.fromkeys(map(tuple, deferred.get("constraints", [])))),
+        )
+
+    def restore_deferred(self) -> bool:
+        """Restore what a killed or failed run of the same run id left dropped
+
+        Returns:
+            bool: nothing is left to restore.
+        """
+        indexes, constraints = self.get_deferred()
+        if not (indexes or constraints):
+            return True
+        db_ops = TimescaleDBOps(self.connection_pool)
+        try:
+            missing = self.rebuild_indexes(db_ops, indexes, constraints)
+        finally:
+            db_ops.close_connection()
+        self.checkpoint_store.mark_done(
+            self.run_id, "deferred", {"indexes": missing[0], "constraints": missing[1]}
+        )
+        return not any(missing)
+
+    @staticmethod
+    def rebuild_indexes(
+        db_ops: TimescaleDBOps,
+        indexes: list[tuple[str, str]],
+        constraints: list[tuple[str, str]],
+    ) -> tuple[list[tuple[str, str]], list[tuple[str, str]]]:
+        """Restore dropped indexes and constraints
+
+        Returns:
+            tuple[list[tuple[str, str]], list[tuple[str, str]]]: indexes and constraints
+                that could not be restored, e.g. a primary key over duplicate rows.
+        """
+        # Constraints first, the secondary indexes may be built on the same columns
+        for name, definition in constraints:
+            logger.info(f"Restoring constraint {name} ...")
+            db_ops.execute_query(
+                sql.SQL(
+                    "ALTER TABLE {target} ADD CONSTRAINT {constraint} {definition}"
+                ).format(
+                    target=sql.Identifier(SCHEMA, TABLE),
+                    constraint=sql.Identifier(name),
+                    definition=sql.SQL(definition),
+                )
+            )
+        for name, definition in indexes:
+            logger.info(f"Rebuilding index {name} ...")
+            db_ops.execute_query(sql.SQL(definition))
+
+        restored = {name for name, _ in db_ops.get_constraints(TABLE, schema=SCHEMA)}
+        restored |= {name for name, _ in db_ops.get_indexes(TABLE, schema=SCHEMA)}
+        missing_indexes = [index for index in indexes if index[0] not in restored]
+        missing_constraints = [
+            constraint for constraint in constraints if constraint[0] not in restored
+        ]
+        missing = [name for name, _ in missing_constraints + missing_indexes]
+        if missing:
+            logger.error(
+                f"Could not restore {', '.join(missing)} on {SCHEMA}.{TABLE}, "
+                "they stay recorded in the checkpoint for the rerun."
+            )
+        return missing_indexes, missing_constraints
@@ -0,0 +1,430 @@
+import io
+import re
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Iterator
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from psycopg2 import sql
+from psycopg2.pool import ThreadedConnectionPool
+
+from pipelines.bronze.ohlc import BRONZE_COLUMNS
+from src.config import get_settings
+from src.minio_ops import MinioOPS
+from src.timescaledb_ops import TimescaleDBOps
+from src.utils.logger import logger
+from src.utils.metrics import current_span, timed
+
+HYPERTABLE = "bronze.ohlc"
+COLD_PREFIX = "cold/bronze/ohlc"
+REHYDRATED_TABLE = "ohlc_rehydrated"
+UNION_VIEW = "ohlc_all"
+EPOCH = pd.Timestamp(0, tz="UTC")
+OBJECT_PATTERN = re.compile(
+    r"pair=(?P<pair>[^/]+)/interval=(?P<interval>\d+)/year=\d{4}/month=\d{2}/"
+    r"(?P<start>\d{8}T\d{6})_(?P<end>\d{8}T\d{6})\.parquet$"
+)
+TIME_FORMAT = "%Y%m%dT%H%M%S"
+
+
+def to_utc(date: datetime) -> datetime:
+    """Naive datetimes of the lake are UTC"""
+    return date.replace(tzinfo=timezone.utc) if date.tzinfo is None else date
+
+
+def fingerprint(df: pd.DataFrame) -> int:
+    """Hash bronze rows independently of their order and timestamp resolution"""
+    normalized = df[list(BRONZE_COLUMNS)].copy()
+    normalized["time"] = (
+        pd.to_datetime(normalized["time"], utc=True) - EPOCH
+    ) // pd.Timedelta(microseconds=1)
+    normalized = normalized.sort_values(["time", "pair", "interval"]).reset_index(
+        drop=True
+    )
+    return int(pd.util.hash_pandas_object(normalized, index=False).sum())
+
+
+def encode_parquet(df: pd.DataFrame) -> bytes:
+    buffer = io.BytesIO()
+    pq.write_table(
+        pa.Table.from_pandas(df, preserve_index=False), buffer, compression="zstd"
+    )
+    return buffer.getvalue()
+
+
+class BronzeLake:
+    def __init__(
+        self,
+        minio_ops: MinioOPS | None = None,
+        connection_pool: ThreadedConnectionPool | None = None,
+        bucket_name: str | None = None,
+        prefix: str = COLD_PREFIX,
+    ):
+        """Bronze data split between the hypertable (hot) and parquet in MinIO (cold)
+
+        Cold objects are partitioned like
+        `<prefix>/pair=<pair>/interval=<interval>/year=<YYYY>/month=<MM>/<start>_<end>.parquet`,
+        `start` and `end` being the UTC range of the exported chunk.
+
+        Args:
+            minio_ops (MinioOPS | None, optional): MinIO operations. Defaults to a new client.
+            connection_pool (ThreadedConnectionPool | None, optional): pool to take connections from.
+                Defaults to None.
+            bucket_name (str | None, optional): bucket of the cold data. Defaults to the `bucket_name` setting.
+            prefix (str, optional): prefix of the cold objects. Defaults to "cold/bronze/ohlc".
+        """
+        self.minio_ops = minio_ops or MinioOPS()
+        self.connection_pool = connection_pool
+        self.bucket_name = bucket_name or get_settings().bucket_name
+        self.prefix = prefix
+
+    def object_name(
+        self,
+        pair: str,
+        interval: int,
+        year: int,
+        month: int,
+        start: datetime,
+        end: datetime,
+    ) -> str:
+        return (
+            f"{self.prefix}/pair={pair}/interval={interval}/year={year:04d}/month={month:02d}/"
+            f"{start.astimezone(timezone.utc).strftime(TIME_FORMAT)}_{end.astimezone(timezone.utc).strftime(TIME_FORMAT)}.parquet"
+        )
+
+    def list_cold(
+        self,
+        pair: str | None = None,
+        interval: int | None = None,
+        start_date: datetime | None = None,
+        end_date: datetime | None = None,
+    ) -> list[str]:
+        """List the cold objects overlapping [start_date, end_date)
+
+        Returns:
+            list[str]: object names.
+        """
+        prefix = f"{self.prefix}/"
+        if pair is not None:
+            prefix += f"pair={pair}/"
+            if interval is not None:
+                prefix += f"interval={interval}/"
+
+        names = []
+        for name in self.minio_ops.list_objects(self.bucket_name, prefix=prefix):
+            match = OBJECT_PATTERN.search(name)
+            if match is None:
+                continue
+            if interval is not None and int(match["interval"]) != interval:
+                continue
+            start = datetime.strptime(match["start"], TIME_FORMAT).replace(
+                tzinfo=timezone.utc
+            )
+            end = datetime.strptime(match["end"], TIME_FORMAT).replace(
+                tzinfo=timezone.utc
+            )
+            if start_date is not None and end <= to_utc(start_date):
+                continue
+            if end_date is not None and start >= to_utc(end_date):
+                continue
+            names.append(name)
+        return sorted(names)
+
+    def read_object(self, name: str) -> pd.DataFrame:
+        df = pd.read_parquet(
+            io.BytesIO(self.minio_ops.read_object(self.bucket_name, name))
+        )
+        df["time"] = pd.to_datetime(df["time"], utc=True)
+        return df
+
+    def read_cold(
+        self,
+        pairs: list[str] | None,
+        start_date: datetime,
+        end_date: datetime,
+        interval: int | None = None,
+    ) -> pd.DataFrame:
+        start, end = pd.Timestamp(to_utc(start_date)), pd.Timestamp(to_utc(end_date))
+        names = [
+            name
+            for pair in (pairs or [None])
+            for name in self.list_cold(pair, interval, start_date, end_date)
+        ]
+        frames = [self.read_object(name) for name in names]
+        if not frames:
+            return pd.DataFrame(columns=list(BRONZE_COLUMNS))
+        df = pd.concat(frames, ignore_index=True)
+        return df[(df["time"] >= start) & (df["time"] < end)]
+
+    def read_hot(
+        self,
+        pairs: list[str] | None,
+        start_date: datetime,
+        end_date: datetime,
+        interval: int | None = None,
+    ) -> pd.DataFrame:
+        db_ops = TimescaleDBOps(self.connection_pool)
+        try:
+            query = sql.SQL(
+                """
+                SELECT {columns} FROM {table}
+                WHERE time >= %(start)s AND time < %(end)s
+                  AND (%(pairs)s::text[] IS NULL OR pair = ANY(%(pairs)s))
+                  AND (%(interval)s::integer IS NULL OR interval = %(interval)s)
+                """
+            ).format(
+                columns=sql.SQL(", ").join(map(sql.Identifier, BRONZE_COLUMNS)),
+                table=sql.Identifier(*HYPERTABLE.split(".")),
+            )
+            result = db_ops.read_query(
+                query,
+                {
+                    "start": to_utc(start_date),
+                    "end": to_utc(end_date),
+                    "pairs": pairs,
+                    "interval": interval,
+                },
+            )
+        finally:
+            db_ops.close_connection()
+        if not result:
+            raise RuntimeError(f"Could not read {HYPERTABLE}")
+        columns, rows = result
+        df = pd.DataFrame(rows, columns=columns)
+        df["time"] = pd.to_datetime(df["time"], utc=True)
+        return df
+
+    @timed("bronze.lake.read")
+    def read(
+        self,
+        pairs: list[str] | None,
+        start_date: datetime,
+        end_date: datetime,
+        interval: int | None = None,
+    ) -> pd.DataFrame:
+        """Read bronze rows of [start_date, end_date) from the hot and the cold tier
+
+        A bar present in both tiers (re-ingested after its chunk was offloaded)
+        is taken from the hypertable.
+
+        Args:
+            pairs (list[str] | None): pairs, None for every pair.
+            start_date (datetime): start of the range (naive means UTC).
+            end_date (datetime): end of the range, exclusive.
+            interval (int | None, optional): interval in minutes, None for every interval. Defaults to None.
+
+        Returns:
+            pd.DataFrame: rows ordered by time and pair.
+        """
+        hot = self.read_hot(pairs, start_date, end_date, interval)
+        cold = self.read_cold(pairs, start_date, end_date, interval)
+        df = pd.concat([hot, cold], ignore_index=True) if len(cold) else hot
+        df = df.drop_duplicates(subset=["time", "pair"], keep="first")
+        current_span().add(rows_out=len(df))
+        return df.sort_values(["time", "pair"]).reset_index(drop=True)
+
+    @contextmanager
+    def rehydrate(self, start_date: datetime, end_date: datetime) -> Iterator[str]:
+        """Make the cold rows of a range queryable by SQL for a rebuild
+
+        The cold rows are copied into an unlogged table and `bronze.ohlc_all`
+        (hot rows UNION ALL the rehydrated ones missing from the hypertable) is
+        yielded as the source of the silver pipelines. The table is emptied on
+        exit, so only one rebuild may rehydrate at a time. Failing to copy the
+        cold rows raises instead of rebuilding without them.
+
+        Args:
+            start_date (datetime): start of the range (naive means UTC).
+            end_date (datetime): end of the range, exclusive.
+
+        Yields:
+            str: name of the view to read from.
+        """
+        schema, hypertable = HYPERTABLE.split(".")
+        rehydrated = sql.Identifier(schema, REHYDRATED_TABLE)
+        view = sql.Identifier(schema, UNION_VIEW)
+        db_ops = TimescaleDBOps(self.connection_pool)
+        try:
+            db_ops.execute_query(
+                sql.SQL(
+                    "CREATE UNLOGGED TABLE IF NOT EXISTS {rehydrated} (LIKE {hypertable} INCLUDING DEFAULTS)"
+                ).format(
+                    rehydrated=rehydrated, hypertable=sql.Identifier(schema, hypertable)
+                )
+            )
+            db_ops.execute_query(
+                sql.SQL("TRUNCATE {rehydrated}").format(rehydrated=rehydrated)
+            )
+            db_ops.execute_query(
+                sql.SQL(
+                    """
+                    CREATE OR REPLACE VIEW {view} AS
+                    SELECT * FROM {hypertable}
+                    UNION ALL
+                    SELECT * FROM {rehydrated} r
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM {hypertable} h WHERE h.time = r.time AND h.pair = r.pair
+                    )
+                    """
+                ).format(
+                    view=view,
+                    hypertable=sql.Identifier(schema, hypertable),
+                    rehydrated=rehydrated,
+                )
+            )
+
+            cold = self.read_cold(None, start_date, end_date)
+            if len(cold):
+                rows = (
+                    cold[list(BRONZE_COLUMNS)].astype(object).where(cold.notna(), None)
+                )
+                copied = db_ops.copy_data(
+                    REHYDRATED_TABLE,
+                    schema=schema,
+                    columns=BRONZE_COLUMNS,
+                    data=rows.values.tolist(),
+                )
+                if copied != len(rows):
+                    # A rebuild without the cold history would silently drop it
+                    raise RuntimeError(f"Could not rehydrate the {len(rows)} cold rows")
+            logger.info(
+                f"{len(cold)} cold rows rehydrated into {schema}.{REHYDRATED_TABLE}."
+            )
+            yield f"{schema}.{UNION_VIEW}"
+        finally:
+            db_ops.execute_query(
+                sql.SQL("TRUNCATE {rehydrated}").format(rehydrated=rehydrated)
+            )
+            db_ops.close_connection()
+
+
+class DataPipeline:
+    def __init__(
+        self,
+        older_than: timedelta,
+        dry_run: bool = False,
+        minio_ops: MinioOPS | None = None,
+        connection_pool: ThreadedConnectionPool | None = None,
+    ):
+        """Offload the bronze chunks older than a threshold to the MinIO lake
+
+        Every chunk is exported to parquet (one object per pair, interval and
+        month), read back and compared with the database rows, and only then
+        dropped from the hypertable.
+
+        Args:
+            older_than (timedelta): chunks ending before now - older_than are offloaded.
+            dry_run (bool, optional): export and verify without dropping the chunks. Defaults to False.
+            minio_ops (MinioOPS | None, optional): MinIO operations. Defaults to None.
+            connection_pool (ThreadedConnectionPool | None, optional): pool to take connections from.
+                Defaults to None.
+        """
+        self.older_than = older_than
+        self.dry_run = dry_run
+        self.lake = BronzeLake(minio_ops=minio_ops, connection_pool=connection_pool)
+        self.connection_pool = connection_pool
+
+    def export_chunk(self, db_ops: TimescaleDBOps, chunk: dict) -> list[str] | None:
+        """Export and verify one chunk
+
+        Returns:
+            list[str] | None: written objects, None when the export could not be verified.
+        """
+        result = db_ops.read_query(
+            sql.SQL("SELECT {columns} FROM {chunk}").format(
+                columns=sql.SQL(", ").join(map(sql.Identifier, BRONZE_COLUMNS)),
+                chunk=sql.Identifier(*chunk["chunk"].split(".")),
+            )
+        )
+        if result is None:
+            return None
+        columns, rows = result
+        df = pd.DataFrame(rows, columns=columns)
+        if df.empty:
+            return []
+        df["time"] = pd.to_datetime(df["time"], utc=True)
+
+        names = []
+        for (pair, interval, year, month), group in df.groupby(
+            [df["pair"], df["interval"], df["time"].dt.year, df["time"].dt.month]
+        ):
+            name = self.lake.object_name(
+                pair,
+                int(interval),
+                int(year),
+                int(month),
+                chunk["range_start"],
+                chunk["range_end"],
+            )
+            if not self.lake.minio_ops.write_bytes(
+                self.lake.bucket_name, name, encode_parquet(group)
+            ):
+                return None
+            names.append(name)
+
+        # Read everything back before the chunk may be dropped
+        exported = pd.concat(
+            [self.lake.read_object(name) for name in names], ignore_index=True
+        )
+        if len(exported) != len(df) or fingerprint(exported) != fingerprint(df):
+            logger.error(
+                f"Export of {chunk['chunk']} does not match the database, keeping the chunk."
+            )
+            for name in names:
+                self.lake.minio_ops.delete_object(self.lake.bucket_name, name)
+            return None
+        current_span().add(rows_out=len(df))
+        return names
+
+    @timed("pipeline.bronze.ohlc_tiering")
+    def run(self):
+        cutoff = datetime.now(timezone.utc) - self.older_than
+        logger.info(
+            f"Offloading the {HYPERTABLE} chunks ending before {cutoff:%Y-%m-%d %H:%M} UTC ..."
+        )
+        db_ops = TimescaleDBOps(self.connection_pool)
+        try:
+            chunks = [
+                chunk
+                for chunk in db_ops.get_chunk_stats(HYPERTABLE)
+                if chunk["range_end"] <= cutoff
+            ]
+            offloaded, freed_bytes = 0, 0
+            for chunk in chunks:
+                names = self.export_chunk(db_ops, chunk)
+                if names is None:
+                    continue
+                if self.dry_run:
+                    logger.info(
+                        f"{chunk['chunk']} exported to {len(names)} objects (dry run, kept)."
+                    )
+                    continue
+                # Exactly the range of this chunk, drop_chunks returns the dropped chunks
+                result = db_ops.read_query(
+                    sql.SQL(
+                        "SELECT drop_chunks({table}, older_than => {end}, newer_than => {start})"
+                    ).format(
+                        table=sql.Literal(HYPERTABLE),
+                        start=sql.Literal(chunk["range_start"]),
+                        end=sql.Literal(chunk["range_end"]),
+                    )
+                )
+                dropped = {row[0] for row in result[1]} if result is not None else set()
+                if chunk["chunk"] not in dropped:
+                    # The exported objects are harmless, the next run exports them again
+                    logger.error(
+                        f"{chunk['chunk']} was exported but could not be dropped."
+                    )
+                    continue
+                offloaded += 1
+                freed_bytes += chunk["total_bytes"] or 0
+                logger.info(
+                    f"{chunk['chunk']} offloaded to {len(names)} objects and dropped."
+                )
+            logger.info(
+                f"{offloaded} of {len(chunks)} chunks offloaded, ~{freed_bytes / 1024**2:.1f} MiB freed."
+            )
+        finally:
+            db_ops.close_connection()
@@ -3,6 +3,9 @@ import importlib
 from datetime import datetime
 from types import ModuleType
 
+from src.utils.profiling import add_profiling_arguments, profiling_session
+
+
 def get_pipeline_module(pipeline_name: str) -> ModuleType:
     """Get a pipeline by name inside the gold folder.
 
@@ -51,6 +54,8 @@ if __name__ == "__main__":
         help="The end date to process the data in YYYY-MM-DD format",
     )
 
+    add_profiling_arguments(parser)
+
     args = parser.parse_args()
     source = args.source
     target = args.target
@@ -64,4 +69,5 @@ if __name__ == "__main__":
     pipeline = pipeline_module.DataPipeline(
         source=source, target=target, start_date=start_date, end_date=end_date
     )
-    pipeline.run()
+    with profiling_session(args, name=f"gold_{args.pipeline_name}"):
+        pipeline.run()
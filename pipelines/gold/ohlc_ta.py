@@ -1,9 +1,80 @@
 from datetime import datetime
 
 import pandas as pd
+from psycopg2.pool import ThreadedConnectionPool
 
 from src.timescaledb_ops import TimescaleDBOps
 from src.utils.logger import logger
+from src.utils.metrics import current_span, timed
+
+
+@timed("gold.indicators")
+def calculate_indicators(df: pd.DataFrame) -> pd.DataFrame:
+    """Add the EMA, Stochastic and MACD columns of the gold layer
+
+    The indicators of every pair only use the rows of that pair.
+
+    Args:
+        df (pd.DataFrame): silver data of one or more pairs.
+
+    Returns:
+        pd.DataFrame: data with the indicator columns, sorted by pair and date.
+    """
+    df = df.sort_values(["pair", "date"]).reset_index(drop=True)
+    return df.groupby("pair", group_keys=False, sort=False)[df.columns.tolist()].apply(
+        calculate_pair_indicators
+    )
+
+
+def calculate_pair_indicators(df: pd.DataFrame) -> pd.DataFrame:
+    """Add the indicator columns to the rows of a single pair
+
+    Args:
+        df (pd.DataFrame): silver data of one pair sorted by date.
+
+    Returns:
+        pd.DataFrame: data with the indicator columns.
+    """
+    df = df.copy()
+    # =========================================================================
+    # Calculate EMA
+    # =========================================================================
+    df["ema_13"] = df["close"].ewm(span=13, adjust=False).mean()
+    df["ema_21"] = df["close"].ewm(span=21, adjust=False).mean()
+
+    # =========================================================================
+    # Calculate Stochastic
+    # =========================================================================
+    percentage_k_length = 5
+    percentage_k_smoothing = 3
+    percentage_d_length = 3
+
+    lowest_low = df["low"].rolling(percentage_k_length).min()
+    highest_high = df["high"].rolling(percentage_k_length).max()
+
+    df["stochastic_percentage_k"] = (
+        ((df["close"] - lowest_low) / (highest_high - lowest_low))
+        .rolling(percentage_k_smoothing)
+        .mean()
+    )
+    df["stochastic_percentage_d"] = (
+        df["stochastic_percentage_k"].rolling(percentage_d_length).mean()
+    )
+
+    # =========================================================================
+    # Calculate MACD
+    # =========================================================================
+    ema_12 = df["close"].ewm(span=12, adjust=False).mean()
+    ema_26 = df["close"].ewm(span=26, adjust=False).mean()
+
+    macd = ema_12 - ema_26
+    macd_signal_line = macd.ewm(span=9, adjust=False).mean()
+    macd_bar = macd - macd_signal_line
+
+    df["macd"] = macd
+    df["macd_signal_line"] = macd_signal_line
+    df["macd_bar"] = macd_bar
+    return df
 
 
 class DataPipeline:
@@ -13,70 +84,57 @@ class DataPipeline:
         target: str,
         start_date: datetime,
         end_date: datetime,
+        connection_pool: ThreadedConnectionPool | None = None,
+        write_from: datetime | None = None,
+        pairs: list[str] | None = None,
     ):
         self.source = source
         self.target = target
         self.start_date = start_date
         self.end_date = end_date
+        self.connection_pool = connection_pool
+        # Rows before it only warm up the indicators and are not written
+        self.write_from = write_from
+        self.pairs = pairs  # None recalculates every pair
+
+    @timed("pipeline.gold.ohlc_ta")
+    def run(self) -> bool:
+        """Calculate the indicators of the source rows into `target`
 
-    def run(self):
+        Returns:
+            bool: the rows were written.
+        """
         # =========================================================================
         # Read data into TimescaleDB
         # =========================================================================
         logger.info("Reading data from TimescaleDB ...")
-        db_ops = TimescaleDBOps()
-        columns, data = db_ops.read_data(self.source)
+        db_ops = TimescaleDBOps(self.connection_pool)
+        result = db_ops.read_range(
+            self.source,
+            "date",
+            pair=list(self.pairs) if self.pairs else None,
+            start_date=self.start_date,
+            end_date=self.end_date,
+        )
+        if result is None:
+            db_ops.close_connection()
+            logger.error(f"Could not read {self.source}.")
+            return False
+        columns, data = result
         df = pd.DataFrame(data=data, columns=columns)
+        current_span().add(rows_in=len(df))
         df["date"] = pd.to_datetime(df["date"])
-        df = df[(df["date"] >= self.start_date) & (df["date"] <= self.end_date)]
-        df = df.sort_values("date").reset_index(
-            drop=True
-        )  # sort by date ensure that the calculations are correct
         logger.info("Successfully read data from TimescaleDB.")
 
-        # =========================================================================
-        # Calculate EMA
-        # =========================================================================
-        df["ema_13"] = df["close"].ewm(span=13, adjust=False).mean()
-        df["ema_21"] = df["close"].ewm(span=21, adjust=False).mean()
-
-        # =========================================================================
-        # Calculate Stochastic
-        # =========================================================================
-        percentage_k_length = 5
-        percentage_k_smoothing = 3
-        percentage_d_length = 3
-
-        lowest_low = df["low"].rolling(percentage_k_length).min()
-        highest_high = df["high"].rolling(percentage_k_length).max()
-
-        df["stochastic_percentage_k"] = (
-            ((df["close"] - lowest_low) / (highest_high - lowest_low))
-            .rolling(percentage_k_smoothing)
-            .mean()
-        )
-        df["stochastic_percentage_d"] = (
-            df["stochastic_percentage_k"].rolling(percentage_d_length).mean()
-        )
-
-        # =========================================================================
-        # Calculate MACD
-        # =========================================================================
-        ema_12 = df["close"].ewm(span=12, adjust=False).mean()
-        ema_26 = df["close"].ewm(span=26, adjust=False).mean()
-
-        macd = ema_12 - ema_26
-        macd_signal_line = macd.ewm(span=9, adjust=False).mean()
-        macd_bar = macd - macd_signal_line
-
-        df["macd"] = macd
-        df["macd_signal_line"] = macd_signal_line
-        df["macd_bar"] = macd_bar
+        df = calculate_indicators(df)
+        if self.write_from is not None:
+            df = df[df["date"] >= pd.Timestamp(self.write_from)]
 
         # =========================================================================
         # Ingest data into TimescaleDB
         # =========================================================================
-        db_ops.batch_insert_data(
+        # Rows whose indicators did not change are not rewritten
+        counts = db_ops.copy_upsert_changed(
             schema=self.target.split(".")[0],
             table=self.target.split(".")[1],
             columns=df.columns.tolist(),
@@ -84,4 +142,7 @@ class DataPipeline:
             conflict_columns=["date", "pair"],
         )
         db_ops.close_connection()
+        if counts is not None:
+            current_span().add(rows_out=counts["inserted"] + counts["updated"])
         logger.info("Successfully run script!")
+        return counts is not None
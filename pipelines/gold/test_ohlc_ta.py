@@ -0,0 +1,51 @@
+import math
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("psycopg2")
+pytest.importorskip("dotenv")
+
+from pipelines.gold.ohlc_ta import calculate_indicators  # noqa: E402
+
+INDICATORS = [
+    "ema_13",
+    "ema_21",
+    "stochastic_percentage_k",
+    "stochastic_percentage_d",
+    "macd",
+    "macd_signal_line",
+    "macd_bar",
+]
+
+
+def silver_rows(pair: str, base: float, days: int = 60) -> pd.DataFrame:
+    closes = [base + 10 * math.sin(day / 3) + day for day in range(days)]
+    return pd.DataFrame(
+        {
+            "date": pd.date_range("2025-01-01", periods=days),
+            "pair": pair,
+            "open": closes,
+            "high": [close + 2 for close in closes],
+            "low": [close - 2 for close in closes],
+            "close": closes,
+            "volume": 1.0,
+            "count": 1,
+        }
+    )
+
+
+def test_indicators_of_each_pair_only_use_its_own_rows():
+    btc, eth = silver_rows("XXBTZUSD", 90_000), silver_rows("XETHZUSD", 3_000)
+    # Interleaved by date, like a silver read of every pair
+    mixed = (
+        pd.concat([btc, eth]).sort_values("date", kind="stable").reset_index(drop=True)
+    )
+
+    together = calculate_indicators(mixed)
+
+    for pair, rows in (("XXBTZUSD", btc), ("XETHZUSD", eth)):
+        alone = calculate_indicators(rows).reset_index(drop=True)
+        result = together[together["pair"] == pair].reset_index(drop=True)
+        pd.testing.assert_frame_equal(result, alone)
+        assert result[INDICATORS].iloc[-1].notna().all()
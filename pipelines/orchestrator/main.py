@@ -0,0 +1,87 @@
+import argparse
+from datetime import datetime
+
+from pipelines.orchestrator.ohlc_dag import TIMEFRAMES, build_dag
+from src.utils.profiling import add_profiling_arguments, profiling_session
+
+if __name__ == "__main__":
+    # =========================================================================
+    # Create parser for processing CLI arguments
+    # =========================================================================
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument(
+        "--pairs",
+        type=str,
+        nargs="+",
+        required=True,
+        help="Pairs of the cryptocurrencies",
+    )
+
+    parser.add_argument(
+        "--intervals", type=int, nargs="+", required=True, help="Intervals in minutes"
+    )
+
+    parser.add_argument(
+        "--timeframes",
+        type=str,
+        nargs="+",
+        default=TIMEFRAMES,
+        choices=TIMEFRAMES,
+        help="Timeframes of the silver and gold layers",
+    )
+
+    parser.add_argument(
+        "--start-date",
+        type=str,
+        required=True,
+        help="The start date to process the data in YYYY-MM-DD format",
+    )
+
+    parser.add_argument(
+        "--end-date",
+        type=str,
+        required=True,
+        help="The end date to process the data in YYYY-MM-DD format",
+    )
+
+    parser.add_argument(
+        "--batch-size", type=int, default=1000, help="Batch size of the bronze layer"
+    )
+
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=4,
+        help="Number of nodes running at the same time",
+    )
+
+    parser.add_argument(
+        "--state-path",
+        type=str,
+        default=".orchestrator_state.json",
+        help="File storing the fingerprints of the last run",
+    )
+
+    add_profiling_arguments(parser)
+
+    args = parser.parse_args()
+
+    # =========================================================================
+    # Run source -> bronze -> silver -> gold in one process
+    # =========================================================================
+    dag, connection_pool = build_dag(
+        pairs=args.pairs,
+        intervals=args.intervals,
+        timeframes=args.timeframes,
+        start_date=datetime.strptime(args.start_date, "%Y-%m-%d"),
+        end_date=datetime.strptime(args.end_date, "%Y-%m-%d"),
+        batch_size=args.batch_size,
+        max_workers=args.max_workers,
+        state_path=args.state_path,
+    )
+    try:
+        with profiling_session(args, name="orchestrator"):
+            dag.run()
+    finally:
+        connection_pool.closeall()
@@ -0,0 +1,244 @@
+import hashlib
+import importlib
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+from src.minio_ops import MinioOPS
+from src.orchestrator.dag import DAG, Node
+from src.timescaledb_ops import TimescaleDBOps
+
+TIMEFRAMES = ["daily", "weekly", "monthly"]
+
+# The silver layer buckets the data in this timezone
+SILVER_TIMEZONE = ZoneInfo("Asia/Jakarta")
+
+# Buckets read before the refreshed ones so the EMAs and MACD are warmed up
+GOLD_WARMUP_BUCKETS = 200
+BUCKET_DAYS = {"daily": 1, "weekly": 7, "monthly": 31}
+
+
+def align_to_timeframe(date: datetime, timeframe: str) -> datetime:
+    """Move a date back to the start of its silver bucket
+
+    The silver pipelines overwrite every bucket inside their range, a range
+    starting in the middle of a bucket would overwrite it with partial data.
+
+    Args:
+        date (datetime): start date, naive dates are read as silver-timezone dates.
+        timeframe (str): "daily", "weekly" or "monthly".
+
+    Returns:
+        datetime: start of the bucket, in the silver timezone.
+    """
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=SILVER_TIMEZONE)
+    date = date.astimezone(SILVER_TIMEZONE).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    if timeframe == "weekly":
+        date -= timedelta(days=date.weekday())  # weekly buckets start on Monday
+    elif timeframe == "monthly":
+        date = date.replace(day=1)
+    return date
+
+
+def next_bucket(date: datetime, timeframe: str) -> datetime:
+    """Get the start of the silver bucket following the one holding a date
+
+    Args:
+        date (datetime): date, naive dates are read as silver-timezone dates.
+        timeframe (str): "daily", "weekly" or "monthly".
+
+    Returns:
+        datetime: start of the next bucket, in the silver timezone.
+    """
+    date = align_to_timeframe(date, timeframe)
+    if timeframe == "monthly":
+        return (date.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return date + timedelta(days=7 if timeframe == "weekly" else 1)
+
+
+def silver_date(date: datetime) -> datetime:
+    """Express a date as the naive silver-timezone wall time the DATE columns hold
+
+    Args:
+        date (datetime): date, naive dates are read as silver-timezone dates.
+
+    Returns:
+        datetime: naive date in the silver timezone.
+    """
+    if date.tzinfo is None:
+        return date
+    return date.astimezone(SILVER_TIMEZONE).replace(tzinfo=None)
+
+
+def gold_window(start_date: datetime, end_date: datetime, timeframe: str) -> dict:
+    """Get the range gold reads and the first date it writes to refresh [start_date, end_date]
+
+    Gold recalculates the indicators from `GOLD_WARMUP_BUCKETS` buckets before
+    the bucket holding `start_date` but only writes from that bucket on, so
+    the refreshed rows get the same values as a full run.
+
+    Returns:
+        dict: `start_date`, `end_date` and `write_from` arguments of the gold pipeline.
+    """
+    write_from = silver_date(align_to_timeframe(start_date, timeframe))
+    return {
+        "start_date": write_from
+        - timedelta(days=BUCKET_DAYS[timeframe] * GOLD_WARMUP_BUCKETS),
+        "end_date": silver_date(end_date),
+        "write_from": write_from,
+    }
+
+
+def fingerprint_dataframe(df: pd.DataFrame | None) -> str:
+    """Hash the content of a DataFrame
+
+    Args:
+        df (pd.DataFrame | None): data to hash.
+
+    Returns:
+        str: SHA-256 hex digest of the data.
+    """
+    if df is None:
+        return ""
+    return hashlib.sha256(
+        pd.util.hash_pandas_object(df, index=False).values.tobytes()
+    ).hexdigest()
+
+
+def build_dag(
+    pairs: list[str],
+    intervals: list[int],
+    timeframes: list[str],
+    start_date: datetime,
+    end_date: datetime,
+    batch_size: int = 1000,
+    max_workers: int = 4,
+    state_path: str = ".orchestrator_state.json",
+    connection_pool=None,
+    incremental: bool = False,
+) -> tuple[DAG, object]:
+    """Build the source -> bronze -> silver -> gold DAG
+
+    Source and bronze nodes exist per pair and interval, silver and gold nodes per
+    timeframe (they aggregate every pair of the bronze layer). The connection pool
+    and the MinIO client are shared by every node and the fetched data is handed
+    to the bronze node in memory.
+
+    Args:
+        pairs (list[str]): pairs of the cryptocurrencies.
+        intervals (list[int]): intervals in minutes.
+        timeframes (list[str]): timeframes of the silver and gold layers.
+        start_date (datetime): start date of the data, preferably tz-aware (naive dates are
+            host-local for the source and silver-timezone dates for silver and gold).
+        end_date (datetime): end date of the data.
+        batch_size (int, optional): bronze batch size. Defaults to 1000.
+        max_workers (int, optional): number of nodes running at the same time. Defaults to 4.
+        state_path (str, optional): file storing the fingerprints of the last run. Defaults to ".orchestrator_state.json".
+        connection_pool (ThreadedConnectionPool, optional): pool to reuse, e.g. by a long-running scheduler.
+            Defaults to a new pool.
+        incremental (bool, optional): fetch only the ranges missing from the bronze layer. Defaults to False.
+
+    Returns:
+        tuple[DAG, ThreadedConnectionPool]: DAG and the connection pool to close after the run.
+    """
+    connection_pool = connection_pool or TimescaleDBOps.create_pool(maxconn=max_workers)
+    minio_ops = MinioOPS()
+    source_module = importlib.import_module("pipelines.source_to_minio.kraken_ohlc")
+    bronze_module = importlib.import_module("pipelines.bronze.ohlc")
+    gold_module = importlib.import_module("pipelines.gold.ohlc_ta")
+    dates = {"start_date": start_date, "end_date": end_date}
+
+    dag = DAG(state_path=state_path, max_workers=max_workers)
+    bronze_nodes = []
+    for pair in pairs:
+        for interval in intervals:
+            source_name = f"source:{pair}:{interval}"
+            bronze_name = f"bronze:{pair}:{interval}"
+
+            def run_source(inputs, pair=pair, interval=interval):
+                pipeline = source_module.DataPipeline(
+                    pair=pair,
+                    interval=interval,
+                    minio_ops=minio_ops,
+                    incremental=incremental,
+                    connection_pool=connection_pool,
+                    **dates,
+                )
+                # The pipelines log their errors, the node must fail so it is not recorded
+                if not pipeline.run() or pipeline.df is None:
+                    raise RuntimeError(f"Source of {pair} ({interval}) failed")
+                return pipeline.df
+
+            def run_bronze(
+                inputs, pair=pair, interval=interval, source_name=source_name
+            ):
+                loaded = bronze_module.DataPipeline(
+                    pair=pair,
+                    interval=interval,
+                    batch_size=batch_size,
+                    data=inputs[source_name],
+                    minio_ops=minio_ops,
+                    connection_pool=connection_pool,
+                    **dates,
+                ).run()
+                if not loaded:
+                    raise RuntimeError(f"Bronze load of {pair} ({interval}) failed")
+
+            dag.add_node(
+                Node(
+                    source_name,
+                    run_source,
+                    params={
+                        "pair": pair,
+                        "interval": interval,
+                        "incremental": incremental,
+                        **dates,
+                    },
+                    output_fingerprint=fingerprint_dataframe,
+                    always_run=True,
+                )
+            )
+            dag.add_node(
+                Node(
+                    bronze_name,
+                    run_bronze,
+                    deps=[source_name],
+                    params={"batch_size": batch_size},
+                )
+            )
+            bronze_nodes.append(bronze_name)
+
+    for timeframe in timeframes:
+        silver_name = f"silver:{timeframe}"
+        gold_name = f"gold:{timeframe}"
+        silver_module = importlib.import_module(f"pipelines.silver.ohlc_{timeframe}")
+
+        def run_silver(inputs, silver_module=silver_module, timeframe=timeframe):
+            written = silver_module.DataPipeline(
+                source="bronze.ohlc",
+                target=f"silver.ohlc_{timeframe}",
+                start_date=align_to_timeframe(start_date, timeframe),
+                end_date=end_date,
+                connection_pool=connection_pool,
+            ).run()
+            if not written:
+                raise RuntimeError(f"Silver {timeframe} failed")
+
+        def run_gold(inputs, timeframe=timeframe):
+            written = gold_module.DataPipeline(
+                source=f"silver.ohlc_{timeframe}",
+                target=f"gold.ohlc_ta_{timeframe}",
+                connection_pool=connection_pool,
+                **gold_window(start_date, end_date, timeframe),
+            ).run()
+            if not written:
+                raise RuntimeError(f"Gold {timeframe} failed")
+
+        dag.add_node(Node(silver_name, run_silver, deps=bronze_nodes, params=dates))
+        dag.add_node(Node(gold_name, run_gold, deps=[silver_name], params=dates))
+
+    return dag, connection_pool
@@ -0,0 +1,87 @@
+import importlib
+from datetime import datetime, timezone
+
+from pipelines.orchestrator.ohlc_dag import align_to_timeframe, gold_window, next_bucket
+from src.orchestrator.refresh_listener import RefreshListener
+from src.timescaledb_ops import TimescaleDBOps
+from src.utils.logger import logger
+
+
+def refresh_layers(
+    ranges: dict[str, tuple[int, int]], timeframes: list[str], connection_pool=None
+):
+    """Refresh the silver buckets and gold rows holding the loaded bronze ranges
+
+    Silver only re-aggregates the affected pairs and buckets. Gold recalculates
+    the indicators of the affected pairs from `GOLD_WARMUP_BUCKETS` buckets
+    earlier but only writes from the first affected bucket. A failed pipeline
+    raises, so the listener keeps the ranges pending.
+
+    Args:
+        ranges (dict[str, tuple[int, int]]): loaded range (Unix timestamps, inclusive) by pair.
+        timeframes (list[str]): timeframes of the silver and gold layers.
+        connection_pool (ThreadedConnectionPool, optional): pool shared by the pipelines. Defaults to None.
+    """
+    gold_module = importlib.import_module("pipelines.gold.ohlc_ta")
+    start = datetime.fromtimestamp(
+        min(start for start, _ in ranges.values()), tz=timezone.utc
+    )
+    end = datetime.fromtimestamp(
+        max(end for _, end in ranges.values()), tz=timezone.utc
+    )
+
+    for timeframe in timeframes:
+        silver_module = importlib.import_module(f"pipelines.silver.ohlc_{timeframe}")
+        bucket_start = align_to_timeframe(start, timeframe)
+        bucket_end = next_bucket(end, timeframe)
+        if not silver_module.DataPipeline(
+            source="bronze.ohlc",
+            target=f"silver.ohlc_{timeframe}",
+            start_date=bucket_start,
+            end_date=bucket_end,
+            connection_pool=connection_pool,
+            pairs=sorted(ranges),
+        ).run():
+            raise RuntimeError(f"silver.ohlc_{timeframe} refresh failed")
+
+        window = gold_window(start, end, timeframe)
+        if not gold_module.DataPipeline(
+            source=f"silver.ohlc_{timeframe}",
+            target=f"gold.ohlc_ta_{timeframe}",
+            connection_pool=connection_pool,
+            pairs=sorted(ranges),
+            **window,
+        ).run():
+            raise RuntimeError(f"gold.ohlc_ta_{timeframe} refresh failed")
+        logger.info(
+            f"{timeframe} refreshed from {window['write_from']:%Y-%m-%d} for {sorted(ranges)}."
+        )
+
+
+def build_refresh_listener(
+    timeframes: list[str],
+    debounce_seconds: float = 2.0,
+    max_delay_seconds: float = 30.0,
+    connection_pool=None,
+) -> tuple[RefreshListener, object]:
+    """Build a listener refreshing silver and gold when bronze loads notify
+
+    Args:
+        timeframes (list[str]): timeframes of the silver and gold layers.
+        debounce_seconds (float, optional): quiet time before a refresh. Defaults to 2.0.
+        max_delay_seconds (float, optional): longest wait of a notification. Defaults to 30.0.
+        connection_pool (ThreadedConnectionPool, optional): pool to reuse, e.g. the scheduler's.
+            Defaults to a new pool.
+
+    Returns:
+        tuple[RefreshListener, ThreadedConnectionPool]: listener and the pool to close once it stopped.
+    """
+    connection_pool = connection_pool or TimescaleDBOps.create_pool(maxconn=2)
+
+    def refresh(ranges: dict[str, tuple[int, int]]):
+        refresh_layers(ranges, timeframes, connection_pool=connection_pool)
+
+    listener = RefreshListener(
+        refresh, debounce_seconds=debounce_seconds, max_delay_seconds=max_delay_seconds
+    )
+    return listener, connection_pool
@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+
+from pipelines.orchestrator.ohlc_dag import build_dag
+from src.orchestrator.scheduler import CandleCloseScheduler
+from src.ta_analysis import TechnicalAnalysisRunner
+from src.timescaledb_ops import TimescaleDBOps
+from src.utils.logger import logger
+
+
+def build_scheduler(
+    pairs: list[str],
+    intervals: list[int],
+    timeframes: list[str],
+    analysis_pair: str,
+    chart_days: int = 365,
+    lookback_candles: int = 3,
+    settle_seconds: float = 30.0,
+    batch_size: int = 1000,
+    max_workers: int = 4,
+    state_path: str = ".orchestrator_state.json",
+    latency_log_path: str | None = "scheduler_latency.jsonl",
+    runner: TechnicalAnalysisRunner | None = None,
+) -> tuple[CandleCloseScheduler, TechnicalAnalysisRunner, object]:
+    """Build a scheduler running source -> bronze -> silver -> gold -> analyze after each close
+
+    The connection pool and the analysis runner (DB connection, chart renderer,
+    LLM client) stay open between runs. The summaries are flushed to Discord
+    before the run ends, so the recorded latency is close -> Discord delivery.
+
+    Args:
+        pairs (list[str]): pairs of the cryptocurrencies.
+        intervals (list[int]): intervals in minutes.
+        timeframes (list[str]): timeframes of the silver, gold layers and the analysis.
+        analysis_pair (str): pair analyzed by the LLM (as stored in the gold layer).
+        chart_days (int, optional): number of days shown in the chart. Defaults to 365.
+        lookback_candles (int, optional): candles checked on each run, only the missing ones and
+            the last stored one are fetched. Defaults to 3.
+        settle_seconds (float, optional): seconds waited after a close. Defaults to 30.0.
+        batch_size (int, optional): bronze batch size. Defaults to 1000.
+        max_workers (int, optional): number of DAG nodes running at the same time. Defaults to 4.
+        state_path (str, optional): file storing the fingerprints of the last DAG run.
+        latency_log_path (str | None, optional): JSON lines file receiving the latency of each run.
+        runner (TechnicalAnalysisRunner | None, optional): analysis runner. Defaults to a new runner.
+
+    Returns:
+        tuple[CandleCloseScheduler, TechnicalAnalysisRunner, ThreadedConnectionPool]: scheduler and
+            the resources to close once it stopped.
+    """
+    connection_pool = TimescaleDBOps.create_pool(maxconn=max_workers)
+    runner = runner or TechnicalAnalysisRunner()
+
+    def job(closed_intervals: list[int], close_time: datetime):
+        # Kept tz-aware (UTC): a naive date would be read as host-local time by the
+        # source and as a silver-timezone date by silver and gold
+        end_date = close_time
+        # Silver buckets are realigned by the DAG, only the fetched range is chosen here
+        start_date = end_date - timedelta(
+            minutes=max(closed_intervals) * lookback_candles
+        )
+        dag, _ = build_dag(
+            pairs=pairs,
+            intervals=closed_intervals,
+            timeframes=timeframes,
+            start_date=start_date,
+            end_date=end_date,
+            batch_size=batch_size,
+            max_workers=max_workers,
+            state_path=state_path,
+            connection_pool=connection_pool,
+            incremental=True,
+        )
+        status = dag.run()
+        failed = [
+            name
+            for name, value in status.items()
+            if value in ("failed", "upstream_failed")
+        ]
+        if failed:
+            raise RuntimeError(f"Pipeline nodes failed: {failed}")
+
+        chart_start = (end_date - timedelta(days=chart_days)).strftime("%Y-%m-%d")
+        for timeframe in timeframes:
+            runner.run(pair=analysis_pair, timeframe=timeframe, start_date=chart_start)
+        runner.notifier.flush()
+        logger.info(f"Summaries of {timeframes} delivered to Discord.")
+
+    scheduler = CandleCloseScheduler(
+        intervals=intervals,
+        job=job,
+        settle_seconds=settle_seconds,
+        latency_log_path=latency_log_path,
+    )
+    return scheduler, runner, connection_pool
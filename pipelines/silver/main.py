@@ -3,6 +3,9 @@ import importlib
 from types import ModuleType
 from datetime import datetime
 
+from src.utils.profiling import add_profiling_arguments, profiling_session
+
+
 def get_pipeline_module(pipeline_name: str) -> ModuleType:
     """Get a pipeline by name inside the silver folder.
 
@@ -50,6 +53,8 @@ if __name__ == "__main__":
         help="The end date to process the data in YYYY-MM-DD format",
     )
 
+    add_profiling_arguments(parser)
+
     args = parser.parse_args()
     source = args.source
     target = args.target
@@ -63,4 +68,5 @@ if __name__ == "__main__":
     pipeline = pipeline_module.DataPipeline(
         source=source, target=target, start_date=start_date, end_date=end_date
     )
-    pipeline.run()
+    with profiling_session(args, name=f"silver_{args.pipeline_name}"):
+        pipeline.run()
@@ -0,0 +1,103 @@
+from datetime import datetime
+
+from psycopg2 import sql
+from psycopg2.pool import ThreadedConnectionPool
+
+from src.timescaledb_ops import TimescaleDBOps
+from src.utils.logger import logger
+from src.utils.metrics import span
+
+SILVER_COLUMNS = ("date", "pair", "open", "high", "low", "close", "volume", "count")
+
+# Bucket width of each silver timeframe
+BUCKET_WIDTHS = {"daily": "1 day", "weekly": "1 week", "monthly": "1 month"}
+
+
+class DataPipeline:
+    def __init__(
+        self,
+        source: str,
+        target: str,
+        start_date: datetime,
+        end_date: datetime,
+        connection_pool: ThreadedConnectionPool | None = None,
+        pairs: list[str] | None = None,
+        timeframe: str = "daily",
+    ):
+        """Aggregate bronze rows into the OHLC buckets of a silver timeframe
+
+        Args:
+            source (str): bronze table, e.g. "bronze.ohlc".
+            target (str): silver table, e.g. "silver.ohlc_daily".
+            start_date (datetime): start of the range (inclusive).
+            end_date (datetime): end of the range (exclusive).
+            connection_pool (ThreadedConnectionPool | None, optional): pool to borrow the
+                connection from. Defaults to a connection of its own.
+            pairs (list[str] | None, optional): pairs to aggregate. Defaults to every pair.
+            timeframe (str, optional): one of `BUCKET_WIDTHS`. Defaults to "daily".
+        """
+        if timeframe not in BUCKET_WIDTHS:
+            raise ValueError(
+                f"Unknown timeframe '{timeframe}', expected one of {list(BUCKET_WIDTHS)}"
+            )
+        self.source = source
+        self.target = target
+        self.start_date = start_date
+        self.end_date = end_date
+        self.connection_pool = connection_pool
+        self.pairs = pairs
+        self.timeframe = timeframe
+
+    def run(self) -> bool:
+        """Aggregate the bronze rows of the range into `target`
+
+        Returns:
+            bool: the buckets were written.
+        """
+        with span(f"pipeline.silver.ohlc_{self.timeframe}") as current:
+            db_ops = TimescaleDBOps(self.connection_pool)
+            query = sql.SQL(
+                """
+                SELECT
+                    time_bucket({width}::interval, time at time zone 'Asia/Jakarta') AS date,
+                    pair,
+                    first(open, time) AS open,
+                    MAX(high) AS high,
+                    MIN(low) AS low,
+                    last(close, time) AS close,
+                    SUM(volume) AS volume,
+                    SUM(count) AS count
+                FROM {source}
+                WHERE time >= {start_date} AND time < {end_date}{pair_filter}
+                GROUP BY date, pair
+                """
+            ).format(
+                width=sql.Literal(BUCKET_WIDTHS[self.timeframe]),
+                source=sql.Identifier(*self.source.split(".")),
+                start_date=sql.Literal(self.start_date),
+                end_date=sql.Literal(self.end_date),
+                pair_filter=(
+                    sql.SQL(" AND pair = ANY({})").format(sql.Literal(list(self.pairs)))
+                    if self.pairs
+                    else sql.SQL("")
+                ),
+            )
+            # Rows of unchanged buckets are not rewritten
+            schema, table = self.target.split(".")
+            counts = db_ops.upsert_query(
+                table=table,
+                schema=schema,
+                select_query=query,
+                columns=SILVER_COLUMNS,
+                conflict_columns=["date", "pair"],
+            )
+            db_ops.close_connection()
+            if counts is None:
+                logger.error(f"Failed to aggregate {self.source} into {self.target}.")
+                return False
+            current.add(rows_out=counts["inserted"] + counts["updated"])
+            logger.info(
+                f"{self.target}: {counts['inserted']} buckets inserted, "
+                f"{counts['updated']} updated, {counts['unchanged']} unchanged."
+            )
+            return True
@@ -2,81 +2,165 @@ import os
 from datetime import datetime
 
 import pandas as pd
-from dotenv import load_dotenv
+from psycopg2.pool import ThreadedConnectionPool
 
+from src.config import get_settings
 from src.extractors.kraken_extractor import KrakenExtractor
 from src.minio_ops import MinioOPS
 from src.model.ohlc import OHLC
+from src.orchestrator.fetch_planner import FetchPlan, plan_fetch
+from src.timescaledb_ops import TimescaleDBOps
+from src.utils.checkpoint import CheckpointStore
 from src.utils.logger import logger
+from src.utils.metrics import current_span, timed
+from src.utils.ohlc_objects import read_ohlc_object
 
 
 class DataPipeline:
     def __init__(
-        self, pair: str, interval: int, start_date: datetime, end_date: datetime
+        self,
+        pair: str,
+        interval: int,
+        start_date: datetime,
+        end_date: datetime,
+        minio_ops: MinioOPS | None = None,
+        checkpoint_store: CheckpointStore | None = None,
+        run_id: str | None = None,
+        incremental: bool = False,
+        connection_pool: ThreadedConnectionPool | None = None,
     ):
-        load_dotenv()
         self.pair = pair
         self.interval = interval
         self.start_date = start_date
         self.end_date = end_date
+        self.minio_ops = minio_ops
+        self.df = None  # fetched data, kept in memory for the next stage
+        # The fetched file and the uploaded object are recorded so a rerun skips them
+        self.checkpoint_store = checkpoint_store
+        self.run_id = run_id or CheckpointStore.make_run_id(
+            "source.kraken_ohlc",
+            pair=pair,
+            interval=interval,
+            start_date=start_date,
+            end_date=end_date,
+        )
+        # Only fetch the ranges missing from the bronze layer
+        self.incremental = incremental
+        self.connection_pool = connection_pool
+        self.plan: FetchPlan | None = None
+
+    def fetch_missing(self, kraken_rest_api: KrakenExtractor) -> list[dict]:
+        """Fetch only the ranges missing from `bronze.ohlc` inside the window
+
+        Returns:
+            list[dict]: OHLC rows of the missing ranges.
+        """
+        db_ops = TimescaleDBOps(self.connection_pool)
+        try:
+            self.plan = plan_fetch(
+                db_ops, self.pair, self.interval, self.start_date, self.end_date
+            )
+        finally:
+            db_ops.close_connection()
 
-    def run(self):
+        data = []
+        for start, end in self.plan.ranges:
+            # `since` is exclusive, the bar opening at `start` is included
+            for page in kraken_rest_api.iter_ohlc_pages(
+                pair=self.pair, interval=self.interval, since=start - 1, until=end
+            ):
+                data.extend(page)
+        logger.info(
+            f"Fetched {len(data)} bars (~{self.plan.bars_to_fetch} planned) in {len(self.plan.ranges)} "
+            f"ranges, fill ratio before the fetch {self.plan.fill_ratio:.1%}"
+        )
+        return data
+
+    @timed("pipeline.source.kraken_ohlc")
+    def run(self) -> bool:
+        """Fetch the data into `self.df` and upload it to MinIO
+
+        Returns:
+            bool: the data was fetched and uploaded.
+        """
         logger.info(
             f"Data will be ingested from Kraken REST API to MinIO ({self.start_date.strftime('%Y-%m-%d')} to {self.end_date.strftime('%Y-%m-%d')})"
         )
         try:
-            # =========================================================================
-            # Request 4 hourly data from Kraken REST API
-            # =========================================================================
-            kraken_rest_api = KrakenExtractor()
-            response = kraken_rest_api.get_ohlc_data(
-                pair=self.pair,
-                interval=self.interval,
-                since=int(self.start_date.timestamp()),
+            file = f"{self.start_date.strftime('%Y%m%d')}_{self.end_date.strftime('%Y%m%d')}_{self.pair}_ohlc_{self.interval}.parquet"
+            done = (
+                self.checkpoint_store.done_units(self.run_id)
+                if self.checkpoint_store
+                else {}
             )
+            minio_ops = self.minio_ops or MinioOPS()
+            if f"object:{file}" in done:
+                logger.info(
+                    f"{file} already uploaded by {self.run_id}, reading it back from MinIO."
+                )
+                self.df = read_ohlc_object(minio_ops, get_settings().bucket_name, file)
+                current_span().add(rows_out=len(self.df))
+                return True
 
-            # =========================================================================
-            # Process 4 hourly data from Kraken REST API
-            # =========================================================================
-            data = response.get("result", {}).get("XXBTZUSD", [])
-            data = [
-                OHLC(
-                    time=int(item[0]),
-                    open=item[1],
-                    high=item[2],
-                    low=item[3],
-                    close=item[4],
-                    vwap=item[5],
-                    volume=item[6],
-                    count=int(item[7]),
-                ).model_dump()
-                for item in data
-            ]  # use pydantic model for data validation and then convert it into a dictionary
-            logger.info("Loaded OHLC Hourly Data from Kraken REST API")
+            if f"fetched:{file}" in done and os.path.exists(f"tmp/{file}"):
+                logger.info(
+                    f"tmp/{file} already fetched by {self.run_id}, skipping Kraken."
+                )
+                self.df = pd.read_parquet(f"tmp/{file}")
+            else:
+                # =========================================================================
+                # Request 4 hourly data from Kraken REST API
+                # =========================================================================
+                kraken_rest_api = KrakenExtractor()
+                if self.incremental:
+                    data = self.fetch_missing(kraken_rest_api)
+                else:
+                    response = kraken_rest_api.get_ohlc_data(
+                        pair=self.pair,
+                        interval=self.interval,
+                        since=int(self.start_date.timestamp()),
+                    )
 
-            # =========================================================================
-            # Create `staging` area before inserting into `MinIO`
-            # =========================================================================
-            file = f"{self.start_date.strftime('%Y%m%d')}_{self.end_date.strftime('%Y%m%d')}_{self.pair}_ohlc_{self.interval}.parquet"
-            pd.DataFrame(data).to_parquet(
-                f"tmp/{file}",
-                index=False,
-            )
-            logger.info("Save OHLC Hourly Data from Kraken REST API")
+                    # =========================================================================
+                    # Process 4 hourly data from Kraken REST API
+                    # =========================================================================
+                    data = kraken_rest_api.parse_ohlc_data(response)
+                logger.info("Loaded OHLC Hourly Data from Kraken REST API")
+
+                # =========================================================================
+                # Create `staging` area before inserting into `MinIO`
+                # =========================================================================
+                self.df = pd.DataFrame(data, columns=list(OHLC.model_fields))
+                self.df.to_parquet(
+                    f"tmp/{file}",
+                    index=False,
+                )
+                if self.checkpoint_store:
+                    self.checkpoint_store.mark_done(
+                        self.run_id, f"fetched:{file}", {"rows": len(self.df)}
+                    )
+                logger.info("Save OHLC Hourly Data from Kraken REST API")
+            current_span().add(rows_out=len(self.df))
 
             # =========================================================================
             # Copy file from `staging` area into `MinIO`
             # =========================================================================
-            minio_ops = MinioOPS()
-            minio_ops.create_bucket(os.getenv("BUCKET_NAME"))
-            minio_ops.write_object(
-                os.getenv("BUCKET_NAME"),
+            minio_ops.create_bucket(get_settings().bucket_name)
+            written = minio_ops.write_object(
+                get_settings().bucket_name,
                 destination_file=f"{file}",
                 source_file=f"tmp/{file}",
             )
+            if not written:
+                raise RuntimeError(f"Upload of {file} to MinIO failed")
+            if self.checkpoint_store:
+                self.checkpoint_store.mark_done(
+                    self.run_id, f"object:{file}", {"rows": len(self.df)}
+                )
             logger.info("Data ingestion process completed successfully.")
+            return True
         except Exception as e:
             logger.error(
                 f"An error occurred during the data pipeline ingestion process: {e}"
             )
-            return
+            return False
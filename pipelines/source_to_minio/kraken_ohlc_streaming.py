@@ -0,0 +1,223 @@
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from psycopg2.pool import ThreadedConnectionPool
+
+from pipelines.bronze.ohlc import BRONZE_COLUMNS, transform_rows
+from src.config import get_settings
+from src.extractors.kraken_extractor import KrakenExtractor
+from src.minio_ops import MinioOPS
+from src.orchestrator.refresh_listener import BRONZE_CHANNEL
+from src.timescaledb_ops import TimescaleDBOps
+from src.utils.checkpoint import CheckpointStore
+from src.utils.logger import logger
+from src.utils.metrics import current_span, timed
+from src.utils.streaming import END, QueueReader, QueueWriter, StagePipeline
+
+
+class DataPipeline:
+    def __init__(
+        self,
+        pair: str,
+        interval: int,
+        start_date: datetime,
+        end_date: datetime,
+        queue_depth: int = 4,
+        row_group_size: int = 50_000,
+        part_size: int = 5 * 1024 * 1024,
+        minio_ops: MinioOPS | None = None,
+        connection_pool: ThreadedConnectionPool | None = None,
+        checkpoint_store: CheckpointStore | None = None,
+        run_id: str | None = None,
+    ):
+        """Stream Kraken pages to MinIO and the bronze layer in one run.
+
+        Pages flow through fetch -> parse -> parquet encode -> multipart upload and
+        parse -> bronze COPY on separate threads, so network and database I/O overlap
+        and memory is bounded by `queue_depth` instead of the size of the dataset.
+
+        With a checkpoint store, pages committed to bronze and the uploaded object
+        are recorded per run id. A rerun skips the committed pages, and once the
+        object is uploaded it resumes fetching after the last committed page (a
+        partial multipart upload cannot be resumed, so until then every page is
+        fetched again to rebuild the object).
+        """
+        self.pair = pair
+        self.interval = interval
+        self.start_date = start_date
+        self.end_date = end_date
+        self.queue_depth = queue_depth
+        self.row_group_size = row_group_size
+        self.part_size = part_size
+        self.minio_ops = minio_ops
+        self.connection_pool = connection_pool
+        self.rows_loaded = 0
+        self.checkpoint_store = checkpoint_store
+        self.run_id = run_id or CheckpointStore.make_run_id(
+            "source.kraken_ohlc_streaming",
+            pair=pair,
+            interval=interval,
+            start_date=start_date,
+            end_date=end_date,
+        )
+        self.done = {}  # committed units of the run, by unit
+
+    # =========================================================================
+    # Stages
+    # =========================================================================
+    def fetch(self, stages: StagePipeline, pages, since: int):
+        kraken_rest_api = KrakenExtractor()
+        for page in kraken_rest_api.iter_ohlc_pages(
+            pair=self.pair,
+            interval=self.interval,
+            since=since,
+            until=int(self.end_date.timestamp()),
+        ):
+            stages.put(pages, page)
+        stages.put(pages, END)
+
+    def parse(self, stages: StagePipeline, pages, to_encode, to_load):
+        for page in stages.iterate(pages):
+            df = pd.DataFrame(page)
+            if to_encode is not None:
+                stages.put(to_encode, df)
+            stages.put(to_load, df)
+        if to_encode is not None:
+            stages.put(to_encode, END)
+        stages.put(to_load, END)
+
+    def encode(self, stages: StagePipeline, to_encode, to_upload):
+        sink = QueueWriter(stages, to_upload)
+        writer = None
+        pending = []
+        pending_rows = 0
+
+        def write_row_group():
+            nonlocal writer
+            table = pa.Table.from_pandas(pd.concat(pending), preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(sink, table.schema, compression="zstd")
+            writer.write_table(table, row_group_size=self.row_group_size)
+
+        for df in stages.iterate(to_encode):
+            pending.append(df)
+            pending_rows += len(df)
+            if pending_rows >= self.row_group_size:
+                write_row_group()
+                pending, pending_rows = [], 0
+
+        if pending:
+            write_row_group()
+        if writer is not None:
+            writer.close()
+        sink.close()
+
+    def upload(self, stages: StagePipeline, to_upload, file: str):
+        minio_ops = self.minio_ops or MinioOPS()
+        minio_ops.create_bucket(get_settings().bucket_name)
+        minio_ops.write_stream(
+            get_settings().bucket_name,
+            destination_file=file,
+            stream=QueueReader(stages, to_upload),
+            part_size=self.part_size,
+        )
+        if self.checkpoint_store:
+            self.checkpoint_store.mark_done(self.run_id, f"object:{file}")
+
+    def load(self, stages: StagePipeline, to_load):
+        db_ops = TimescaleDBOps(self.connection_pool)
+        try:
+            for df in stages.iterate(to_load):
+                first, last = int(df["time"].iloc[0]), int(df["time"].iloc[-1])
+                unit = f"page:{first}:{last}"
+                if unit in self.done:
+                    continue
+                committed = db_ops.copy_upsert_data(
+                    "ohlc",
+                    schema="bronze",
+                    columns=BRONZE_COLUMNS,
+                    data=transform_rows(df, self.pair, self.interval),
+                    conflict_columns=["time", "pair"],
+                )
+                if not committed:
+                    # Stop here so the committed pages stay a prefix of the range
+                    raise RuntimeError(
+                        f"Bronze load of the page {first} - {last} failed"
+                    )
+                # One notification per page, the listeners debounce them
+                db_ops.notify(
+                    BRONZE_CHANNEL,
+                    {
+                        "pair": self.pair,
+                        "interval": self.interval,
+                        "start": first,
+                        "end": last,
+                    },
+                )
+                if self.checkpoint_store:
+                    self.checkpoint_store.mark_done(
+                        self.run_id, unit, {"last_time": last, "rows": len(df)}
+                    )
+                self.rows_loaded += len(df)
+        finally:
+            db_ops.close_connection()
+
+    @timed("pipeline.source.kraken_ohlc_streaming")
+    def run(self) -> bool:
+        """Stream the range, stopping at the first failed stage
+
+        A page whose bronze COPY is not committed stops every stage, is not
+        notified and not counted, so the loaded pages stay a prefix of the range.
+
+        Returns:
+            bool: every page was uploaded and committed to bronze.
+        """
+        logger.info(
+            f"Data will be streamed from Kraken REST API to MinIO and TimescaleDB ({self.start_date.strftime('%Y-%m-%d')} to {self.end_date.strftime('%Y-%m-%d')})"
+        )
+        try:
+            file = f"{self.start_date.strftime('%Y%m%d')}_{self.end_date.strftime('%Y%m%d')}_{self.pair}_ohlc_{self.interval}.parquet"
+            since = int(self.start_date.timestamp())
+            self.done = (
+                self.checkpoint_store.done_units(self.run_id)
+                if self.checkpoint_store
+                else {}
+            )
+            uploaded = f"object:{file}" in self.done
+            if uploaded:
+                # Only the bronze load is left, restart after the last committed page
+                last_times = [
+                    payload["last_time"]
+                    for unit, payload in self.done.items()
+                    if unit.startswith("page:")
+                ]
+                since = max(last_times, default=since)
+                logger.info(
+                    f"{file} already uploaded by {self.run_id}, resuming the load since {since}."
+                )
+
+            stages = StagePipeline()
+            pages = stages.queue(self.queue_depth)
+            to_encode = None if uploaded else stages.queue(self.queue_depth)
+            to_load = stages.queue(self.queue_depth)
+
+            stages.add_stage("fetch", self.fetch, stages, pages, since)
+            stages.add_stage("parse", self.parse, stages, pages, to_encode, to_load)
+            if not uploaded:
+                to_upload = stages.queue(self.queue_depth * 16)  # small parquet chunks
+                stages.add_stage("encode", self.encode, stages, to_encode, to_upload)
+                stages.add_stage("upload", self.upload, stages, to_upload, file)
+            stages.add_stage("load", self.load, stages, to_load)
+            stages.run()
+            current_span().add(rows_out=self.rows_loaded)
+            logger.info(
+                f"Data streaming process completed successfully ({self.rows_loaded} rows)."
+            )
+            return True
+        except Exception as e:
+            logger.error(
+                f"An error occurred during the data pipeline streaming process: {e}"
+            )
+            return False
@@ -3,6 +3,8 @@ import importlib
 from datetime import datetime
 from types import ModuleType
 
+from src.utils.profiling import add_profiling_arguments, profiling_session
+
 
 def get_pipeline_module(pipeline_name: str) -> ModuleType:
     """Get a pipeline by name inside the source_to_minio folder.
@@ -14,7 +16,9 @@ def get_pipeline_module(pipeline_name: str) -> ModuleType:
         ModuleType: imported module.
     """
     try:
-        data_pipeline = importlib.import_module(f"pipelines.source_to_minio.{pipeline_name}")
+        data_pipeline = importlib.import_module(
+            f"pipelines.source_to_minio.{pipeline_name}"
+        )
     except ImportError:
         print(f"Error: Could not import module '{pipeline_name}'")
     return data_pipeline
@@ -52,6 +56,8 @@ if __name__ == "__main__":
         help="The end date to process the data in YYYY-MM-DD format",
     )
 
+    add_profiling_arguments(parser)
+
     args = parser.parse_args()
     pair = args.pair
     interval = args.interval
@@ -65,4 +71,5 @@ if __name__ == "__main__":
     pipeline = pipeline_module.DataPipeline(
         pair=pair, interval=interval, start_date=start_date, end_date=end_date
     )
-    pipeline.run()
+    with profiling_session(args, name=f"source_to_minio_{args.pipeline_name}"):
+        pipeline.run()
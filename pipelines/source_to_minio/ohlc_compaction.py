@@ -0,0 +1,219 @@
+import io
+import json
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.config import get_settings
+from src.minio_ops import MinioOPS
+from src.utils.logger import logger
+from src.utils.metrics import current_span, timed
+from src.utils.ohlc_objects import (
+    SOURCE_PATTERN,
+    bar_month,
+    group_prefix,
+    manifest_name,
+    read_manifest,
+)
+
+ROW_GROUP_SIZE = 131_072
+
+
+def encode_compacted(df: pd.DataFrame) -> bytes:
+    """Encode a month of bars as zstd parquet with large row groups and a dictionary-encoded pair"""
+    buffer = io.BytesIO()
+    pq.write_table(
+        pa.Table.from_pandas(
+            df.assign(pair=df["pair"].astype("category")), preserve_index=False
+        ),
+        buffer,
+        compression="zstd",
+        row_group_size=ROW_GROUP_SIZE,
+        use_dictionary=["pair"],
+    )
+    return buffer.getvalue()
+
+
+class DataPipeline:
+    def __init__(
+        self,
+        min_files: int = 2,
+        small_bytes: int = 16 * 1024 * 1024,
+        dry_run: bool = False,
+        minio_ops: MinioOPS | None = None,
+        bucket_name: str | None = None,
+    ):
+        """Compact the small source objects into one file per pair, interval and month
+
+        The bars of a month are merged with the current compacted file of the
+        month, deduplicated (the most recently fetched bar wins) and sorted by
+        time. The new files are written and verified under new names, the
+        manifest is swapped, and only then are the originals and the replaced
+        files deleted. Only one compaction may run at a time, and not while a
+        source pipeline rewrites one of the objects being compacted.
+
+        Args:
+            min_files (int, optional): small objects a pair and interval needs before being
+                compacted. Defaults to 2.
+            small_bytes (int, optional): objects smaller than this are compacted. Defaults to 16 MiB.
+            dry_run (bool, optional): only report what would be compacted. Defaults to False.
+            minio_ops (MinioOPS | None, optional): MinIO operations. Defaults to a new client.
+            bucket_name (str | None, optional): bucket to compact. Defaults to the `bucket_name` setting.
+        """
+        self.min_files = min_files
+        self.small_bytes = small_bytes
+        self.dry_run = dry_run
+        self.minio_ops = minio_ops or MinioOPS()
+        self.bucket_name = bucket_name or get_settings().bucket_name
+
+    def delete(self, names: list[str]):
+        for name in names:
+            try:
+                self.minio_ops.delete_object(self.bucket_name, name)
+            except Exception as e:
+                logger.warning(
+                    f"Could not delete {name}, the next compaction retries: {e}"
+                )
+
+    def read_sources(self, names: list[str]) -> tuple[pd.DataFrame | None, dict]:
+        """Read the source objects, oldest fetch first
+
+        Returns:
+            tuple[pd.DataFrame | None, dict]: bars of every object and [first, last] bar by object.
+        """
+        frames, sources = [], {}
+        # A later end date means a later fetch, its bars replace the older ones
+        for name in sorted(
+            names, key=lambda name: SOURCE_PATTERN.match(name).group("end", "start")
+        ):
+            df = pd.read_parquet(
+                io.BytesIO(self.minio_ops.read_object(self.bucket_name, name))
+            )
+            if df.empty:
+                sources[name] = [None, None]
+                continue
+            sources[name] = [int(df["time"].min()), int(df["time"].max())]
+            frames.append(df)
+        return (pd.concat(frames, ignore_index=True) if frames else None), sources
+
+    def compact(self, pair: str, interval: int, names: list[str]) -> bool:
+        """Compact the small objects of a pair and interval
+
+        Returns:
+            bool: the objects were compacted (or there was nothing to do).
+        """
+        manifest = read_manifest(self.minio_ops, self.bucket_name, pair, interval)
+        # An original already in the manifest was left by an interrupted run or
+        # rewritten by a later source run under the same name, compacting it
+        # again is harmless either way
+        pending_delete = any(name in manifest["sources"] for name in names)
+        if not self.dry_run:
+            # Files written by an interrupted run but never referenced
+            referenced = {manifest_name(pair, interval), *manifest["months"].values()}
+            self.delete(
+                [
+                    name
+                    for name in self.minio_ops.list_objects(
+                        self.bucket_name, prefix=f"{group_prefix(pair, interval)}/"
+                    )
+                    if name not in referenced
+                ]
+            )
+        if len(names) < self.min_files and not pending_delete:
+            return True
+
+        df, sources = self.read_sources(names)
+        if df is None:
+            df = pd.DataFrame(columns=["time"])
+        current_span().add(rows_in=len(df))
+        written, replaced = {}, []
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        for month, rows in df.assign(pair=pair).groupby(bar_month(df["time"])):
+            current = manifest["months"].get(month)
+            parts = (
+                [
+                    pd.read_parquet(
+                        io.BytesIO(
+                            self.minio_ops.read_object(self.bucket_name, current)
+                        )
+                    )
+                ]
+                if current
+                else []
+            )
+            parts.append(rows)
+            merged = (
+                pd.concat(parts, ignore_index=True)
+                .drop_duplicates(subset="time", keep="last")
+                .sort_values("time")
+            )
+            name = f"{group_prefix(pair, interval)}/{month.replace('-', '')}_{stamp}.parquet"
+            data = encode_compacted(merged)
+            if self.dry_run:
+                logger.info(
+                    f"{name}: {len(merged)} bars, {len(data) / 1024:.0f} KiB (dry run)."
+                )
+                continue
+            verified = self.minio_ops.write_bytes(self.bucket_name, name, data) and (
+                pq.read_metadata(
+                    io.BytesIO(self.minio_ops.read_object(self.bucket_name, name))
+                ).num_rows
+                == len(merged)
+            )
+            if not verified:
+                logger.error(
+                    f"{name} could not be written or verified, {pair} ({interval}) left as is."
+                )
+                self.delete([name, *written.values()])
+                return False
+            written[month] = name
+            if current:
+                replaced.append(current)
+            current_span().add(rows_out=len(merged), bytes_out=len(data))
+        if self.dry_run:
+            return True
+
+        # Atomic swap: readers switch to the new files with this single PUT
+        manifest["months"].update(written)
+        manifest["sources"].update(sources)
+        manifest["updated_at"] = stamp
+        if not self.minio_ops.write_bytes(
+            self.bucket_name,
+            manifest_name(pair, interval),
+            json.dumps(manifest, indent=2).encode("utf-8"),
+        ):
+            self.delete(list(written.values()))
+            return False
+        self.delete(replaced + names)
+        logger.info(
+            f"{pair} ({interval}): {len(names)} objects compacted into {len(written)} monthly files."
+        )
+        return True
+
+    @timed("pipeline.source.ohlc_compaction")
+    def run(self) -> bool:
+        """Compact every pair and interval with enough small objects
+
+        Returns:
+            bool: every pair and interval was compacted (or had nothing to do).
+        """
+        groups = defaultdict(list)
+        for name, size in self.minio_ops.object_sizes(self.bucket_name).items():
+            match = SOURCE_PATTERN.match(name)
+            if match and size < self.small_bytes:
+                groups[(match["pair"], int(match["interval"]))].append(name)
+
+        logger.info(
+            f"{sum(map(len, groups.values()))} small objects found for {len(groups)} pairs and intervals."
+        )
+        failed = [
+            f"{pair} ({interval})"
+            for (pair, interval), names in sorted(groups.items())
+            if not self.compact(pair, interval, names)
+        ]
+        if failed:
+            logger.error(f"Compaction failed for {', '.join(failed)}.")
+        return not failed
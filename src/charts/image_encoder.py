@@ -0,0 +1,132 @@
+import math
+from io import BytesIO
+
+from PIL import Image
+from pydantic import BaseModel
+
+from src.utils.logger import logger
+
+MIME_TYPES = {"png": "image/png", "webp": "image/webp", "jpeg": "image/jpeg"}
+
+
+class EncodedImage(BaseModel):
+    data: bytes
+    format: str
+    mime_type: str
+    width: int
+    height: int
+    original_bytes: int
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.original_bytes - len(self.data)
+
+    @property
+    def extension(self) -> str:
+        return "jpg" if self.format == "jpeg" else self.format
+
+
+class ImageEncoder:
+    def __init__(
+        self,
+        max_bytes: int | None = 500_000,
+        max_tokens: int | None = 1600,
+        max_long_edge: int = 1568,
+        min_width: int = 800,
+        formats: tuple = ("png", "webp", "jpeg"),
+        lossy_qualities: tuple = (90, 80, 70),
+    ):
+        """Re-encode rendered charts so LLM and webhook payloads stay small.
+
+        Args:
+            max_bytes (int | None, optional): byte budget of the encoded image. Defaults to 500_000.
+            max_tokens (int | None, optional): image token budget, estimated as width * height / 750
+                (the formula used by Anthropic). Defaults to 1600.
+            max_long_edge (int, optional): larger images are downscaled by the LLM provider anyway. Defaults to 1568.
+            min_width (int, optional): charts narrower than this stop being legible. Defaults to 800.
+            formats (tuple, optional): allowed formats, in order of preference. Defaults to ("png", "webp", "jpeg").
+            lossy_qualities (tuple, optional): qualities tried for WebP and JPEG. Defaults to (90, 80, 70).
+        """
+        self.max_bytes = max_bytes
+        self.max_tokens = max_tokens
+        self.max_long_edge = max_long_edge
+        self.min_width = min_width
+        self.formats = formats
+        self.lossy_qualities = lossy_qualities
+
+    @staticmethod
+    def estimate_tokens(width: int, height: int) -> int:
+        return math.ceil(width * height / 750)
+
+    def __candidates(self, image: Image.Image):
+        # Lossless candidates first, the chart has few colors so a 256 colors
+        # palette keeps lines and labels sharp
+        for image_format in self.formats:
+            if image_format == "png":
+                yield "png", {"optimize": True}, image.quantize(colors=256)
+            elif image_format == "webp":
+                yield "webp", {"lossless": True, "method": 6}, image
+        for quality in self.lossy_qualities:
+            for image_format in self.formats:
+                if image_format in ("webp", "jpeg"):
+                    yield image_format, {"quality": quality, "optimize": True}, image
+
+    def __scales(self, width: int, height: int):
+        scale = min(1.0, self.max_long_edge / max(width, height))
+        if self.max_tokens is not None:
+            scale = min(scale, math.sqrt(self.max_tokens * 750 / (width * height)))
+        while True:
+            yield scale
+            if width * scale * 0.85 < self.min_width:
+                return
+            scale *= 0.85
+
+    def encode(self, image_bytes: bytes) -> EncodedImage:
+        """Pick the format, resolution and quantization that meet the budget
+
+        Args:
+            image_bytes (bytes): rendered chart (e.g. PNG from `fig.to_image`).
+
+        Returns:
+            EncodedImage: smallest legible encoding that meets the budget, or the
+                smallest encoding found when none does.
+        """
+        original = Image.open(BytesIO(image_bytes)).convert("RGB")
+        smallest = None
+        for scale in self.__scales(*original.size):
+            width = max(int(original.width * scale), 1)
+            height = max(int(original.height * scale), 1)
+            image = (
+                original
+                if (width, height) == original.size
+                else original.resize((width, height), Image.LANCZOS)
+            )
+            for image_format, options, candidate in self.__candidates(image):
+                buffer = BytesIO()
+                candidate.save(buffer, format=image_format.upper(), **options)
+                encoded = EncodedImage(
+                    data=buffer.getvalue(),
+                    format=image_format,
+                    mime_type=MIME_TYPES[image_format],
+                    width=width,
+                    height=height,
+                    original_bytes=len(image_bytes),
+                )
+                if smallest is None or len(encoded.data) < len(smallest.data):
+                    smallest = encoded
+                if self.max_bytes is None or len(encoded.data) <= self.max_bytes:
+                    self.__log(encoded)
+                    return encoded
+
+        logger.warning(
+            f"No encoding meets the budget of {self.max_bytes} bytes, using the smallest one."
+        )
+        self.__log(smallest)
+        return smallest
+
+    def __log(self, encoded: EncodedImage):
+        logger.info(
+            f"Chart encoded as {encoded.format} {encoded.width}x{encoded.height} "
+            f"({len(encoded.data)} bytes, ~{self.estimate_tokens(encoded.width, encoded.height)} tokens), "
+            f"saved {encoded.bytes_saved} of {encoded.original_bytes} bytes."
+        )
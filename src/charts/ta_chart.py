@@ -0,0 +1,153 @@
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+
+def create_ta_chart(df: pd.DataFrame, pair: str) -> go.Figure:
+    """Create a chart containing candlesticks and technical indicators
+
+    Args:
+        df (pd.DataFrame): gold layer data sorted by date.
+        pair (str): pair shown in the chart title.
+
+    Returns:
+        go.Figure: candlestick, volume, stochastic and MACD subplots.
+    """
+    fig = make_subplots(
+        rows=4,
+        cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.02,
+        row_heights=[0.6, 0.1, 0.15, 0.15],
+        subplot_titles=(
+            pair,
+            "Volume",
+            "Stochastic(5, 3, 3)",
+            "MACD(12, 26, 9)",
+        ),
+    )
+
+    # Create candlestick chart
+    fig.add_trace(
+        go.Candlestick(
+            x=df["date"],
+            open=df["open"],
+            high=df["high"],
+            low=df["low"],
+            close=df["close"],
+            name="Price",
+            increasing_line_color="green",
+            decreasing_line_color="red",
+        ),
+        row=1,
+        col=1,
+    )
+
+    # Create volume bar chart
+    fig.add_trace(
+        go.Bar(
+            x=df["date"],
+            y=df["volume"],
+            name="Volume",
+            marker_color="orange",
+        ),
+        row=2,
+        col=1,
+    )
+
+    # Create EMA chart
+    fig.add_trace(
+        go.Scatter(
+            x=df["date"],
+            y=df["ema_13"],
+            mode="lines",
+            name="EMA 13",
+            line={"width": 1.5},
+        ),
+        row=1,
+        col=1,
+    )  # 13 EMA line
+
+    fig.add_trace(
+        go.Scatter(
+            x=df["date"],
+            y=df["ema_21"],
+            mode="lines",
+            name="EMA 21",
+            line={"width": 1.5},
+        ),
+        row=1,
+        col=1,
+    )  # 21 EMA line
+
+    # Create Stochastic Chart
+    fig.add_trace(
+        go.Scatter(
+            x=df["date"],
+            y=df["stochastic_percentage_k"],
+            mode="lines",
+            name="Stochastic %K",
+            line={"width": 1.5},
+        ),
+        row=3,
+        col=1,
+    )  # Stochastic %k line
+
+    fig.add_trace(
+        go.Scatter(
+            x=df["date"],
+            y=df["stochastic_percentage_d"],
+            mode="lines",
+            name="Stochastic %D",
+            line={"width": 1.5},
+        ),
+        row=3,
+        col=1,
+    )  # Stochastic %d line
+
+    # Create MACD Chart
+    fig.add_trace(
+        go.Scatter(
+            x=df["date"],
+            y=df["macd"],
+            mode="lines",
+            name="MACD Line",
+            line={"width": 1.5},
+        ),
+        row=4,
+        col=1,
+    )  # Create MACD Line
+
+    fig.add_trace(
+        go.Scatter(
+            x=df["date"],
+            y=df["macd_signal_line"],
+            mode="lines",
+            name="MACD Signal Line",
+            line={"width": 1.5},
+        ),
+        row=4,
+        col=1,
+    )  # Create MACD Signal Line
+
+    colors = ["green" if val >= 0 else "red" for val in df["macd_bar"]]
+    fig.add_trace(
+        go.Bar(
+            x=df["date"],
+            y=df["macd_bar"],
+            name="MACD Bar",
+            marker_color=colors,
+        ),
+        row=4,
+        col=1,
+    )  # Create MACD Bar
+
+    # Layout adjustments
+    fig.update_layout(
+        xaxis_rangeslider_visible=False,
+        template="plotly_dark",
+        height=1000,
+        margin=dict(l=50, r=25, t=50, b=40),
+    )
+
+    return fig
@@ -0,0 +1,61 @@
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+
+from dotenv import load_dotenv
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Typed configuration, loaded once from the environment (and `.env`)"""
+
+    postgres_db: str | None
+    postgres_user: str | None
+    postgres_password: str | None
+    postgres_host: str | None
+    postgres_port: str | None
+    minio_endpoint: str
+    minio_root_user: str | None
+    minio_root_password: str | None
+    bucket_name: str | None
+    kraken_base_url: str
+    discord_webhook_url: str | None
+    llm_cache_path: str
+    llm_cache_ttl_seconds: int
+    llm_cache_max_entries: int
+    metrics_jsonl_path: str | None
+    metrics_prometheus_path: str | None
+    checkpoint_path: str
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            postgres_db=os.getenv("POSTGRES_DB"),
+            postgres_user=os.getenv("POSTGRES_USER"),
+            postgres_password=os.getenv("POSTGRES_PASSWORD"),
+            postgres_host=os.getenv("POSTGRES_HOST"),
+            postgres_port=os.getenv("POSTGRES_PORT"),
+            minio_endpoint=os.getenv("MINIO_ENDPOINT", "localhost:9000"),
+            minio_root_user=os.getenv("MINIO_ROOT_USER"),
+            minio_root_password=os.getenv("MINIO_ROOT_PASSWORD"),
+            bucket_name=os.getenv("BUCKET_NAME"),
+            kraken_base_url=os.getenv("KRAKEN_BASE_URL", "https://api.kraken.com/0"),
+            discord_webhook_url=os.getenv("DISCORD_WEBHOOK_URL"),
+            llm_cache_path=os.getenv("LLM_CACHE_PATH", "llm_analysis_cache.sqlite"),
+            llm_cache_ttl_seconds=int(os.getenv("LLM_CACHE_TTL_SECONDS", 24 * 60 * 60)),
+            llm_cache_max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", 1000)),
+            metrics_jsonl_path=os.getenv("METRICS_JSONL_PATH"),
+            metrics_prometheus_path=os.getenv("METRICS_PROMETHEUS_PATH"),
+            checkpoint_path=os.getenv("CHECKPOINT_PATH", "checkpoints.sqlite"),
+        )
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Load `.env` once and return the settings
+
+    Returns:
+        Settings: configuration of the application.
+    """
+    load_dotenv()
+    return Settings.from_env()
@@ -1,11 +1,16 @@
+from typing import Iterator
+
 import requests
 
+from src.config import get_settings
+from src.model.ohlc import OHLC
 from src.utils.logger import logger
+from src.utils.metrics import span
 
 
 class KrakenExtractor:
     def __init__(self):
-        self.base_url = "https://api.kraken.com/0"
+        self.base_url = get_settings().kraken_base_url
 
     def get_ohlc_data(self, pair: str, interval: int, since: int) -> dict | None:
         """Fetch OHLC data for a given trading pair and interval.
@@ -20,9 +25,79 @@ class KrakenExtractor:
         """
         url = f"{self.base_url}/public/OHLC"
         params = {"pair": pair, "interval": interval, "since": since}
-        try:
-            response = requests.get(url, params=params)
-        except Exception as e:
-            logger.error(f"Error fetching OHLC data: {e}")
-            return None
-        return response.json()
+        with span("kraken.get_ohlc_data", pair=pair, interval=interval) as current:
+            try:
+                response = requests.get(url, params=params)
+            except Exception as e:
+                logger.error(f"Error fetching OHLC data: {e}")
+                return None
+            current.add(bytes_in=len(response.content))
+            return response.json()
+
+    def iter_ohlc_pages(
+        self, pair: str, interval: int, since: int, until: int | None = None
+    ) -> Iterator[list[dict]]:
+        """Fetch OHLC data page by page, following the `last` cursor.
+
+        Args:
+            pair (str): Trading pair (e.g., 'XXBTZUSD').
+            interval (int): Time interval in minutes.
+            since (int): Timestamp in seconds to fetch data since.
+            until (int | None, optional): Timestamp in seconds where fetching stops (exclusive). Defaults to None.
+
+        Yields:
+            list[dict]: parsed OHLC rows of a page.
+        """
+        while True:
+            response = self.get_ohlc_data(pair=pair, interval=interval, since=since)
+            if response is None:
+                raise RuntimeError(
+                    f"Failed to fetch OHLC data for {pair} since {since}"
+                )
+            if response.get("error"):
+                raise RuntimeError(f"Kraken returned an error: {response['error']}")
+
+            rows = self.parse_ohlc_data(response)
+            if until is not None:
+                rows = [row for row in rows if row["time"] < until]
+            if rows:
+                yield rows
+
+            last = response.get("result", {}).get("last")
+            if (
+                not rows
+                or last is None
+                or int(last) <= since
+                or (until is not None and int(last) >= until)
+            ):
+                return
+            since = int(last)
+
+    @staticmethod
+    def parse_ohlc_data(response: dict) -> list[dict]:
+        """Validate the OHLC rows of a response and convert them into dictionaries.
+
+        Args:
+            response (dict): JSON response of the OHLC endpoint.
+
+        Returns:
+            list[dict]: OHLC rows.
+        """
+        # The result is keyed by Kraken's own pair name (e.g. 'XXBTZUSD' for 'XBTUSD')
+        result = response.get("result", {})
+        data = next((value for key, value in result.items() if key != "last"), [])
+        with span("kraken.parse_ohlc_data") as current:
+            current.add(rows_in=len(data), rows_out=len(data))
+            return [
+                OHLC(
+                    time=int(item[0]),
+                    open=item[1],
+                    high=item[2],
+                    low=item[3],
+                    close=item[4],
+                    vwap=item[5],
+                    volume=item[6],
+                    count=int(item[7]),
+                ).model_dump()
+                for item in data
+            ]  # use pydantic model for data validation and then convert it into a dictionary
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from pydantic import BaseModel
+
+from src.model.analysis import Analysis
+from src.utils.logger import logger
+
+
+class AnalysisCache:
+    def __init__(
+        self,
+        path: str = "llm_analysis_cache.sqlite",
+        ttl_seconds: int | None = 24 * 60 * 60,
+        max_entries: int = 1000,
+    ):
+        self.__ttl_seconds = ttl_seconds
+        self.__max_entries = max_entries
+        self.__lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self.__conn = sqlite3.connect(path, check_same_thread=False)
+        self.__conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS analysis_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self.__conn.execute(
+            "CREATE INDEX IF NOT EXISTS analysis_cache_accessed_at ON analysis_cache (accessed_at)"
+        )
+        self.__conn.commit()
+
+    @staticmethod
+    def make_key(**parts) -> str:
+        """Build a cache key from the parts that determine an LLM answer.
+
+        Args:
+            **parts: fingerprint of the chart (or underlying rows), pair, timeframe,
+                model configuration, prompt template, etc.
+
+        Returns:
+            str: SHA-256 hex digest of the parts.
+        """
+        payload = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def fingerprint(data: str | bytes) -> str:
+        """Hash an image (base64 string or raw bytes) or serialized rows.
+
+        Args:
+            data (str | bytes): data to be hashed.
+
+        Returns:
+            str: SHA-256 hex digest of the data.
+        """
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        return hashlib.sha256(data).hexdigest()
+
+    def get(self, key: str) -> Analysis | None:
+        """Get a cached analysis, expired entries are treated as a miss.
+
+        Args:
+            key (str): cache key.
+
+        Returns:
+            Analysis | None: cached analysis or None when not found.
+        """
+        now = time.time()
+        with self.__lock:
+            row = self.__conn.execute(
+                "SELECT value, created_at FROM analysis_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, created_at = row
+            if self.__ttl_seconds is not None and now - created_at > self.__ttl_seconds:
+                self.__conn.execute("DELETE FROM analysis_cache WHERE key = ?", (key,))
+                self.__conn.commit()
+                self.misses += 1
+                return None
+
+            self.__conn.execute(
+                "UPDATE analysis_cache SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self.__conn.commit()
+            self.hits += 1
+
+        try:
+            return Analysis.model_validate_json(value)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cache entry {key}: {e}")
+            self.delete(key)
+            return None
+
+    def set(self, key: str, analysis: dict | BaseModel):
+        """Store an analysis and evict the least recently used entries above the size limit.
+
+        Args:
+            key (str): cache key.
+            analysis (dict | BaseModel): output from LLM.
+        """
+        if isinstance(analysis, dict):
+            analysis = Analysis.model_validate(analysis)
+        now = time.time()
+        with self.__lock:
+            self.__conn.execute(
+                """
+                INSERT INTO analysis_cache (key, value, created_at, accessed_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET
+                    value = excluded.value,
+                    created_at = excluded.created_at,
+                    accessed_at = excluded.accessed_at
+                """,
+                (key, analysis.model_dump_json(), now, now),
+            )
+            self.__evict(now)
+            self.__conn.commit()
+
+    def delete(self, key: str):
+        """Remove a single entry from the cache
+
+        Args:
+            key (str): cache key.
+        """
+        with self.__lock:
+            self.__conn.execute("DELETE FROM analysis_cache WHERE key = ?", (key,))
+            self.__conn.commit()
+
+    def __evict(self, now: float):
+        if self.__ttl_seconds is not None:
+            self.__conn.execute(
+                "DELETE FROM analysis_cache WHERE created_at < ?",
+                (now - self.__ttl_seconds,),
+            )
+        self.__conn.execute(
+            """
+            DELETE FROM analysis_cache WHERE key IN (
+                SELECT key FROM analysis_cache
+                ORDER BY accessed_at DESC
+                LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.__max_entries,),
+        )
+
+    def stats(self) -> dict:
+        """Get hit/miss counters and the number of stored entries
+
+        Returns:
+            dict: cache statistics.
+        """
+        with self.__lock:
+            (size,) = self.__conn.execute(
+                "SELECT COUNT(*) FROM analysis_cache"
+            ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "size": size}
+
+    def close(self):
+        """Close the SQLite connection"""
+        self.__conn.close()
@@ -1,42 +1,84 @@
 from langchain_anthropic import ChatAnthropic
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable
 from pydantic import BaseModel
 
 from src.llm_analyzer.llm_strategy_interface import LLMStrategyInterface
-from src.model.analysis import Actions, Analysis
+from src.model.analysis import Analysis
 
 
 class AnthropicLLMStrategy(LLMStrategyInterface):
     def __init__(self, **kwargs):
         super().__init__()
+        self.__config = {
+            key: kwargs.get(key) for key in ("model", "temperature", "max_tokens")
+        }
         self.__llm = ChatAnthropic(**kwargs).with_structured_output(Analysis)
+        self.__chains = {}
+
+    def get_config(self) -> dict:
+        return {**super().get_config(), **self.__config}
+
+    def get_chain(self, prompt_template: ChatPromptTemplate) -> Runnable:
+        """Get the `prompt_template | llm` chain, built once per prompt template
+
+        Args:
+            prompt_template (ChatPromptTemplate): prompt template that will be given to LLM.
+
+        Returns:
+            Runnable: chain of the prompt template and the LLM.
+        """
+        # Keep a reference to the template so its id is not reused
+        template, chain = self.__chains.get(id(prompt_template), (None, None))
+        if template is not prompt_template:
+            chain = prompt_template | self.__llm
+            self.__chains[id(prompt_template)] = (prompt_template, chain)
+        return chain
 
     def analyze(
         self,
         prompt_template: ChatPromptTemplate,
-        image_base64: str,
+        image_base64: str | None,
         pair: str,
         timeframe: str,
+        numeric_context: str | None = None,
     ) -> dict | BaseModel:
         """Perform technical analysis
 
         Args:
             prompt_template (ChatPromptTemplate): prompt template that will be given to LLM.
-            image_base64 (str): chart and technical indicators image in base64 format.
+            image_base64 (str | None): chart and technical indicators image in base64 format.
+            pair (str): pair that will be analyzed.
+            timeframe (str): timeframe of the chart.
+            numeric_context (str | None, optional): table of the latest candles and indicators. Defaults to None.
+
+        Returns:
+            dict | BaseModel: output from LLM.
+        """
+        return self.get_chain(prompt_template).invoke(
+            self.build_inputs(image_base64, pair, timeframe, numeric_context)
+        )
+
+    async def aanalyze(
+        self,
+        prompt_template: ChatPromptTemplate,
+        image_base64: str | None,
+        pair: str,
+        timeframe: str,
+        numeric_context: str | None = None,
+    ) -> dict | BaseModel:
+        """Perform technical analysis asynchronously
+
+        Args:
+            prompt_template (ChatPromptTemplate): prompt template that will be given to LLM.
+            image_base64 (str | None): chart and technical indicators image in base64 format.
             pair (str): pair that will be analyzed.
             timeframe (str): timeframe of the chart.
+            numeric_context (str | None, optional): table of the latest candles and indicators. Defaults to None.
 
         Returns:
             dict | BaseModel: output from LLM.
         """
-        chain = prompt_template | self.__llm
-        return chain.invoke(
-            {
-                "image_base64": image_base64,
-                "pair": pair,
-                "timeframe": timeframe,
-                "actions": "\n".join(
-                    f"{num+1}. {action.value}" for num, action in enumerate(Actions)
-                ),
-            }
+        return await self.get_chain(prompt_template).ainvoke(
+            self.build_inputs(image_base64, pair, timeframe, numeric_context)
         )
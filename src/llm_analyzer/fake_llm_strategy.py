@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+from langchain_core.prompts import ChatPromptTemplate
+from pydantic import BaseModel
+
+from src.llm_analyzer.llm_strategy_interface import LLMStrategyInterface
+from src.model.analysis import Actions, Analysis
+
+
+class FakeLLMStrategy(LLMStrategyInterface):
+    def __init__(self, action: Actions = Actions.BUY, latency: float = 0.0):
+        """Local stand-in for an LLM, used to exercise the analyzer offline.
+
+        Args:
+            action (Actions, optional): action returned by every analysis. Defaults to Actions.BUY.
+            latency (float, optional): seconds each analysis takes. Defaults to 0.0.
+        """
+        super().__init__()
+        self.action = action
+        self.latency = latency
+        self.calls = 0
+
+    def get_config(self) -> dict:
+        return {**super().get_config(), "action": self.action.value}
+
+    def __build_analysis(self, inputs: dict) -> Analysis:
+        self.calls += 1
+        return Analysis(
+            action=self.action,
+            reasons={
+                "Fake": f"Fake analysis of the {inputs['timeframe']} chart for {inputs['pair']}"
+            },
+        )
+
+    def analyze(
+        self,
+        prompt_template: ChatPromptTemplate,
+        image_base64: str | None,
+        pair: str,
+        timeframe: str,
+        numeric_context: str | None = None,
+    ) -> dict | BaseModel:
+        inputs = self.build_inputs(image_base64, pair, timeframe, numeric_context)
+        prompt_template.invoke(inputs)  # fail like a real LLM on missing variables
+        time.sleep(self.latency)
+        return self.__build_analysis(inputs)
+
+    async def aanalyze(
+        self,
+        prompt_template: ChatPromptTemplate,
+        image_base64: str | None,
+        pair: str,
+        timeframe: str,
+        numeric_context: str | None = None,
+    ) -> dict | BaseModel:
+        inputs = self.build_inputs(image_base64, pair, timeframe, numeric_context)
+        prompt_template.invoke(inputs)
+        await asyncio.sleep(self.latency)
+        return self.__build_analysis(inputs)
@@ -0,0 +1,201 @@
+import asyncio
+import threading
+import time
+
+from langchain_core.prompts import ChatPromptTemplate
+from pydantic import BaseModel
+
+from src.llm_analyzer.llm_strategy_interface import LLMStrategyInterface
+from src.model.analysis import Analysis
+from src.utils.latency_tracker import LatencyTracker
+from src.utils.logger import logger
+
+
+class HedgedLLMStrategy(LLMStrategyInterface):
+    def __init__(
+        self,
+        primary: LLMStrategyInterface,
+        fallback: LLMStrategyInterface | None = None,
+        hedge_percentile: float = 95,
+        initial_hedge_delay: float = 30.0,
+        min_hedge_delay: float = 2.0,
+        max_hedge_delay: float = 60.0,
+        min_samples: int = 20,
+        timeout: float | None = 300.0,
+        latency_tracker: LatencyTracker | None = None,
+    ):
+        """Fire a second request when the first one is slower than usual and keep the fastest.
+
+        Args:
+            primary (LLMStrategyInterface): strategy used for the first request.
+            fallback (LLMStrategyInterface | None, optional): strategy used for the hedged request. Defaults to the primary strategy.
+            hedge_percentile (float, optional): latency percentile after which the hedged request is fired. Defaults to 95.
+            initial_hedge_delay (float, optional): hedge delay used until `min_samples` latencies are recorded. Defaults to 30.0.
+            min_hedge_delay (float, optional): lower bound of the hedge delay in seconds. Defaults to 2.0.
+            max_hedge_delay (float, optional): upper bound of the hedge delay in seconds. Defaults to 60.0.
+            min_samples (int, optional): latencies needed before the percentile is trusted. Defaults to 20.
+            timeout (float | None, optional): seconds allowed for the whole analysis. Defaults to 300.0.
+            latency_tracker (LatencyTracker | None, optional): shared latency tracker. Defaults to a new tracker.
+        """
+        super().__init__()
+        self.primary = primary
+        self.fallback = fallback or primary
+        self.hedge_percentile = hedge_percentile
+        self.initial_hedge_delay = initial_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedge_delay = max_hedge_delay
+        self.min_samples = min_samples
+        self.timeout = timeout
+        self.latency_tracker = latency_tracker or LatencyTracker()
+        self.hedged_requests = 0
+        self.hedge_wins = 0
+        self.__loop = None
+        self.__loop_lock = threading.Lock()
+
+    def get_config(self) -> dict:
+        # Hedging does not change the answer, keep the cache keys of the primary strategy
+        return self.primary.get_config()
+
+    def get_hedge_delay(self) -> float:
+        """Seconds to wait for the primary request before firing the hedged request
+
+        Returns:
+            float: hedge delay.
+        """
+        if len(self.latency_tracker) < self.min_samples:
+            return self.initial_hedge_delay
+        delay = self.latency_tracker.percentile(self.hedge_percentile)
+        return min(max(delay, self.min_hedge_delay), self.max_hedge_delay)
+
+    @staticmethod
+    def __validate(result: dict | BaseModel | None) -> Analysis:
+        if isinstance(result, Analysis):
+            return result
+        if result is None:
+            raise ValueError("LLM returned an empty analysis")
+        if isinstance(result, BaseModel):
+            result = result.model_dump()
+        return Analysis.model_validate(result)
+
+    async def __attempt(self, strategy: LLMStrategyInterface, kwargs: dict) -> Analysis:
+        start = time.perf_counter()
+        analysis = self.__validate(await strategy.aanalyze(**kwargs))
+        # Only completed attempts are recorded, a cancelled loser says nothing about its latency
+        self.latency_tracker.record(time.perf_counter() - start)
+        return analysis
+
+    async def aanalyze(
+        self,
+        prompt_template: ChatPromptTemplate,
+        image_base64: str | None,
+        pair: str,
+        timeframe: str,
+        numeric_context: str | None = None,
+    ) -> dict | BaseModel:
+        """Perform technical analysis, hedged against slow responses
+
+        Args:
+            prompt_template (ChatPromptTemplate): prompt template that will be given to LLM.
+            image_base64 (str | None): chart and technical indicators image in base64 format.
+            pair (str): pair that will be analyzed.
+            timeframe (str): timeframe of the chart.
+            numeric_context (str | None, optional): table of the latest candles and indicators. Defaults to None.
+
+        Returns:
+            dict | BaseModel: first valid output from LLM.
+        """
+        kwargs = {
+            "prompt_template": prompt_template,
+            "image_base64": image_base64,
+            "pair": pair,
+            "timeframe": timeframe,
+            "numeric_context": numeric_context,
+        }
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+
+        primary = asyncio.create_task(self.__attempt(self.primary, kwargs))
+        pending = {primary}
+        hedge = None
+        error = None
+        try:
+            while pending:
+                if hedge is None:
+                    wait_for = self.get_hedge_delay()
+                else:
+                    wait_for = None
+                if deadline is not None:
+                    remaining = max(deadline - time.monotonic(), 0)
+                    wait_for = (
+                        remaining if wait_for is None else min(wait_for, remaining)
+                    )
+
+                done, pending = await asyncio.wait(
+                    pending, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+                    logger.warning(
+                        f"LLM request for {pair} ({timeframe}) failed: {error!r}"
+                    )
+
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise TimeoutError(
+                        f"LLM analysis for {pair} ({timeframe}) exceeded {self.timeout} seconds"
+                    )
+
+                # Fire the hedged request once, when the primary is slow or failed
+                if hedge is None:
+                    self.hedged_requests += 1
+                    logger.info(f"Hedging LLM request for {pair} ({timeframe}).")
+                    hedge = asyncio.create_task(self.__attempt(self.fallback, kwargs))
+                    pending.add(hedge)
+        finally:
+            # Cancel the loser
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+
+        raise error
+
+    def analyze(
+        self,
+        prompt_template: ChatPromptTemplate,
+        image_base64: str | None,
+        pair: str,
+        timeframe: str,
+        numeric_context: str | None = None,
+    ) -> dict | BaseModel:
+        """Perform technical analysis, hedged against slow responses (see `aanalyze`)
+
+        Every call runs on the same event loop, so the async clients of the
+        strategies (bound to the loop they were first used on) are reused
+        instead of being shared across short-lived loops.
+        """
+        return asyncio.run_coroutine_threadsafe(
+            self.aanalyze(
+                prompt_template=prompt_template,
+                image_base64=image_base64,
+                pair=pair,
+                timeframe=timeframe,
+                numeric_context=numeric_context,
+            ),
+            self.get_loop(),
+        ).result()
+
+    def get_loop(self) -> asyncio.AbstractEventLoop:
+        """Event loop of the synchronous calls, running in a daemon thread started on first use
+
+        Returns:
+            asyncio.AbstractEventLoop: long-lived event loop.
+        """
+        with self.__loop_lock:
+            if self.__loop is None:
+                self.__loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self.__loop.run_forever, name="hedged-llm-loop", daemon=True
+                ).start()
+            return self.__loop
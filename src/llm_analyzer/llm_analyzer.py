@@ -1,14 +1,23 @@
+import asyncio
+import json
+
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel
 
+from src.llm_analyzer.analysis_cache import AnalysisCache
 from src.llm_analyzer.llm_strategy_interface import LLMStrategyInterface
+from src.model.analysis_job import AnalysisJob
+from src.utils.logger import logger
 
 
 class LLMAnalyzer:
     # Define constructors
 
-    def __init__(self, llm_strategy: LLMStrategyInterface):
+    def __init__(
+        self, llm_strategy: LLMStrategyInterface, cache: AnalysisCache | None = None
+    ):
         self.__llm_strategy = llm_strategy
+        self.__cache = cache
 
     # Define setters and getters
     @property
@@ -19,28 +28,184 @@ class LLMAnalyzer:
     def set_llm_strategy(self, llm_strategy: LLMStrategyInterface):
         self.__llm_strategy = llm_strategy
 
+    @property
+    def cache(self):
+        return self.__cache
+
+    def get_cache_key(
+        self,
+        prompt_template: ChatPromptTemplate,
+        pair: str,
+        timeframe: str,
+        fingerprint: str,
+    ) -> str:
+        """Build the cache key of an analysis request
+
+        Args:
+            prompt_template (ChatPromptTemplate): prompt template that will be given to LLM.
+            pair (str): pair that will be analyzed.
+            timeframe (str): timeframe of the chart.
+            fingerprint (str): hash of the chart image or the underlying rows.
+
+        Returns:
+            str: cache key.
+        """
+        return AnalysisCache.make_key(
+            fingerprint=fingerprint,
+            pair=pair,
+            timeframe=timeframe,
+            llm=self.llm_strategy.get_config(),
+            prompt_template=json.dumps(
+                prompt_template.to_json(), sort_keys=True, default=str
+            ),
+        )
+
+    def __get_cached(
+        self,
+        prompt_template: ChatPromptTemplate,
+        image_base64: str | None,
+        pair: str,
+        timeframe: str,
+        fingerprint: str | None,
+        numeric_context: str | None,
+    ) -> tuple[str | None, BaseModel | None]:
+        if self.cache is None:
+            return None, None
+
+        key = self.get_cache_key(
+            prompt_template=prompt_template,
+            pair=pair,
+            timeframe=timeframe,
+            fingerprint=fingerprint
+            or AnalysisCache.fingerprint(
+                f"{image_base64 or ''}|{numeric_context or ''}"
+            ),
+        )
+        analysis = self.cache.get(key)
+        if analysis is not None:
+            logger.info(f"Analysis for {pair} ({timeframe}) served from cache.")
+        return key, analysis
+
     # Define abstract method for analysis
     def analyze(
         self,
         prompt_template: ChatPromptTemplate,
-        image_base64: str,
+        image_base64: str | None,
+        pair: str,
+        timeframe: str,
+        fingerprint: str | None = None,
+        numeric_context: str | None = None,
+    ) -> dict | BaseModel:
+        """Perform technical analysis, cached analyses are returned without calling the LLM
+
+        Args:
+            prompt_template (ChatPromptTemplate): prompt template that will be given to LLM.
+            image_base64 (str | None): chart and technical indicators image in base64 format.
+            pair (str): pair that will be analyzed.
+            timeframe (str): timeframe of the chart.
+            fingerprint (str | None, optional): hash of the underlying rows. Defaults to the hash of the image and numeric context.
+            numeric_context (str | None, optional): table of the latest candles and indicators. Defaults to None.
+
+        Returns:
+            dict | BaseModel: output from LLM.
+        """
+        key, analysis = self.__get_cached(
+            prompt_template, image_base64, pair, timeframe, fingerprint, numeric_context
+        )
+        if analysis is not None:
+            return analysis
+
+        analysis = self.llm_strategy.analyze(
+            prompt_template=prompt_template,
+            image_base64=image_base64,
+            pair=pair,
+            timeframe=timeframe,
+            numeric_context=numeric_context,
+        )
+
+        if key is not None:
+            self.cache.set(key, analysis)
+        return analysis
+
+    async def aanalyze(
+        self,
+        prompt_template: ChatPromptTemplate,
+        image_base64: str | None,
         pair: str,
         timeframe: str,
+        fingerprint: str | None = None,
+        numeric_context: str | None = None,
     ) -> dict | BaseModel:
-        """Perform technical analysis
+        """Perform technical analysis asynchronously, see `analyze`
 
         Args:
             prompt_template (ChatPromptTemplate): prompt template that will be given to LLM.
-            image_base64 (str): chart and technical indicators image in base64 format.
+            image_base64 (str | None): chart and technical indicators image in base64 format.
             pair (str): pair that will be analyzed.
             timeframe (str): timeframe of the chart.
+            fingerprint (str | None, optional): hash of the underlying rows. Defaults to the hash of the image and numeric context.
+            numeric_context (str | None, optional): table of the latest candles and indicators. Defaults to None.
 
         Returns:
             dict | BaseModel: output from LLM.
         """
-        return self.llm_strategy.analyze(
+        key, analysis = self.__get_cached(
+            prompt_template, image_base64, pair, timeframe, fingerprint, numeric_context
+        )
+        if analysis is not None:
+            return analysis
+
+        analysis = await self.llm_strategy.aanalyze(
             prompt_template=prompt_template,
             image_base64=image_base64,
             pair=pair,
             timeframe=timeframe,
+            numeric_context=numeric_context,
         )
+
+        if key is not None:
+            self.cache.set(key, analysis)
+        return analysis
+
+    async def analyze_many(
+        self,
+        prompt_template: ChatPromptTemplate,
+        jobs: list[AnalysisJob],
+        max_concurrency: int = 4,
+        timeout: float | None = 120,
+    ) -> list[dict | BaseModel | Exception]:
+        """Analyze several (pair, timeframe, chart) jobs concurrently
+
+        Args:
+            prompt_template (ChatPromptTemplate): prompt template that will be given to LLM.
+            jobs (list[AnalysisJob]): jobs to analyze.
+            max_concurrency (int, optional): maximum number of in-flight LLM requests. Defaults to 4.
+            timeout (float | None, optional): seconds allowed per job. Defaults to 120.
+
+        Returns:
+            list[dict | BaseModel | Exception]: output from LLM for each job, in the same
+                order as `jobs`. Failed or timed out jobs hold their exception.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run(job: AnalysisJob) -> dict | BaseModel | Exception:
+            async with semaphore:
+                try:
+                    return await asyncio.wait_for(
+                        self.aanalyze(
+                            prompt_template=prompt_template,
+                            image_base64=job.image_base64,
+                            pair=job.pair,
+                            timeframe=job.timeframe,
+                            fingerprint=job.fingerprint,
+                            numeric_context=job.numeric_context,
+                        ),
+                        timeout=timeout,
+                    )
+                except Exception as e:
+                    logger.error(
+                        f"Analysis for {job.pair} ({job.timeframe}) failed: {e!r}"
+                    )
+                    return e
+
+        return await asyncio.gather(*(run(job) for job in jobs))
@@ -0,0 +1,295 @@
+import asyncio
+import base64
+import itertools
+import time
+from collections import deque
+from datetime import datetime
+from enum import IntEnum
+from io import BytesIO
+
+from langchain_core.prompts import ChatPromptTemplate
+from PIL import Image
+from pydantic import BaseModel
+
+from src.charts.image_encoder import ImageEncoder
+from src.llm_analyzer.analysis_cache import AnalysisCache
+from src.llm_analyzer.llm_analyzer import LLMAnalyzer
+from src.llm_analyzer.prompt_builder import estimate_tokens
+from src.model.analysis_job import AnalysisJob
+from src.utils.logger import logger
+
+
+class Priority(IntEnum):
+    """Priority of an analysis job, lower values are served first"""
+
+    HIGH = 0
+    NORMAL = 1
+    LOW = 2
+
+
+class RateLimiter:
+    def __init__(self, requests_per_minute: int | None, tokens_per_minute: int | None):
+        """Sliding-window limiter for requests and tokens per minute
+
+        Args:
+            requests_per_minute (int | None): request budget, None for unlimited.
+            tokens_per_minute (int | None): token budget, None for unlimited.
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.__events = deque()  # (timestamp, tokens)
+        self.__lock = asyncio.Lock()
+
+    def __usage(self, now: float) -> tuple[int, int]:
+        while self.__events and now - self.__events[0][0] >= 60:
+            self.__events.popleft()
+        return len(self.__events), sum(tokens for _, tokens in self.__events)
+
+    async def acquire(self, tokens: int):
+        """Wait until the request fits inside both budgets
+
+        Args:
+            tokens (int): estimated tokens of the request.
+        """
+        async with self.__lock:
+            while True:
+                now = time.monotonic()
+                requests, used_tokens = self.__usage(now)
+                fits_requests = (
+                    self.requests_per_minute is None
+                    or requests < self.requests_per_minute
+                )
+                # A request larger than the whole budget is let through on an empty window
+                fits_tokens = (
+                    self.tokens_per_minute is None
+                    or used_tokens + tokens <= self.tokens_per_minute
+                    or not self.__events
+                )
+                if fits_requests and fits_tokens:
+                    self.__events.append((now, tokens))
+                    return
+                await asyncio.sleep(60 - (now - self.__events[0][0]))
+
+
+class LLMScheduler:
+    def __init__(
+        self,
+        analyzer: LLMAnalyzer,
+        prompt_template: ChatPromptTemplate,
+        requests_per_minute: int | None = 50,
+        tokens_per_minute: int | None = 40_000,
+        max_concurrency: int = 4,
+        output_tokens: int = 1000,
+        low_priority_batch_size: int = 10,
+        low_priority_max_wait: float = 15 * 60,
+        off_peak_hours: tuple[int, int] | None = None,
+    ):
+        """Queue analysis jobs by priority under request and token budgets.
+
+        Identical in-flight jobs are merged (singleflight), a duplicate submitted
+        with a higher priority upgrades the waiting job. Low priority jobs are
+        held back and submitted as a batch.
+
+        Args:
+            analyzer (LLMAnalyzer): analyzer that performs the requests.
+            prompt_template (ChatPromptTemplate): prompt template that will be given to LLM.
+            requests_per_minute (int | None, optional): request budget. Defaults to 50.
+            tokens_per_minute (int | None, optional): token budget. Defaults to 40_000.
+            max_concurrency (int, optional): number of workers. Defaults to 4.
+            output_tokens (int, optional): output tokens counted against the budget per request. Defaults to 1000.
+            low_priority_batch_size (int, optional): low priority jobs are released once this many are waiting. Defaults to 10.
+            low_priority_max_wait (float, optional): seconds after which waiting low priority jobs are released anyway. Defaults to 15 minutes.
+            off_peak_hours (tuple[int, int] | None, optional): local (start, end) hours during which low priority
+                jobs are released immediately. Defaults to None.
+        """
+        self.analyzer = analyzer
+        self.prompt_template = prompt_template
+        self.max_concurrency = max_concurrency
+        self.output_tokens = output_tokens
+        self.low_priority_batch_size = low_priority_batch_size
+        self.low_priority_max_wait = low_priority_max_wait
+        self.off_peak_hours = off_peak_hours
+        self.rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self.__prompt_tokens = estimate_tokens(prompt_template.pretty_repr())
+
+        self.__queue = asyncio.PriorityQueue()
+        self.__sequence = itertools.count()
+        self.__in_flight = {}
+        self.__waiting = {}  # key -> current queue item of the jobs not started yet
+        self.__low_priority = []
+        self.__tasks = []
+        self.deduplicated = 0
+        self.completed = 0
+
+    # =========================================================================
+    # Lifecycle
+    # =========================================================================
+    async def start(self):
+        """Start the workers and the low priority flusher"""
+        self.__tasks = [
+            asyncio.create_task(self.__worker()) for _ in range(self.max_concurrency)
+        ]
+        self.__tasks.append(asyncio.create_task(self.__flusher()))
+
+    async def stop(self):
+        """Release held jobs, wait for the queue to drain and stop the workers"""
+        self.__release_low_priority()
+        await self.__queue.join()
+        for task in self.__tasks:
+            task.cancel()
+        await asyncio.gather(*self.__tasks, return_exceptions=True)
+        self.__tasks = []
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    # =========================================================================
+    # Submission
+    # =========================================================================
+    def get_job_key(self, job: AnalysisJob) -> str:
+        return self.analyzer.get_cache_key(
+            prompt_template=self.prompt_template,
+            pair=job.pair,
+            timeframe=job.timeframe,
+            fingerprint=job.fingerprint
+            or AnalysisCache.fingerprint(
+                f"{job.image_base64 or ''}|{job.numeric_context or ''}"
+            ),
+        )
+
+    def estimate_job_tokens(self, job: AnalysisJob) -> int:
+        """Estimate input and output tokens of a job
+
+        Args:
+            job (AnalysisJob): analysis job.
+
+        Returns:
+            int: estimated tokens.
+        """
+        tokens = self.output_tokens + self.__prompt_tokens
+        if job.numeric_context:
+            tokens += estimate_tokens(job.numeric_context)
+        if job.image_base64:
+            width, height = Image.open(BytesIO(base64.b64decode(job.image_base64))).size
+            tokens += ImageEncoder.estimate_tokens(width, height)
+        return tokens
+
+    async def submit(
+        self, job: AnalysisJob, priority: Priority = Priority.NORMAL
+    ) -> dict | BaseModel:
+        """Queue a job and wait for its analysis
+
+        Args:
+            job (AnalysisJob): analysis job.
+            priority (Priority, optional): priority of the job. Defaults to Priority.NORMAL.
+
+        Returns:
+            dict | BaseModel: output from LLM.
+        """
+        key = self.get_job_key(job)
+        future = self.__in_flight.get(key)
+        if future is not None:
+            self.deduplicated += 1
+            logger.info(f"Joined in-flight analysis for {job.pair} ({job.timeframe}).")
+            self.__upgrade(key, priority)
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self.__in_flight[key] = future
+        item = (priority, next(self.__sequence), key, job, future)
+        self.__waiting[key] = item
+        if priority == Priority.LOW and not self.__is_off_peak():
+            self.__low_priority.append((time.monotonic(), item))
+            if len(self.__low_priority) >= self.low_priority_batch_size:
+                self.__release_low_priority()
+        else:
+            self.__queue.put_nowait(item)
+        return await asyncio.shield(future)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.__queue.qsize(),
+            "held_low_priority": len(self.__low_priority),
+            "in_flight": len(self.__in_flight),
+            "deduplicated": self.deduplicated,
+            "completed": self.completed,
+        }
+
+    # =========================================================================
+    # Workers
+    # =========================================================================
+    def __is_off_peak(self) -> bool:
+        if self.off_peak_hours is None:
+            return False
+        start, end = self.off_peak_hours
+        hour = datetime.now().hour
+        return start <= hour < end if start <= end else hour >= start or hour < end
+
+    def __upgrade(self, key: str, priority: Priority):
+        item = self.__waiting.get(key)
+        if item is None or priority >= item[0]:
+            # Already started, or not more urgent
+            return
+        _, _, _, job, future = item
+        upgraded = (priority, next(self.__sequence), key, job, future)
+        self.__waiting[key] = upgraded
+        # A held job leaves the batch, a queued one is skipped by the workers
+        self.__low_priority = [
+            (held_at, held) for held_at, held in self.__low_priority if held is not item
+        ]
+        self.__queue.put_nowait(upgraded)
+        logger.info(
+            f"Analysis for {job.pair} ({job.timeframe}) upgraded to {priority.name}."
+        )
+
+    def __release_low_priority(self):
+        if self.__low_priority:
+            logger.info(f"Releasing {len(self.__low_priority)} low priority jobs.")
+        for _, item in self.__low_priority:
+            self.__queue.put_nowait(item)
+        self.__low_priority = []
+
+    async def __flusher(self):
+        while True:
+            await asyncio.sleep(1)
+            if self.__low_priority and (
+                self.__is_off_peak()
+                or time.monotonic() - self.__low_priority[0][0]
+                >= self.low_priority_max_wait
+            ):
+                self.__release_low_priority()
+
+    async def __worker(self):
+        while True:
+            item = await self.__queue.get()
+            _, _, key, job, future = item
+            if self.__waiting.get(key) is not item:
+                # Replaced by an upgraded copy
+                self.__queue.task_done()
+                continue
+            del self.__waiting[key]
+            try:
+                await self.rate_limiter.acquire(self.estimate_job_tokens(job))
+                analysis = await self.analyzer.aanalyze(
+                    prompt_template=self.prompt_template,
+                    image_base64=job.image_base64,
+                    pair=job.pair,
+                    timeframe=job.timeframe,
+                    fingerprint=job.fingerprint,
+                    numeric_context=job.numeric_context,
+                )
+                future.set_result(analysis)
+                self.completed += 1
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                logger.error(f"Analysis for {job.pair} ({job.timeframe}) failed: {e!r}")
+                future.set_exception(e)
+            finally:
+                self.__in_flight.pop(key, None)
+                self.__queue.task_done()
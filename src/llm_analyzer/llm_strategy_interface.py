@@ -1,16 +1,76 @@
+import asyncio
 from abc import ABC, abstractmethod
 
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel
 
+from src.model.analysis import Actions
+
 
 class LLMStrategyInterface(ABC):
+    # Numbered list of actions given to the LLM, built once
+    ACTIONS = "\n".join(
+        f"{num+1}. {action.value}" for num, action in enumerate(Actions)
+    )
+
     @abstractmethod
     def analyze(
         self,
         prompt_template: ChatPromptTemplate,
-        image_base64: str,
+        image_base64: str | None,
         pair: str,
         timeframe: str,
+        numeric_context: str | None = None,
     ) -> dict | BaseModel:
         pass
+
+    async def aanalyze(
+        self,
+        prompt_template: ChatPromptTemplate,
+        image_base64: str | None,
+        pair: str,
+        timeframe: str,
+        numeric_context: str | None = None,
+    ) -> dict | BaseModel:
+        """Perform technical analysis asynchronously, by default `analyze` runs in a worker thread."""
+        return await asyncio.to_thread(
+            self.analyze,
+            prompt_template=prompt_template,
+            image_base64=image_base64,
+            pair=pair,
+            timeframe=timeframe,
+            numeric_context=numeric_context,
+        )
+
+    def get_config(self) -> dict:
+        """Settings that change the LLM output (model name, temperature, ...).
+
+        Returns:
+            dict: LLM settings, used to build cache keys.
+        """
+        return {"strategy": type(self).__name__}
+
+    def build_inputs(
+        self,
+        image_base64: str | None,
+        pair: str,
+        timeframe: str,
+        numeric_context: str | None = None,
+    ) -> dict:
+        """Build the variables of the prompt template
+
+        Args:
+            image_base64 (str | None): chart and technical indicators image in base64 format.
+            pair (str): pair that will be analyzed.
+            timeframe (str): timeframe of the chart.
+            numeric_context (str | None, optional): table of the latest candles and indicators. Defaults to None.
+
+        Returns:
+            dict: prompt template variables.
+        """
+        inputs = {"pair": pair, "timeframe": timeframe, "actions": self.ACTIONS}
+        if image_base64 is not None:
+            inputs["image_base64"] = image_base64
+        if numeric_context is not None:
+            inputs["numeric_context"] = numeric_context
+        return inputs
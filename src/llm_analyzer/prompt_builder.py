@@ -0,0 +1,145 @@
+import math
+
+import pandas as pd
+from langchain_core.prompts import ChatPromptTemplate
+
+# Column name inside the gold layer, header sent to the LLM and number of decimals
+NUMERIC_CONTEXT_COLUMNS = [
+    ("open", "O", 2),
+    ("high", "H", 2),
+    ("low", "L", 2),
+    ("close", "C", 2),
+    ("ema_13", "EMA13", 2),
+    ("ema_21", "EMA21", 2),
+    ("stochastic_percentage_k", "%K", 3),
+    ("stochastic_percentage_d", "%D", 3),
+    ("macd", "MACD", 2),
+    ("macd_signal_line", "Signal", 2),
+    ("macd_bar", "Hist", 2),
+]
+
+SYSTEM_PROMPT = "You are a professional cryptocurrency trader at a top proprietary trading firm, specializing in technical analysis."
+
+
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the number of input tokens of a text.
+
+    Numeric tables tokenize worse than prose, so 3 characters per token is used
+    instead of the usual 4 to stay on the safe side of the budget.
+
+    Args:
+        text (str): text that will be sent to the LLM.
+
+    Returns:
+        int: estimated number of tokens.
+    """
+    return math.ceil(len(text) / 3)
+
+
+def _format_row(row: pd.Series) -> str:
+    values = [pd.Timestamp(row["date"]).strftime("%Y-%m-%d")]
+    for column, _, decimals in NUMERIC_CONTEXT_COLUMNS:
+        value = row[column]
+        values.append("" if pd.isna(value) else f"{value:.{decimals}f}")
+    return ",".join(values)
+
+
+def build_numeric_context(
+    df: pd.DataFrame, max_rows: int = 60, token_budget: int = 2000
+) -> str:
+    """Build a compact CSV table of the latest gold rows for the LLM.
+
+    The number of rows is capped so the estimated size of the table fits inside
+    the token budget, the most recent rows are always kept.
+
+    Args:
+        df (pd.DataFrame): gold layer data sorted by date.
+        max_rows (int, optional): maximum number of rows. Defaults to 60.
+        token_budget (int, optional): target input-token budget of the table. Defaults to 2000.
+
+    Returns:
+        str: table in CSV format (oldest row first).
+    """
+    header = ",".join(["Date"] + [name for _, name, _ in NUMERIC_CONTEXT_COLUMNS])
+    lines = [_format_row(row) for _, row in df.tail(max_rows).iterrows()]
+
+    # Drop the oldest rows until the table fits inside the budget
+    tokens = estimate_tokens(header) + sum(estimate_tokens(line) + 1 for line in lines)
+    while lines and tokens > token_budget:
+        tokens -= estimate_tokens(lines.pop(0)) + 1
+
+    return "\n".join([header] + lines)
+
+
+def build_prompt_template(
+    include_image: bool = True,
+    include_numeric_context: bool = False,
+    mime_type: str = "image/png",
+) -> ChatPromptTemplate:
+    """Build the chat prompt template used for technical analysis.
+
+    Args:
+        include_image (bool, optional): send the chart image. Defaults to True.
+        include_numeric_context (bool, optional): send the table built by `build_numeric_context`. Defaults to False.
+        mime_type (str, optional): MIME type of the chart image. Defaults to "image/png".
+
+    Returns:
+        ChatPromptTemplate: prompt template.
+    """
+    if not include_image and not include_numeric_context:
+        raise ValueError(
+            "The prompt needs the chart image, the numeric context or both."
+        )
+
+    content = []
+    input_variables = ["timeframe", "pair", "actions"]
+    sources = []
+    shown_in = []
+    if include_image:
+        content.append(
+            {
+                "type": "image",
+                "source_type": "base64",
+                "mime_type": mime_type,
+                "data": "{image_base64}",
+            }
+        )
+        input_variables.append("image_base64")
+        sources.append("the provided image")
+        shown_in.append("image")
+    if include_numeric_context:
+        content.append(
+            {
+                "type": "text",
+                "text": (
+                    "Latest candles and technical indicators (CSV, oldest first):\n"
+                    "{numeric_context}"
+                ),
+            }
+        )
+        input_variables.append("numeric_context")
+        sources.append("the provided table")
+        shown_in.append("table")
+
+    content.append(
+        {
+            "type": "text",
+            "text": (
+                f"Your task is to analyze the {{timeframe}} chart and technical indicators for {{pair}} based on {' and '.join(sources)}. "
+                f"Perform a technical analysis based on candlestick charts, and technical indicators shown in {' and '.join(shown_in)}. "
+                "Your technical analysis should lead to a recommendation one of the following actions:\n"
+                "{actions}"
+            ),
+        }
+    )
+
+    return ChatPromptTemplate(
+        [
+            {
+                "role": "system",
+                "content": [{"type": "text", "text": SYSTEM_PROMPT}],
+            },
+            {"role": "user", "content": content},
+        ],
+        input_variables=input_variables,
+    )
@@ -0,0 +1,83 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("langchain_core")
+pytest.importorskip("pydantic")
+
+from langchain_core.prompts import ChatPromptTemplate  # noqa: E402
+
+from src.llm_analyzer.fake_llm_strategy import FakeLLMStrategy  # noqa: E402
+from src.llm_analyzer.llm_analyzer import LLMAnalyzer  # noqa: E402
+from src.model.analysis import Analysis  # noqa: E402
+from src.model.analysis_job import AnalysisJob  # noqa: E402
+
+PROMPT = ChatPromptTemplate.from_messages(
+    [("human", "Analyze the {timeframe} chart of {pair}: {actions}")]
+)
+
+
+class TrackingLLMStrategy(FakeLLMStrategy):
+    """Fake LLM recording its concurrency, failing or hanging for selected pairs"""
+
+    def __init__(self, latency: float):
+        super().__init__(latency=latency)
+        self.running = 0
+        self.max_running = 0
+
+    async def aanalyze(
+        self, prompt_template, image_base64, pair, timeframe, numeric_context=None
+    ):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            if pair == "FAIL":
+                raise RuntimeError("boom")
+            if pair == "HANG":
+                await asyncio.sleep(10)
+            return await super().aanalyze(
+                prompt_template, image_base64, pair, timeframe, numeric_context
+            )
+        finally:
+            self.running -= 1
+
+
+def jobs(pairs: list[str]) -> list[AnalysisJob]:
+    return [
+        AnalysisJob(pair=pair, timeframe="daily", numeric_context="close 1")
+        for pair in pairs
+    ]
+
+
+def test_jobs_run_concurrently_up_to_the_limit():
+    strategy = TrackingLLMStrategy(latency=0.1)
+    analyzer = LLMAnalyzer(strategy)
+
+    started = time.perf_counter()
+    results = asyncio.run(
+        analyzer.analyze_many(
+            PROMPT, jobs([f"PAIR{num}" for num in range(8)]), max_concurrency=4
+        )
+    )
+    elapsed = time.perf_counter() - started
+
+    assert strategy.max_running == 4
+    assert elapsed < 0.35  # two waves of 0.1s instead of eight
+    assert all(isinstance(result, Analysis) for result in results)
+    # Results keep the order of the jobs
+    assert [result.reasons["Fake"].split()[-1] for result in results] == [
+        f"PAIR{num}" for num in range(8)
+    ]
+
+
+def test_failed_and_timed_out_jobs_hold_their_exception():
+    analyzer = LLMAnalyzer(TrackingLLMStrategy(latency=0.0))
+
+    results = asyncio.run(
+        analyzer.analyze_many(PROMPT, jobs(["XXBTZUSD", "FAIL", "HANG"]), timeout=0.2)
+    )
+
+    assert isinstance(results[0], Analysis)
+    assert isinstance(results[1], RuntimeError)
+    assert isinstance(results[2], asyncio.TimeoutError)
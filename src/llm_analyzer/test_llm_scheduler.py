@@ -0,0 +1,179 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("langchain_core")
+pytest.importorskip("pandas")
+pytest.importorskip("PIL")
+
+from langchain_core.prompts import ChatPromptTemplate  # noqa: E402
+
+from src.llm_analyzer.fake_llm_strategy import FakeLLMStrategy  # noqa: E402
+from src.llm_analyzer.llm_analyzer import LLMAnalyzer  # noqa: E402
+from src.llm_analyzer.llm_scheduler import (
+    LLMScheduler,
+    Priority,
+    RateLimiter,
+)  # noqa: E402
+from src.model.analysis_job import AnalysisJob  # noqa: E402
+
+PROMPT = ChatPromptTemplate.from_messages(
+    [("human", "Analyze the {timeframe} chart of {pair}: {actions}")]
+)
+
+
+async def is_blocked(limiter: RateLimiter, tokens: int) -> bool:
+    try:
+        await asyncio.wait_for(limiter.acquire(tokens), timeout=0.2)
+    except asyncio.TimeoutError:
+        return True
+    return False
+
+
+def test_request_budget_blocks_once_used():
+    async def scenario():
+        limiter = RateLimiter(requests_per_minute=2, tokens_per_minute=None)
+        assert not await is_blocked(limiter, 10)
+        assert not await is_blocked(limiter, 10)
+        return await is_blocked(limiter, 10)
+
+    assert asyncio.run(scenario())
+
+
+def test_token_budget_blocks_once_used():
+    async def scenario():
+        limiter = RateLimiter(requests_per_minute=None, tokens_per_minute=1000)
+        assert not await is_blocked(limiter, 600)
+        return await is_blocked(limiter, 600)
+
+    assert asyncio.run(scenario())
+
+
+def test_request_larger_than_the_token_budget_passes_on_an_empty_window():
+    limiter = RateLimiter(requests_per_minute=None, tokens_per_minute=1000)
+    assert not asyncio.run(is_blocked(limiter, 5000))
+
+
+def test_identical_in_flight_jobs_are_merged():
+    strategy = FakeLLMStrategy(latency=0.1)
+
+    async def scenario():
+        async with LLMScheduler(
+            LLMAnalyzer(strategy), PROMPT, max_concurrency=2
+        ) as scheduler:
+            job = AnalysisJob(
+                pair="XXBTZUSD", timeframe="daily", numeric_context="close 1"
+            )
+            results = await asyncio.gather(scheduler.submit(job), scheduler.submit(job))
+            return scheduler, results
+
+    scheduler, (first, second) = asyncio.run(scenario())
+    assert strategy.calls == 1
+    assert first == second
+    assert scheduler.deduplicated == 1
+    assert scheduler.stats()["in_flight"] == 0
+
+
+def test_low_priority_jobs_are_held_until_released():
+    strategy = FakeLLMStrategy()
+
+    async def scenario():
+        scheduler = LLMScheduler(
+            LLMAnalyzer(strategy), PROMPT, low_priority_batch_size=10
+        )
+        await scheduler.start()
+        low = asyncio.create_task(
+            scheduler.submit(
+                AnalysisJob(
+                    pair="XETHZUSD", timeframe="daily", numeric_context="close 2"
+                ),
+                Priority.LOW,
+            )
+        )
+        await scheduler.submit(
+            AnalysisJob(pair="XXBTZUSD", timeframe="daily", numeric_context="close 1")
+        )
+        held = scheduler.stats()["held_low_priority"]
+        await scheduler.stop()
+        await low
+        return held, scheduler.completed
+
+    held, completed = asyncio.run(scenario())
+    assert held == 1
+    assert completed == 2
+
+
+class RecordingLLMStrategy(FakeLLMStrategy):
+    """Fake LLM recording the order of the analyzed pairs"""
+
+    def __init__(self):
+        super().__init__()
+        self.pairs = []
+
+    async def aanalyze(
+        self, prompt_template, image_base64, pair, timeframe, numeric_context=None
+    ):
+        self.pairs.append(pair)
+        return await super().aanalyze(
+            prompt_template, image_base64, pair, timeframe, numeric_context
+        )
+
+
+def test_jobs_are_served_by_priority_then_submission_order():
+    strategy = RecordingLLMStrategy()
+    submitted = [
+        ("LOW1", Priority.LOW),
+        ("NORMAL1", Priority.NORMAL),
+        ("HIGH1", Priority.HIGH),
+        ("NORMAL2", Priority.NORMAL),
+        ("HIGH2", Priority.HIGH),
+    ]
+
+    async def scenario():
+        # A single worker started once every job is queued
+        scheduler = LLMScheduler(
+            LLMAnalyzer(strategy), PROMPT, max_concurrency=1, low_priority_batch_size=1
+        )
+        submits = [
+            asyncio.create_task(
+                scheduler.submit(
+                    AnalysisJob(pair=pair, timeframe="daily", numeric_context=pair),
+                    priority,
+                )
+            )
+            for pair, priority in submitted
+        ]
+        await asyncio.sleep(0)
+        await scheduler.start()
+        await asyncio.gather(*submits)
+        await scheduler.stop()
+
+    asyncio.run(scenario())
+    assert strategy.pairs == ["HIGH1", "HIGH2", "NORMAL1", "NORMAL2", "LOW1"]
+
+
+def test_duplicate_at_higher_priority_upgrades_the_held_job():
+    strategy = RecordingLLMStrategy()
+
+    async def scenario():
+        async with LLMScheduler(
+            LLMAnalyzer(strategy), PROMPT, low_priority_batch_size=10
+        ) as scheduler:
+            job = AnalysisJob(
+                pair="XXBTZUSD", timeframe="daily", numeric_context="close 1"
+            )
+            low = asyncio.create_task(scheduler.submit(job, Priority.LOW))
+            await asyncio.sleep(0)
+            assert scheduler.stats()["held_low_priority"] == 1
+
+            # Served without waiting for the low priority batch
+            high = await asyncio.wait_for(
+                scheduler.submit(job, Priority.HIGH), timeout=1
+            )
+            return high, await low, scheduler.stats()
+
+    high, low, stats = asyncio.run(scenario())
+    assert high == low
+    assert strategy.pairs == ["XXBTZUSD"]
+    assert stats["held_low_priority"] == 0
+    assert stats["deduplicated"] == 1
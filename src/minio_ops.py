@@ -1,18 +1,20 @@
+import io
 import os
 
-from dotenv import load_dotenv
 from minio import Minio
 
+from src.config import get_settings
 from src.utils.logger import logger
+from src.utils.metrics import span
 
 
 class MinioOPS:
     def __init__(self):
-        load_dotenv()
+        settings = get_settings()
         self.__client = Minio(
-            "localhost:9000",
-            access_key=os.getenv("MINIO_ROOT_USER"),
-            secret_key=os.getenv("MINIO_ROOT_PASSWORD"),
+            settings.minio_endpoint,
+            access_key=settings.minio_root_user,
+            secret_key=settings.minio_root_password,
             secure=False,
         )
 
@@ -29,23 +31,58 @@ class MinioOPS:
         else:
             logger.error(f"Bucket '{bucket_name}' already exists.")
 
-    def write_object(self, bucket_name: str, destination_file: str, source_file: str):
+    def write_object(
+        self, bucket_name: str, destination_file: str, source_file: str
+    ) -> bool:
         """Create an object inside the bucket
 
         Args:
             bucket_name (str): bucket name that you want to write.
             destination_file (str): file name where the object stored.
             source_file (str): local file.
+
+        Returns:
+            bool: the object was written.
         """
         try:
-            self.__client.fput_object(bucket_name, destination_file, source_file)
+            with span("minio.write_object", bucket=bucket_name) as current:
+                self.__client.fput_object(bucket_name, destination_file, source_file)
+                current.add(bytes_out=os.path.getsize(source_file))
             logger.info(
                 f"Object '{destination_file}' written to bucket '{bucket_name}' successfully."
             )
+            return True
         except Exception as e:
             logger.error(
                 f"Error occurred while writing object '{destination_file}' to bucket '{bucket_name}': {e}"
             )
+            return False
+
+    def write_stream(
+        self,
+        bucket_name: str,
+        destination_file: str,
+        stream,
+        part_size: int = 5 * 1024 * 1024,
+    ):
+        """Upload a stream of unknown length as a multipart upload
+
+        Parts are uploaded as soon as `part_size` bytes can be read from the stream.
+
+        Args:
+            bucket_name (str): bucket name that you want to write.
+            destination_file (str): file name where the object stored.
+            stream: file-like object with a `read(size)` method.
+            part_size (int, optional): size of each part (minimum 5 MiB). Defaults to 5 MiB.
+        """
+        with span("minio.write_stream", bucket=bucket_name) as current:
+            self.__client.put_object(
+                bucket_name, destination_file, stream, length=-1, part_size=part_size
+            )
+            current.add(bytes_out=getattr(stream, "bytes_read", 0))
+        logger.info(
+            f"Object '{destination_file}' streamed to bucket '{bucket_name}' successfully."
+        )
 
     def read_object(self, bucket_name: str, object_name: str) -> bytes:
         """Read object data from bucket
@@ -54,19 +91,97 @@ class MinioOPS:
             bucket_name (str): bucket name that you want to read.
             object_name (str): object name/path that you want to read.
 
+        A failed read is logged and raised again, there is no data to return.
+
         Returns:
             bytes: object data.
         """
+        response = None
         try:
-            response = self.__client.get_object(bucket_name, object_name)
-            data = response.data
+            with span("minio.read_object", bucket=bucket_name) as current:
+                response = self.__client.get_object(bucket_name, object_name)
+                data = response.data
+                current.add(bytes_in=len(data))
         except Exception as e:
             logger.error(
-                f"Error occurred while retriving {object_name} object from {bucket_name} bucket"
+                f"Error occurred while retriving {object_name} object from {bucket_name} bucket: {e}"
             )
+            raise
         finally:
-            # Need to do this so that we
-            response.close()
-            response.release_conn()
+            # Return the connection to the pool, the response is None when get_object failed
+            if response is not None:
+                response.close()
+                response.release_conn()
 
         return data
+
+    def write_bytes(self, bucket_name: str, destination_file: str, data: bytes) -> bool:
+        """Create an object from in-memory data
+
+        Args:
+            bucket_name (str): bucket name that you want to write.
+            destination_file (str): file name where the object stored.
+            data (bytes): content of the object.
+
+        Returns:
+            bool: the object was written.
+        """
+        try:
+            with span("minio.write_bytes", bucket=bucket_name) as current:
+                self.__client.put_object(
+                    bucket_name, destination_file, io.BytesIO(data), length=len(data)
+                )
+                current.add(bytes_out=len(data))
+            logger.info(
+                f"Object '{destination_file}' written to bucket '{bucket_name}' successfully."
+            )
+            return True
+        except Exception as e:
+            logger.error(
+                f"Error occurred while writing object '{destination_file}' to bucket '{bucket_name}': {e}"
+            )
+            return False
+
+    def list_objects(self, bucket_name: str, prefix: str = "") -> list[str]:
+        """List the object names under a prefix (recursively)
+
+        Args:
+            bucket_name (str): bucket name that you want to list.
+            prefix (str, optional): prefix of the object names. Defaults to "".
+
+        Returns:
+            list[str]: object names.
+        """
+        return [
+            obj.object_name
+            for obj in self.__client.list_objects(
+                bucket_name, prefix=prefix, recursive=True
+            )
+        ]
+
+    def object_sizes(self, bucket_name: str, prefix: str = "") -> dict[str, int]:
+        """Get the size in bytes of the objects under a prefix (recursively)
+
+        Args:
+            bucket_name (str): bucket name that you want to list.
+            prefix (str, optional): prefix of the object names. Defaults to "".
+
+        Returns:
+            dict[str, int]: size by object name.
+        """
+        return {
+            obj.object_name: obj.size
+            for obj in self.__client.list_objects(
+                bucket_name, prefix=prefix, recursive=True
+            )
+        }
+
+    def delete_object(self, bucket_name: str, object_name: str):
+        """Delete an object from the bucket
+
+        Args:
+            bucket_name (str): bucket name that you want to delete from.
+            object_name (str): object name/path that you want to delete.
+        """
+        self.__client.remove_object(bucket_name, object_name)
+        logger.info(f"Object '{object_name}' deleted from bucket '{bucket_name}'.")
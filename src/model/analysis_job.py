@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+
+
+class AnalysisJob(BaseModel):
+    """Single (pair, timeframe, chart) request for the LLM analyzer"""
+
+    pair: str
+    timeframe: str
+    image_base64: str | None = None
+    numeric_context: str | None = None
+    fingerprint: str | None = None
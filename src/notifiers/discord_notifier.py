@@ -0,0 +1,211 @@
+import json
+import queue
+import threading
+import time
+
+import requests
+from pydantic import BaseModel
+
+from src.utils.logger import logger
+
+# Limits of a single Discord webhook call
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_FILES_PER_MESSAGE = 10
+# Characters of every title, description, field, footer and author of the embeds of a call
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+
+
+def embed_size(embed: dict) -> int:
+    """Characters of an embed counted against `MAX_EMBED_CHARS_PER_MESSAGE`"""
+    size = len(embed.get("title") or "") + len(embed.get("description") or "")
+    size += len((embed.get("footer") or {}).get("text") or "")
+    size += len((embed.get("author") or {}).get("name") or "")
+    for field in embed.get("fields") or []:
+        size += len(field.get("name") or "") + len(field.get("value") or "")
+    return size
+
+
+class DiscordMessage(BaseModel):
+    """Single summary to deliver, optionally with its chart"""
+
+    embed: dict
+    file_name: str | None = None
+    file_data: bytes | None = None
+    mime_type: str = "image/png"
+
+
+class DiscordNotifier:
+    def __init__(
+        self,
+        webhook_url: str,
+        timeout: float = 10,
+        max_retries: int = 5,
+        batch_wait: float = 1.0,
+        max_queue_size: int = 1000,
+    ):
+        """Deliver summaries to a Discord webhook from a background thread.
+
+        Queued messages are packed into as few webhook calls as Discord allows
+        (10 embeds, 10 attachments and 6000 embed characters per call), rate
+        limits are respected using the `Retry-After` header and timeouts or lost
+        connections are retried.
+
+        Args:
+            webhook_url (str): Discord webhook URL.
+            timeout (float, optional): seconds allowed per HTTP request. Defaults to 10.
+            max_retries (int, optional): retries per webhook call. Defaults to 5.
+            batch_wait (float, optional): seconds to wait for more messages before sending a batch. Defaults to 1.0.
+            max_queue_size (int, optional): maximum number of queued messages. Defaults to 1000.
+        """
+        self.webhook_url = webhook_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.batch_wait = batch_wait
+        self.__queue = queue.Queue(maxsize=max_queue_size)
+        self.__carry = (
+            None  # message taken from the queue that did not fit the last batch
+        )
+        self.__session = requests.Session()
+        self.__stop = threading.Event()
+        self.sent_messages = 0
+        self.sent_requests = 0
+        self.failed_messages = 0
+        self.__thread = threading.Thread(
+            target=self.__run, name="discord-notifier", daemon=True
+        )
+        self.__thread.start()
+
+    def send(self, message: DiscordMessage):
+        """Queue a message, returns immediately
+
+        Args:
+            message (DiscordMessage): message to deliver.
+        """
+        self.__queue.put(message)
+
+    def flush(self):
+        """Block until every queued message was delivered (or dropped)"""
+        self.__queue.join()
+
+    def close(self):
+        """Deliver queued messages and stop the background thread"""
+        self.flush()
+        self.__stop.set()
+        self.__thread.join()
+        self.__session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # =========================================================================
+    # Background delivery
+    # =========================================================================
+    def __next_batch(self) -> list[DiscordMessage]:
+        if self.__carry is not None:
+            batch, self.__carry = [self.__carry], None
+        else:
+            try:
+                batch = [self.__queue.get(timeout=0.5)]
+            except queue.Empty:
+                return []
+
+        # Each message holds at most one file, so the embed limit also keeps the
+        # number of attachments inside the limit
+        size = embed_size(batch[0].embed)
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < min(MAX_EMBEDS_PER_MESSAGE, MAX_FILES_PER_MESSAGE):
+            try:
+                message = self.__queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+            if size + embed_size(message.embed) > MAX_EMBED_CHARS_PER_MESSAGE:
+                # Opens the next batch
+                self.__carry = message
+                break
+            size += embed_size(message.embed)
+            batch.append(message)
+        return batch
+
+    def __run(self):
+        while not (
+            self.__stop.is_set() and self.__queue.empty() and self.__carry is None
+        ):
+            batch = self.__next_batch()
+            if not batch:
+                continue
+            try:
+                self.__post(batch)
+                self.sent_messages += len(batch)
+            except Exception as e:
+                self.failed_messages += len(batch)
+                logger.error(f"Failed to deliver {len(batch)} messages to Discord: {e}")
+            finally:
+                for _ in batch:
+                    self.__queue.task_done()
+
+    def __post(self, batch: list[DiscordMessage]):
+        embeds = []
+        files = {}
+        attachments = []
+        for message in batch:
+            embed = dict(message.embed)
+            if message.file_data is not None:
+                index = len(attachments)
+                # Messages of a batch may share a file name, e.g. "chart.png"
+                file_name = f"{index}_{message.file_name}"
+                files[f"files[{index}]"] = (
+                    file_name,
+                    message.file_data,
+                    message.mime_type,
+                )
+                attachments.append({"id": index, "filename": file_name})
+                embed.setdefault("image", {"url": f"attachment://{file_name}"})
+            embeds.append(embed)
+        payload = {"embeds": embeds, "attachments": attachments}
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.__session.post(
+                    self.webhook_url,
+                    data={"payload_json": json.dumps(payload)},
+                    files=files or None,
+                    timeout=self.timeout,
+                )
+            except (requests.Timeout, requests.ConnectionError) as e:
+                wait = min(2**attempt, 30)
+                logger.warning(
+                    f"Discord webhook unreachable ({e}), retrying in {wait:.1f}s."
+                )
+                time.sleep(wait)
+                continue
+            finally:
+                self.sent_requests += 1
+            if response.status_code < 400:
+                logger.info(f"Delivered {len(batch)} messages to Discord.")
+                return
+
+            if response.status_code == 429 or response.status_code >= 500:
+                wait = self.__get_retry_after(response, attempt)
+                logger.warning(
+                    f"Discord webhook returned {response.status_code}, retrying in {wait:.1f}s."
+                )
+                time.sleep(wait)
+                continue
+            response.raise_for_status()
+
+        raise RuntimeError(f"Discord webhook failed after {self.max_retries} retries")
+
+    @staticmethod
+    def __get_retry_after(response: requests.Response, attempt: int) -> float:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after is None:
+            try:
+                retry_after = response.json().get("retry_after")
+            except ValueError:
+                retry_after = None
+        if retry_after is not None:
+            return float(retry_after)
+        return min(2**attempt, 30)
@@ -0,0 +1,128 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("pydantic")
+
+from src.notifiers import discord_notifier  # noqa: E402
+from src.notifiers.discord_notifier import DiscordMessage, DiscordNotifier  # noqa: E402
+
+
+class WebhookStub(ThreadingHTTPServer):
+    """Local Discord webhook answering with the queued responses, then 204"""
+
+    def __init__(self, responses: list[tuple[int, dict] | None] | None = None):
+        super().__init__(("127.0.0.1", 0), WebhookHandler)
+        self.responses = list(responses or [])
+        self.payloads = []
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/webhook"
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        response = self.server.responses.pop(0) if self.server.responses else (204, {})
+        if response is None:
+            # Drop the connection without answering
+            self.close_connection = True
+            return
+
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body
+        )
+        parts = {
+            part.get_param("name", header="content-disposition"): part
+            for part in message.iter_parts()
+        }
+        self.server.payloads.append(
+            {
+                "payload": json.loads(parts["payload_json"].get_content()),
+                "files": sorted(
+                    part.get_filename()
+                    for name, part in parts.items()
+                    if name != "payload_json"
+                ),
+            }
+        )
+        status, headers = response
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    server = WebhookStub()
+    yield server
+    server.close()
+
+
+def chart_message(num: int, description: str = "") -> DiscordMessage:
+    return DiscordMessage(
+        embed={"title": f"Analysis {num}", "description": description},
+        file_name="chart.png",
+        file_data=b"\x89PNG",
+    )
+
+
+def test_batches_respect_the_embed_count_and_unique_file_names(stub):
+    with DiscordNotifier(stub.url, batch_wait=0.5) as notifier:
+        for num in range(12):
+            notifier.send(chart_message(num))
+
+    assert [len(call["payload"]["embeds"]) for call in stub.payloads] == [10, 2]
+    first = stub.payloads[0]
+    names = [attachment["filename"] for attachment in first["payload"]["attachments"]]
+    assert len(set(names)) == 10
+    assert first["files"] == sorted(names)
+    assert first["payload"]["embeds"][3]["image"]["url"] == f"attachment://{names[3]}"
+    assert notifier.sent_messages == 12
+
+
+def test_batches_respect_the_embed_character_budget(stub):
+    with DiscordNotifier(stub.url, batch_wait=0.5) as notifier:
+        for num in range(3):
+            notifier.send(chart_message(num, description="x" * 2500))
+
+    assert [len(call["payload"]["embeds"]) for call in stub.payloads] == [2, 1]
+    assert notifier.sent_messages == 3
+
+
+def test_rate_limits_and_lost_connections_are_retried(stub, monkeypatch):
+    # Only the notifier skips its waits, the stub server and pytest keep the real clock
+    monkeypatch.setattr(
+        discord_notifier,
+        "time",
+        SimpleNamespace(monotonic=time.monotonic, sleep=lambda seconds: None),
+    )
+    stub.responses = [(429, {"Retry-After": "0"}), None]
+    with DiscordNotifier(stub.url, batch_wait=0.1) as notifier:
+        notifier.send(chart_message(0))
+
+    assert (
+        len(stub.payloads) == 2
+    )  # the 429 and the delivery, the dropped call is not parsed
+    assert notifier.sent_requests == 3
+    assert notifier.sent_messages == 1
+    assert notifier.failed_messages == 0
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable
+
+from src.utils.logger import logger
+from src.utils.metrics import bind_span, span
+
+
+class Node:
+    def __init__(
+        self,
+        name: str,
+        run: Callable[[dict], Any],
+        deps: list[str] | None = None,
+        params: dict | None = None,
+        output_fingerprint: Callable[[Any], str] | None = None,
+        always_run: bool = False,
+    ):
+        """Single stage of the DAG
+
+        Args:
+            name (str): unique name of the node.
+            run (Callable[[dict], Any]): function receiving the outputs of the dependencies by name
+                and returning the output of the node.
+            deps (list[str] | None, optional): names of the nodes this node depends on. Defaults to None.
+            params (dict | None, optional): parameters that are part of the input fingerprint. Defaults to None.
+            output_fingerprint (Callable[[Any], str] | None, optional): fingerprint of the output, by default
+                the output of a node is assumed to only depend on its inputs. Defaults to None.
+            always_run (bool, optional): never skip the node (e.g. it reads an external source). Defaults to False.
+        """
+        self.name = name
+        self.run = run
+        self.deps = deps or []
+        self.params = params or {}
+        self.output_fingerprint = output_fingerprint
+        self.always_run = always_run
+
+
+class DAG:
+    def __init__(
+        self, state_path: str = ".orchestrator_state.json", max_workers: int = 4
+    ):
+        """Run nodes in dependency order, independent branches run in parallel.
+
+        Nodes whose input fingerprint (parameters and fingerprints of the dependency
+        outputs) did not change since the last successful run are skipped.
+
+        Args:
+            state_path (str, optional): file storing the fingerprints of the last run. Defaults to ".orchestrator_state.json".
+            max_workers (int, optional): number of nodes running at the same time. Defaults to 4.
+        """
+        self.state_path = state_path
+        self.max_workers = max_workers
+        self.nodes = {}
+
+    def add_node(self, node: Node) -> Node:
+        if node.name in self.nodes:
+            raise ValueError(f"Node '{node.name}' already exists")
+        self.nodes[node.name] = node
+        return node
+
+    def __validate(self):
+        for node in self.nodes.values():
+            for dep in node.deps:
+                if dep not in self.nodes:
+                    raise ValueError(
+                        f"Node '{node.name}' depends on unknown node '{dep}'"
+                    )
+
+        # Detect cycles with a depth-first search
+        visiting, visited = set(), set()
+
+        def visit(name: str):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"Cycle detected at node '{name}'")
+            visiting.add(name)
+            for dep in self.nodes[name].deps:
+                visit(dep)
+            visiting.remove(name)
+            visited.add(name)
+
+        for name in self.nodes:
+            visit(name)
+
+    def __load_state(self) -> dict:
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path) as file:
+            return json.load(file)
+
+    def __save_state(self, state: dict):
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(state, file, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.state_path)
+
+    @staticmethod
+    def __hash(value: Any) -> str:
+        payload = json.dumps(value, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def run(self) -> dict:
+        """Run the DAG
+
+        Returns:
+            dict: status of each node ("success", "skipped", "failed" or "upstream_failed").
+        """
+        self.__validate()
+        state = self.__load_state()
+        outputs, fingerprints, status = {}, {}, {}
+        remaining = dict(self.nodes)
+        running = {}
+
+        def execute(node: Node, inputs: dict):
+            logger.info(f"Running node '{node.name}' ...")
+            with span("dag.node", node=node.name):
+                return node.run(inputs)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while remaining or running:
+                # Submit every node whose dependencies have a final status
+                for name, node in list(remaining.items()):
+                    if any(dep not in status for dep in node.deps):
+                        continue
+                    del remaining[name]
+
+                    if any(
+                        status[dep] in ("failed", "upstream_failed")
+                        for dep in node.deps
+                    ):
+                        status[name] = "upstream_failed"
+                        logger.warning(
+                            f"Node '{name}' not run, an upstream node failed."
+                        )
+                        continue
+
+                    input_fingerprint = self.__hash(
+                        {
+                            "params": node.params,
+                            "deps": {dep: fingerprints[dep] for dep in node.deps},
+                        }
+                    )
+                    previous = state.get(name, {})
+                    if (
+                        not node.always_run
+                        and previous.get("input_fingerprint") == input_fingerprint
+                    ):
+                        status[name] = "skipped"
+                        fingerprints[name] = previous["output_fingerprint"]
+                        outputs[name] = None
+                        logger.info(f"Node '{name}' skipped, inputs did not change.")
+                        continue
+
+                    inputs = {dep: outputs[dep] for dep in node.deps}
+                    future = executor.submit(bind_span(execute), node, inputs)
+                    running[future] = (node, input_fingerprint)
+
+                if not running:
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    node, input_fingerprint = running.pop(future)
+                    try:
+                        outputs[node.name] = future.result()
+                    except Exception as e:
+                        status[node.name] = "failed"
+                        logger.error(f"Node '{node.name}' failed: {e}")
+                        continue
+
+                    fingerprints[node.name] = (
+                        node.output_fingerprint(outputs[node.name])
+                        if node.output_fingerprint is not None
+                        else input_fingerprint
+                    )
+                    status[node.name] = "success"
+                    state[node.name] = {
+                        "input_fingerprint": input_fingerprint,
+                        "output_fingerprint": fingerprints[node.name],
+                    }
+                    self.__save_state(state)
+
+        logger.info(f"DAG finished: {status}")
+        return status
@@ -0,0 +1,169 @@
+import math
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from psycopg2 import sql
+
+from src.utils.logger import logger
+
+# Kraken returns at most 720 bars per OHLC request
+PAGE_SIZE = 720
+
+
+@dataclass
+class FetchPlan:
+    """Missing bars of a pair and interval inside [start, end), as Unix timestamps"""
+
+    pair: str
+    interval: int
+    start: int
+    end: int
+    expected: int
+    present: int
+    ranges: list[tuple[int, int]] = field(default_factory=list)
+
+    @property
+    def fill_ratio(self) -> float:
+        """Share of the expected bars already stored"""
+        return min(self.present / self.expected, 1.0) if self.expected else 1.0
+
+    @property
+    def bars_to_fetch(self) -> int:
+        step = self.interval * 60
+        return sum(math.ceil((end - start) / step) for start, end in self.ranges)
+
+    def summary(self) -> str:
+        return (
+            f"{self.pair} ({self.interval}): {self.present}/{self.expected} bars stored "
+            f"(fill ratio {self.fill_ratio:.1%}), {len(self.ranges)} ranges / "
+            f"~{self.bars_to_fetch} bars to fetch"
+        )
+
+
+def count_bars(start: int, end: int, step: int) -> int:
+    """Number of epoch-aligned bars whose open time is inside [start, end)"""
+    first = math.ceil(start / step) * step
+    return max(0, (end - 1 - first) // step + 1) if end > first else 0
+
+
+def find_gaps(
+    start: int,
+    end: int,
+    step: int,
+    first: int | None,
+    last: int | None,
+    holes: list[tuple[int, int]],
+) -> list[tuple[int, int]]:
+    """Compute the missing ranges from the stored coverage
+
+    Args:
+        start (int): start of the window (Unix timestamp).
+        end (int): end of the window, exclusive.
+        step (int): bar size in seconds.
+        first (int | None): first stored bar, None when nothing is stored.
+        last (int | None): last stored bar.
+        holes (list[tuple[int, int]]): consecutive stored bars more than one step apart.
+
+    Returns:
+        list[tuple[int, int]]: [start, end) ranges to fetch, ordered by time.
+    """
+    aligned_start = math.ceil(start / step) * step
+    if first is None:
+        return [(aligned_start, end)] if end > aligned_start else []
+
+    ranges = []
+    if first > aligned_start:
+        ranges.append((aligned_start, first))
+    ranges.extend((before + step, after) for before, after in holes)
+    # The last stored bar may have been fetched before its candle closed, it is
+    # always fetched again with whatever came after it
+    ranges.append((last, end))
+    return ranges
+
+
+def merge_ranges(
+    ranges: list[tuple[int, int]], step: int, max_bars_between: int = PAGE_SIZE
+) -> list[tuple[int, int]]:
+    """Merge ranges separated by less than a page of bars
+
+    Fetching the stored bars between two close ranges costs less than an extra
+    request (the bars are upserted again unchanged).
+    """
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start - merged[-1][1] < max_bars_between * step:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def plan_fetch(
+    db_ops,
+    pair: str,
+    interval: int,
+    start_date: datetime,
+    end_date: datetime,
+    table: str = "bronze.ohlc",
+) -> FetchPlan:
+    """Plan the Kraken requests of a pair and interval from the bronze coverage
+
+    Only the first and last stored bars and the holes between consecutive bars
+    are read, not the bars themselves.
+
+    Args:
+        db_ops (TimescaleDBOps): database operations.
+        pair (str): pair of the cryptocurrency.
+        interval (int): interval in minutes.
+        start_date (datetime): start of the window.
+        end_date (datetime): end of the window, exclusive.
+        table (str, optional): table holding the bars. Defaults to "bronze.ohlc".
+
+    Returns:
+        FetchPlan: missing ranges and fill ratio. Everything is fetched when the
+            coverage cannot be read.
+    """
+    step = interval * 60
+    start, end = int(start_date.timestamp()), int(end_date.timestamp())
+    query = sql.SQL(
+        """
+        WITH bars AS (
+            SELECT
+                extract(epoch FROM time)::bigint AS time,
+                extract(epoch FROM lead(time) OVER (ORDER BY time))::bigint AS next_time
+            FROM {table}
+            WHERE pair = %(pair)s AND interval = %(interval)s
+              AND time >= to_timestamp(%(start)s) AND time < to_timestamp(%(end)s)
+        )
+        SELECT 'coverage', count(*), min(time), max(time) FROM bars
+        UNION ALL
+        SELECT 'hole', NULL, time, next_time FROM bars WHERE next_time - time > %(step)s
+        """
+    ).format(table=sql.Identifier(*table.split(".")))
+    result = db_ops.read_query(
+        query,
+        {"pair": pair, "interval": interval, "start": start, "end": end, "step": step},
+    )
+
+    expected = count_bars(start, end, step)
+    if not result:
+        logger.warning(
+            f"Coverage of {pair} ({interval}) unknown, the whole window is fetched."
+        )
+        return FetchPlan(
+            pair,
+            interval,
+            start,
+            end,
+            expected,
+            0,
+            find_gaps(start, end, step, None, None, []),
+        )
+
+    rows = result[1]
+    _, present, first, last = next(row for row in rows if row[0] == "coverage")
+    holes = sorted((before, after) for kind, _, before, after in rows if kind == "hole")
+    ranges = merge_ranges(find_gaps(start, end, step, first, last, holes), step)
+    plan = FetchPlan(pair, interval, start, end, expected, present, ranges)
+    logger.info(plan.summary())
+    return plan
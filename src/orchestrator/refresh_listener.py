@@ -0,0 +1,189 @@
+import json
+import select
+import threading
+import time
+from typing import Callable
+
+import psycopg2
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+from src.timescaledb_ops import TimescaleDBOps
+from src.utils.logger import logger
+
+# Channel of the bronze loads, payload {"pair", "interval", "start", "end"} (Unix timestamps)
+BRONZE_CHANNEL = "bronze_ohlc_loaded"
+
+
+class RefreshListener:
+    def __init__(
+        self,
+        refresh: Callable[[dict[str, tuple[int, int]]], None],
+        channel: str = BRONZE_CHANNEL,
+        debounce_seconds: float = 2.0,
+        max_delay_seconds: float = 30.0,
+        reconnect_seconds: float = 5.0,
+        retry_seconds: float = 5.0,
+        max_retry_seconds: float = 300.0,
+        max_retries: int = 5,
+    ):
+        """LISTEN for load notifications and refresh the affected ranges, debounced
+
+        Notifications are merged per pair into one [start, end] range. The refresh
+        runs once no notification arrived for `debounce_seconds`, or at the latest
+        `max_delay_seconds` after the first pending one, so a burst of loads (one
+        per pair and interval) triggers a single refresh. Notifications arriving
+        during a refresh are merged into the next one.
+
+        A failed refresh keeps its ranges pending and is retried after a delay
+        doubling from `retry_seconds` up to `max_retry_seconds`. After
+        `max_retries` retries the ranges are logged and dropped, the scheduled
+        DAG catches them up.
+
+        Args:
+            refresh (Callable[[dict[str, tuple[int, int]]], None]): function receiving the
+                loaded range (Unix timestamps, inclusive) by pair.
+            channel (str, optional): channel to listen on. Defaults to `BRONZE_CHANNEL`.
+            debounce_seconds (float, optional): quiet time before a refresh. Defaults to 2.0.
+            max_delay_seconds (float, optional): longest wait of a notification. Defaults to 30.0.
+            reconnect_seconds (float, optional): wait before reconnecting after a lost
+                connection. Defaults to 5.0.
+            retry_seconds (float, optional): wait before the first retry of a failed refresh.
+                Defaults to 5.0.
+            max_retry_seconds (float, optional): longest wait between two retries. Defaults to 300.0.
+            max_retries (int, optional): retries before the ranges are dropped. Defaults to 5.
+        """
+        self.refresh = refresh
+        self.channel = channel
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.reconnect_seconds = reconnect_seconds
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+        self.max_retries = max_retries
+        self.notifications = 0
+        self.refreshes = 0
+        self.__pending = {}  # pair -> (start, end)
+        self.__first_at = None
+        self.__last_at = None
+        self.__failures = 0  # consecutive failed refreshes
+        self.__retry_at = None
+        self.__stop = threading.Event()
+        self.__thread = None
+
+    def __connect(self):
+        conn = psycopg2.connect(**TimescaleDBOps.get_connection_params())
+        conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+        logger.info(f"Listening on {self.channel}.")
+        return conn
+
+    def __merge(self, pair: str, start: int, end: int):
+        now = time.monotonic()
+        if pair in self.__pending:
+            pending_start, pending_end = self.__pending[pair]
+            start, end = min(start, pending_start), max(end, pending_end)
+        self.__pending[pair] = (start, end)
+        self.__first_at = self.__first_at or now
+        self.__last_at = now
+
+    def add(self, payload: str):
+        """Merge a notification payload into the pending refresh"""
+        try:
+            event = json.loads(payload)
+            pair, start, end = event["pair"], int(event["start"]), int(event["end"])
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring notification {payload!r}: {e}")
+            return
+        self.notifications += 1
+        self.__merge(pair, start, end)
+
+    def seconds_until_due(self) -> float | None:
+        """Seconds before the pending refresh is due, None when nothing is pending"""
+        if not self.__pending:
+            return None
+        due = min(
+            self.__last_at + self.debounce_seconds,
+            self.__first_at + self.max_delay_seconds,
+        )
+        if self.__retry_at is not None:
+            due = max(due, self.__retry_at)
+        return max(due - time.monotonic(), 0.0)
+
+    def flush(self):
+        """Run the pending refresh now"""
+        pending, waited = self.__pending, time.monotonic() - self.__first_at
+        self.__pending, self.__first_at, self.__last_at = {}, None, None
+        logger.info(
+            f"Refreshing {sorted(pending)} ({waited:.1f}s after the first notification) ..."
+        )
+        try:
+            self.refresh(pending)
+            self.refreshes += 1
+            self.__failures, self.__retry_at = 0, None
+        except Exception as e:
+            self.__failures += 1
+            if self.__failures > self.max_retries:
+                logger.error(
+                    f"Refresh of {pending} failed {self.__failures} times, dropping the ranges: {e}"
+                )
+                self.__failures, self.__retry_at = 0, None
+                return
+            # Keep the ranges pending, they are retried with the next refresh
+            delay = min(
+                self.retry_seconds * 2 ** (self.__failures - 1), self.max_retry_seconds
+            )
+            logger.error(
+                f"Refresh of {sorted(pending)} failed, retrying in {delay:.0f}s: {e}"
+            )
+            self.__retry_at = time.monotonic() + delay
+            for pair, (start, end) in pending.items():
+                self.__merge(pair, start, end)
+
+    def __listen(self):
+        conn = None
+        while not self.__stop.is_set():
+            try:
+                if conn is None:
+                    conn = self.__connect()
+                due = self.seconds_until_due()
+                # Wake up at least every second so `stop` is honoured
+                if select.select(
+                    [conn], [], [], 1.0 if due is None else min(due, 1.0)
+                ) != ([], [], []):
+                    conn.poll()
+                    while conn.notifies:
+                        self.add(conn.notifies.pop(0).payload)
+                if self.seconds_until_due() == 0.0:
+                    self.flush()
+            except psycopg2.OperationalError as e:
+                # Loads notified while disconnected are only refreshed by the next
+                # notification of the same pair or by the scheduled DAG
+                logger.warning(f"Listener connection lost ({e}), reconnecting ...")
+                conn = None
+                self.__stop.wait(self.reconnect_seconds)
+        if self.__pending:
+            self.flush()
+        if conn is not None:
+            conn.close()
+
+    def start(self) -> "RefreshListener":
+        """Listen in a background thread"""
+        self.__thread = threading.Thread(
+            target=self.__listen, name="refresh-listener", daemon=True
+        )
+        self.__thread.start()
+        return self
+
+    def run_forever(self):
+        """Listen in the calling thread, until `stop` is called"""
+        self.__listen()
+
+    def stop(self):
+        """Stop listening, the pending refresh runs before the thread exits"""
+        self.__stop.set()
+        if (
+            self.__thread is not None
+            and self.__thread is not threading.current_thread()
+        ):
+            self.__thread.join()
@@ -0,0 +1,176 @@
+import json
+import math
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable
+
+from src.utils.latency_tracker import LatencyTracker
+from src.utils.logger import logger
+
+
+def next_close(interval: int, now: float | None = None) -> float:
+    """Get the next candle close of an interval
+
+    Kraken candles are aligned to the Unix epoch, so a candle of `interval`
+    minutes closes at every multiple of `interval * 60` seconds.
+
+    Args:
+        interval (int): interval in minutes.
+        now (float | None, optional): Unix timestamp, defaults to the current time.
+
+    Returns:
+        float: Unix timestamp of the next close (strictly after `now`).
+    """
+    now = time.time() if now is None else now
+    seconds = interval * 60
+    return (math.floor(now / seconds) + 1) * seconds
+
+
+class CandleCloseScheduler:
+    def __init__(
+        self,
+        intervals: list[int],
+        job: Callable[[list[int], datetime], None],
+        settle_seconds: float = 30.0,
+        latency_log_path: str | None = None,
+    ):
+        """Run a job right after the candles of the given intervals close.
+
+        Intervals closing at the same time (e.g. 240 and 1440 at midnight) trigger
+        one run. When a close happens while the job is still running, the trigger
+        is coalesced into a single pending run instead of queueing one run per close.
+        The close -> job end latency of every run is recorded.
+
+        Args:
+            intervals (list[int]): intervals in minutes.
+            job (Callable[[list[int], datetime], None]): function receiving the closed
+                intervals and the (latest) close time in UTC.
+            settle_seconds (float, optional): seconds to wait after a close so Kraken
+                publishes the closed candle. Defaults to 30.0.
+            latency_log_path (str | None, optional): JSON lines file receiving one record
+                per run. Defaults to None.
+        """
+        if not intervals:
+            raise ValueError("At least one interval is required")
+        self.intervals = sorted(set(intervals))
+        self.job = job
+        self.settle_seconds = settle_seconds
+        self.latency_log_path = latency_log_path
+        self.latency_tracker = LatencyTracker()
+        self.runs = 0
+        self.coalesced_triggers = 0
+        self.__pending = None  # (set of intervals, close timestamp)
+        self.__condition = threading.Condition()
+        self.__stop = threading.Event()
+        self.__worker = None
+
+    def next_trigger(self, now: float | None = None) -> tuple[float, list[int]]:
+        """Get the next close and the intervals closing at that time
+
+        Args:
+            now (float | None, optional): Unix timestamp, defaults to the current time.
+
+        Returns:
+            tuple[float, list[int]]: close timestamp and closing intervals.
+        """
+        closes = {interval: next_close(interval, now) for interval in self.intervals}
+        close = min(closes.values())
+        return close, [interval for interval, ts in closes.items() if ts == close]
+
+    def trigger(self, intervals: list[int], close: float):
+        """Request a run, merged with the pending run if there is one"""
+        with self.__condition:
+            if self.__pending is not None:
+                self.coalesced_triggers += 1
+                pending_intervals, pending_close = self.__pending
+                self.__pending = (
+                    pending_intervals | set(intervals),
+                    max(pending_close, close),
+                )
+                logger.warning(
+                    f"Previous run still busy, coalescing close {self.__format(close)} into the pending run."
+                )
+            else:
+                self.__pending = (set(intervals), close)
+            self.__condition.notify()
+
+    def __work(self):
+        while True:
+            with self.__condition:
+                while self.__pending is None and not self.__stop.is_set():
+                    self.__condition.wait()
+                if self.__pending is None:
+                    return
+                intervals, close = self.__pending
+                self.__pending = None
+            self.__run_job(sorted(intervals), close)
+
+    def __run_job(self, intervals: list[int], close: float):
+        close_time = datetime.fromtimestamp(close, tz=timezone.utc)
+        logger.info(
+            f"Running job for intervals {intervals} closed at {self.__format(close)} ..."
+        )
+        started = time.time()
+        error = None
+        try:
+            self.job(intervals, close_time)
+        except Exception as e:
+            error = str(e)
+            logger.error(f"Scheduled job failed: {e}")
+        finished = time.time()
+
+        self.runs += 1
+        latency = finished - close
+        if error is None:
+            self.latency_tracker.record(latency)
+        logger.info(
+            f"Close -> delivery latency {latency:.1f}s (start delay {started - close:.1f}s), "
+            f"summary: {self.latency_tracker.summary()}"
+        )
+        if self.latency_log_path:
+            record = {
+                "close": close_time.isoformat(),
+                "intervals": intervals,
+                "start_delay_seconds": started - close,
+                "latency_seconds": latency,
+                "error": error,
+            }
+            with open(self.latency_log_path, "a") as file:
+                file.write(json.dumps(record) + "\n")
+
+    @staticmethod
+    def __format(timestamp: float) -> str:
+        return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime(
+            "%Y-%m-%d %H:%M"
+        )
+
+    def run_forever(self):
+        """Wait for each close and trigger the job, until `stop` is called"""
+        self.__worker = threading.Thread(
+            target=self.__work, name="scheduler-worker", daemon=True
+        )
+        self.__worker.start()
+        try:
+            while not self.__stop.is_set():
+                close, intervals = self.next_trigger()
+                logger.info(
+                    f"Next close {self.__format(close)} for intervals {intervals}."
+                )
+                # Wake up `settle_seconds` after the close, the event allows a quick stop
+                if self.__stop.wait(max(close + self.settle_seconds - time.time(), 0)):
+                    break
+                self.trigger(intervals, close)
+        finally:
+            self.stop()
+
+    def stop(self):
+        """Stop scheduling, the running job is allowed to finish"""
+        with self.__condition:
+            self.__stop.set()
+            self.__condition.notify()
+        if (
+            self.__worker is not None
+            and self.__worker is not threading.current_thread()
+        ):
+            self.__worker.join()
@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+
+from src.orchestrator.dag import DAG, Node
+
+
+def make_chain(dag: DAG, names: list[str], log: list, lock: threading.Lock):
+    """Add a -> b -> c ... nodes recording when they start and end"""
+
+    def run(inputs, name):
+        with lock:
+            log.append(("start", name))
+        time.sleep(0.05)
+        with lock:
+            log.append(("end", name))
+        return name
+
+    previous = None
+    for name in names:
+        dag.add_node(
+            Node(
+                name,
+                lambda inputs, name=name: run(inputs, name),
+                deps=[previous] if previous else [],
+            )
+        )
+        previous = name
+
+
+def test_dependent_chain_runs_in_order_with_several_workers(tmp_path):
+    dag = DAG(state_path=str(tmp_path / "state.json"), max_workers=4)
+    log, lock = [], threading.Lock()
+    make_chain(dag, ["a", "b", "c"], log, lock)
+    # Independent node, so a worker is free while "a" runs
+    dag.add_node(Node("x", lambda inputs: time.sleep(0.05)))
+
+    status = dag.run()
+
+    assert status == {"a": "success", "b": "success", "c": "success", "x": "success"}
+    chain = [event for event in log if event[1] in ("a", "b", "c")]
+    assert chain == [
+        ("start", "a"),
+        ("end", "a"),
+        ("start", "b"),
+        ("end", "b"),
+        ("start", "c"),
+        ("end", "c"),
+    ]
+
+
+def test_dependency_output_is_handed_to_the_dependent(tmp_path):
+    received = {}
+    dag = DAG(state_path=str(tmp_path / "state.json"), max_workers=2)
+    dag.add_node(Node("a", lambda inputs: 41))
+    dag.add_node(Node("b", lambda inputs: received.update(inputs), deps=["a"]))
+
+    dag.run()
+
+    assert received == {"a": 41}
+
+
+def test_failure_propagates_and_is_not_recorded(tmp_path):
+    state_path = str(tmp_path / "state.json")
+
+    def fail(inputs):
+        raise RuntimeError("boom")
+
+    dag = DAG(state_path=state_path, max_workers=2)
+    dag.add_node(Node("a", fail))
+    dag.add_node(Node("b", lambda inputs: None, deps=["a"]))
+    assert dag.run() == {"a": "failed", "b": "upstream_failed"}
+
+    # The failed node runs again next time instead of being skipped
+    calls = []
+    dag = DAG(state_path=state_path, max_workers=2)
+    dag.add_node(Node("a", lambda inputs: calls.append("a")))
+    dag.add_node(Node("b", lambda inputs: calls.append("b"), deps=["a"]))
+    assert dag.run() == {"a": "success", "b": "success"}
+    assert calls == ["a", "b"]
+
+
+def test_unchanged_inputs_are_skipped(tmp_path):
+    state_path = str(tmp_path / "state.json")
+    calls = []
+    for _ in range(2):
+        dag = DAG(state_path=state_path, max_workers=2)
+        dag.add_node(Node("a", lambda inputs: calls.append("a"), params={"day": 1}))
+        status = dag.run()
+    assert calls == ["a"]
+    assert status == {"a": "skipped"}
+
+
+def test_cycle_is_rejected(tmp_path):
+    dag = DAG(state_path=str(tmp_path / "state.json"))
+    dag.add_node(Node("a", lambda inputs: None, deps=["b"]))
+    dag.add_node(Node("b", lambda inputs: None, deps=["a"]))
+    with pytest.raises(ValueError):
+        dag.run()
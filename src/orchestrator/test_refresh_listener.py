@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+pytest.importorskip("psycopg2")
+
+from src.orchestrator.refresh_listener import RefreshListener  # noqa: E402
+
+
+def payload(pair: str, start: int, end: int) -> str:
+    return json.dumps({"pair": pair, "interval": 240, "start": start, "end": end})
+
+
+def test_notifications_are_merged_per_pair():
+    refreshed = []
+    listener = RefreshListener(refreshed.append)
+    listener.add(payload("XXBTZUSD", 100, 200))
+    listener.add(payload("XXBTZUSD", 50, 150))
+    listener.add(payload("XETHZUSD", 300, 400))
+    listener.add("not json")
+
+    listener.flush()
+
+    assert refreshed == [{"XXBTZUSD": (50, 200), "XETHZUSD": (300, 400)}]
+    assert listener.notifications == 3
+    assert listener.seconds_until_due() is None
+
+
+def test_failed_refresh_keeps_the_ranges_pending():
+    calls = []
+
+    def refresh(ranges):
+        calls.append(dict(ranges))
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+
+    listener = RefreshListener(refresh, debounce_seconds=0.0, retry_seconds=0.0)
+    listener.add(payload("XXBTZUSD", 100, 200))
+    listener.flush()
+    assert listener.refreshes == 0
+
+    # Merged with the notification arriving after the failure
+    listener.add(payload("XXBTZUSD", 150, 300))
+    assert listener.seconds_until_due() == 0.0
+    listener.flush()
+
+    assert calls == [{"XXBTZUSD": (100, 200)}, {"XXBTZUSD": (100, 300)}]
+    assert listener.refreshes == 1
+    assert listener.seconds_until_due() is None
+
+
+def test_persistent_failure_backs_off_then_drops_the_ranges():
+    calls = []
+
+    def refresh(ranges):
+        calls.append(dict(ranges))
+        raise RuntimeError("relation does not exist")
+
+    listener = RefreshListener(
+        refresh,
+        debounce_seconds=0.0,
+        retry_seconds=10.0,
+        max_retry_seconds=15.0,
+        max_retries=2,
+    )
+    listener.add(payload("XXBTZUSD", 100, 200))
+
+    listener.flush()
+    assert 9.0 < listener.seconds_until_due() <= 10.0
+    listener.flush()
+    # Doubled, capped at max_retry_seconds
+    assert 14.0 < listener.seconds_until_due() <= 15.0
+    listener.flush()
+
+    assert len(calls) == 3
+    assert listener.seconds_until_due() is None
+
+    # The next notification is refreshed without waiting for the old backoff
+    listener.add(payload("XXBTZUSD", 300, 400))
+    assert listener.seconds_until_due() == 0.0
@@ -0,0 +1,246 @@
+from dataclasses import dataclass, field
+
+from psycopg2 import sql
+
+from src.timescaledb_ops import TimescaleDBOps
+from src.utils.logger import logger
+
+TIMEFRAMES = {"daily": "1 day", "weekly": "1 week", "monthly": "1 month"}
+
+OHLC_COLUMNS = {
+    "open": "DOUBLE PRECISION",
+    "high": "DOUBLE PRECISION",
+    "low": "DOUBLE PRECISION",
+    "close": "DOUBLE PRECISION",
+    "volume": "DOUBLE PRECISION",
+    "count": "INTEGER",
+}
+
+TA_COLUMNS = {
+    "ema_13": "DOUBLE PRECISION",
+    "ema_21": "DOUBLE PRECISION",
+    "stochastic_percentage_k": "DOUBLE PRECISION",
+    "stochastic_percentage_d": "DOUBLE PRECISION",
+    "macd": "DOUBLE PRECISION",
+    "macd_signal_line": "DOUBLE PRECISION",
+    "macd_bar": "DOUBLE PRECISION",
+}
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """Secondary index, columns with an optional order, e.g. ("pair", "date DESC")"""
+
+    columns: tuple[str, ...]
+    unique: bool = False
+
+
+@dataclass(frozen=True)
+class TableSpec:
+    """Table declared by the schema, a hypertable when `time_column` is set"""
+
+    name: str
+    columns: dict
+    primary_key: tuple[str, ...]
+    time_column: str | None = None
+    chunk_time_interval: str | None = None
+    indexes: tuple[IndexSpec, ...] = ()
+    compress_segmentby: str | None = None
+    compress_orderby: str | None = None
+    compress_after: str | None = None
+
+    @property
+    def schema(self) -> str:
+        return self.name.split(".")[0]
+
+
+@dataclass(frozen=True)
+class HotQuery:
+    """Query of a hot path whose plan must be served by an index"""
+
+    name: str
+    query: sql.Composable
+
+
+TABLES = (
+    TableSpec(
+        name="bronze.ohlc",
+        columns={
+            "time": "TIMESTAMPTZ",
+            "interval": "INTEGER",
+            "pair": "TEXT",
+            **OHLC_COLUMNS,
+        },
+        primary_key=("time", "pair"),
+        time_column="time",
+        chunk_time_interval="1 day",
+        # Coverage planning and incremental reads filter one pair and interval
+        indexes=(IndexSpec(("pair", "interval", "time DESC")),),
+        compress_segmentby="pair",
+        compress_orderby="time DESC",
+        compress_after="30 days",
+    ),
+    *(
+        TableSpec(
+            name=f"silver.ohlc_{timeframe}",
+            columns={"date": "DATE", "pair": "TEXT", **OHLC_COLUMNS},
+            primary_key=("date", "pair"),
+            time_column="date",
+            chunk_time_interval=interval,
+            indexes=(IndexSpec(("pair", "date DESC")),),
+        )
+        for timeframe, interval in TIMEFRAMES.items()
+    ),
+    *(
+        TableSpec(
+            name=f"gold.ohlc_ta_{timeframe}",
+            columns={"date": "DATE", "pair": "TEXT", **OHLC_COLUMNS, **TA_COLUMNS},
+            primary_key=("date", "pair"),
+            time_column="date",
+            chunk_time_interval=interval,
+            # The analysis reads one pair from a start date
+            indexes=(IndexSpec(("pair", "date DESC")),),
+        )
+        for timeframe, interval in TIMEFRAMES.items()
+    ),
+)
+
+
+def hot_queries(
+    pair: str = "XXBTZUSD", start_date: str = "2025-01-01"
+) -> list[HotQuery]:
+    """Queries of the hot paths, built like the application builds them
+
+    Args:
+        pair (str, optional): pair used in the plans. Defaults to "XXBTZUSD".
+        start_date (str, optional): start of the ranges used in the plans. Defaults to "2025-01-01".
+
+    Returns:
+        list[HotQuery]: one query per hot path and table.
+    """
+    queries = [
+        HotQuery(
+            "bronze.ohlc by pair and time",
+            TimescaleDBOps.range_query(
+                "bronze.ohlc", "time", pair=pair, start_date=start_date
+            ),
+        )
+    ]
+    for timeframe in TIMEFRAMES:
+        # Gold pipeline reading silver
+        queries.append(
+            HotQuery(
+                f"silver.ohlc_{timeframe} by date",
+                TimescaleDBOps.range_query(
+                    f"silver.ohlc_{timeframe}", "date", start_date=start_date
+                ),
+            )
+        )
+        # Analysis reading gold
+        queries.append(
+            HotQuery(
+                f"gold.ohlc_ta_{timeframe} by pair and date",
+                TimescaleDBOps.range_query(
+                    f"gold.ohlc_ta_{timeframe}",
+                    "date",
+                    pair=pair,
+                    start_date=start_date,
+                ),
+            )
+        )
+    return queries
+
+
+def find_seq_scans(plan: dict, parent: dict | None = None) -> list[str]:
+    """Find the relations read by a sequential scan in a JSON plan
+
+    Sequential scans of compressed chunks under a DecompressChunk node are
+    expected (the batches of a segment are read whole) and not reported.
+
+    Returns:
+        list[str]: scanned relations.
+    """
+    scans = []
+    if plan.get("Node Type") == "Seq Scan" and not (
+        parent is not None and parent.get("Custom Plan Provider") == "DecompressChunk"
+    ):
+        scans.append(f"{plan.get('Schema', '?')}.{plan.get('Relation Name', '?')}")
+    for child in plan.get("Plans", []):
+        scans.extend(find_seq_scans(child, parent=plan))
+    return scans
+
+
+class SchemaManager:
+    def __init__(self, db_ops: TimescaleDBOps, tables: tuple[TableSpec, ...] = TABLES):
+        """Apply the declared schemas, tables, hypertables and indexes
+
+        Every statement is idempotent, so applying the schema again only
+        creates what is missing and never drops data.
+
+        Args:
+            db_ops (TimescaleDBOps): database operations.
+            tables (tuple[TableSpec, ...], optional): declared tables. Defaults to `TABLES`.
+        """
+        self.db_ops = db_ops
+        self.tables = tables
+
+    def apply(self):
+        for schema in dict.fromkeys(table.schema for table in self.tables):
+            self.db_ops.create_schema(schema)
+
+        for table in self.tables:
+            self.db_ops.create_table(
+                table.name, table.columns, primary_key=table.primary_key
+            )
+            if table.time_column:
+                self.db_ops.create_hypertable(
+                    table.name,
+                    table.time_column,
+                    chunk_time_interval=table.chunk_time_interval,
+                )
+            for index in table.indexes:
+                self.db_ops.create_index(
+                    table.name, list(index.columns), unique=index.unique
+                )
+
+            if table.compress_segmentby:
+                # Changing the settings of a hypertable with compressed chunks fails
+                stats = self.db_ops.get_compression_stats(table.name)
+                if not (stats and stats["compression_enabled"]):
+                    self.db_ops.enable_compression(
+                        table.name,
+                        segmentby=table.compress_segmentby,
+                        orderby=table.compress_orderby,
+                    )
+                if table.compress_after:
+                    self.db_ops.add_compression_policy(table.name, table.compress_after)
+            logger.info(f"Schema of {table.name} applied.")
+
+    def check_query_plans(
+        self, queries: list[HotQuery] | None = None
+    ) -> dict[str, list[str]]:
+        """EXPLAIN the hot queries and report those falling back to sequential scans
+
+        Args:
+            queries (list[HotQuery] | None, optional): queries to check. Defaults to `hot_queries()`.
+
+        Returns:
+            dict[str, list[str]]: sequentially scanned relations by failing query name,
+                empty when every plan uses an index. A query that cannot be explained
+                is reported with the relation "<no plan>".
+        """
+        failures = {}
+        for hot_query in queries if queries is not None else hot_queries():
+            plan = self.db_ops.explain_query(hot_query.query)
+            if plan is None:
+                failures[hot_query.name] = ["<no plan>"]
+                continue
+            scans = find_seq_scans(plan)
+            if scans:
+                failures[hot_query.name] = scans
+                logger.warning(
+                    f"{hot_query.name}: sequential scan of {', '.join(scans)}"
+                )
+            else:
+                logger.info(f"{hot_query.name}: served by an index.")
+        return failures
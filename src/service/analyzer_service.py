@@ -0,0 +1,271 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+from psycopg2 import sql
+from psycopg2.pool import ThreadedConnectionPool
+
+from src.llm_analyzer.prompt_builder import NUMERIC_CONTEXT_COLUMNS
+from src.ta_analysis import TechnicalAnalysisRunner
+from src.timescaledb_ops import TimescaleDBOps
+from src.utils.latency_tracker import LatencyTracker
+from src.utils.logger import logger
+
+TIMEFRAMES = ("daily", "weekly", "monthly")
+
+
+class GoldDataUnavailable(RuntimeError):
+    """The gold table could not be read"""
+
+
+class GoldDataCache:
+    def __init__(
+        self, connection_pool: ThreadedConnectionPool, min_check_interval: float = 30.0
+    ):
+        """Keep the gold rows of each pair in memory, reloaded only when they changed
+
+        The version of a pair is its row count and its latest row, so a new
+        bucket as well as an in-place update of the open bucket (new close,
+        volume, indicators) triggers a reload. The check uses the
+        `(pair, date DESC)` index and runs at most once every
+        `min_check_interval` seconds per pair and timeframe. A connection is
+        taken from the pool only for the check and the reload, so request
+        threads never share one.
+
+        Args:
+            connection_pool (ThreadedConnectionPool): pool the connections are taken from.
+            min_check_interval (float, optional): seconds between change checks. Defaults to 30.0.
+        """
+        self.connection_pool = connection_pool
+        self.min_check_interval = min_check_interval
+        self.__tables = {}  # (pair, timeframe) -> (version, checked_at, DataFrame)
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def __get_version(db_ops: TimescaleDBOps, table: str, pair: str) -> tuple:
+        result = db_ops.read_query(
+            sql.SQL(
+                """
+                SELECT (SELECT count(*) FROM {table} WHERE pair = %(pair)s), latest.*
+                FROM (SELECT 1) AS one
+                LEFT JOIN LATERAL (
+                    SELECT * FROM {table} WHERE pair = %(pair)s ORDER BY date DESC LIMIT 1
+                ) AS latest ON true
+                """
+            ).format(table=sql.Identifier(*table.split("."))),
+            {"pair": pair},
+        )
+        if result is None:
+            raise GoldDataUnavailable(f"Could not check the version of {table}")
+        columns, rows = result
+        return tuple(rows[0])
+
+    def get(self, pair: str, timeframe: str, start_date: str) -> pd.DataFrame:
+        """Get gold data of a pair from memory
+
+        Args:
+            pair (str): pair that will be analyzed.
+            timeframe (str): timeframe of the chart.
+            start_date (str): first date of the chart in YYYY-MM-DD format.
+
+        Returns:
+            pd.DataFrame: gold data sorted by date.
+        """
+        table = f"gold.ohlc_ta_{timeframe}"
+        with self.__lock:
+            version, checked_at, df = self.__tables.get(
+                (pair, timeframe), (None, 0.0, None)
+            )
+            now = time.monotonic()
+            if df is None or now - checked_at >= self.min_check_interval:
+                db_ops = TimescaleDBOps(self.connection_pool)
+                try:
+                    latest_version = self.__get_version(db_ops, table, pair)
+                    if df is None or latest_version != version:
+                        logger.info(f"Reloading {table} of {pair} into memory ...")
+                        result = db_ops.read_range(table, "date", pair=pair)
+                        if result is None:
+                            raise GoldDataUnavailable(
+                                f"Could not read {table} of {pair}"
+                            )
+                        columns, data = result
+                        df = pd.DataFrame(data=data, columns=columns)
+                        df["date"] = pd.to_datetime(df["date"])
+                finally:
+                    db_ops.close_connection()
+                self.__tables[(pair, timeframe)] = (latest_version, now, df)
+
+        df = df[df["date"] >= start_date]
+        return df.reset_index(drop=True)
+
+
+class AnalyzerService:
+    def __init__(
+        self,
+        runner: TechnicalAnalysisRunner,
+        connection_pool: ThreadedConnectionPool | None = None,
+        warm_up: bool = True,
+    ):
+        """Long-running analyzer keeping the DB connections, chart renderer,
+        gold data and LLM client warm between requests.
+
+        Args:
+            runner (TechnicalAnalysisRunner): analysis runner, reused for every request.
+            connection_pool (ThreadedConnectionPool | None, optional): pool of the request
+                threads. Defaults to a new pool.
+            warm_up (bool, optional): start the chart renderer before serving. Defaults to True.
+        """
+        self.runner = runner
+        self.connection_pool = connection_pool or TimescaleDBOps.create_pool(maxconn=4)
+        self.gold_cache = GoldDataCache(self.connection_pool)
+        self.latency_tracker = LatencyTracker()
+        if warm_up:
+            self.warm_up()
+
+    def warm_up(self):
+        """Start the Kaleido browser once so the first request does not pay for it"""
+        try:
+            import kaleido
+
+            # Kaleido >= 1.0 can keep a browser running between renders
+            if hasattr(kaleido, "start_sync_server"):
+                kaleido.start_sync_server()
+            columns = ["volume"] + [column for column, _, _ in NUMERIC_CONTEXT_COLUMNS]
+            df = pd.DataFrame({column: [1.0, 1.0] for column in columns})
+            df["date"] = pd.date_range("2024-01-01", periods=2)
+            self.runner.render_chart(df, "warm-up")
+            logger.info("Chart renderer warmed up.")
+        except Exception as e:
+            logger.warning(f"Chart renderer warm-up failed: {e}")
+
+    def analyze(
+        self, pair: str, timeframe: str, start_date: str, notify: bool = True
+    ) -> dict:
+        """Analyze a pair using the warm components
+
+        Args:
+            pair (str): pair that will be analyzed.
+            timeframe (str): timeframe of the chart.
+            start_date (str): first date of the chart in YYYY-MM-DD format.
+            notify (bool, optional): send the summary to Discord. Defaults to True.
+
+        Returns:
+            dict: analysis and timings.
+        """
+        started = time.perf_counter()
+        df = self.gold_cache.get(pair, timeframe, start_date)
+        if df.empty:
+            raise LookupError(
+                f"No gold data for {pair} ({timeframe}) since {start_date}"
+            )
+        loaded = time.perf_counter()
+
+        encoded_image = self.runner.render_chart(df, pair)
+        rendered = time.perf_counter()
+
+        response = self.runner.analyze(df, encoded_image, pair, timeframe)
+        analyzed = time.perf_counter()
+
+        if notify:
+            self.runner.notify(
+                self.runner.build_summary(response), encoded_image, pair, timeframe
+            )
+
+        self.latency_tracker.record(analyzed - started)
+        return {
+            "pair": pair,
+            "timeframe": timeframe,
+            "analysis": json.loads(response.model_dump_json()),
+            "timings": {
+                "load_seconds": loaded - started,
+                "render_seconds": rendered - loaded,
+                "llm_seconds": analyzed - rendered,
+            },
+        }
+
+    def close(self):
+        """Deliver queued summaries and close the connections"""
+        self.runner.close()
+        self.connection_pool.closeall()
+
+    def health(self) -> dict:
+        return {
+            "status": "ok",
+            "latency": self.latency_tracker.summary(),
+            "llm_cache": (
+                self.runner.llm.cache.stats() if self.runner.llm.cache else None
+            ),
+        }
+
+    def create_server(
+        self, host: str = "127.0.0.1", port: int = 8080
+    ) -> ThreadingHTTPServer:
+        """Create the HTTP server exposing `/analyze` and `/health`
+
+        Args:
+            host (str, optional): host to bind. Defaults to "127.0.0.1".
+            port (int, optional): port to bind. Defaults to 8080.
+
+        Returns:
+            ThreadingHTTPServer: HTTP server, call `serve_forever` to start it.
+        """
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def __send_json(self, status: int, body: dict):
+                payload = json.dumps(body, default=str).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {key: values[0] for key, values in parse_qs(url.query).items()}
+                if url.path == "/health":
+                    self.__send_json(200, service.health())
+                    return
+                if url.path != "/analyze":
+                    self.__send_json(404, {"error": "Not found"})
+                    return
+
+                missing = [
+                    key for key in ("pair", "timeframe", "start") if key not in params
+                ]
+                if missing:
+                    self.__send_json(400, {"error": f"Missing parameters: {missing}"})
+                    return
+                if params["timeframe"] not in TIMEFRAMES:
+                    self.__send_json(
+                        400, {"error": f"Timeframe must be one of {TIMEFRAMES}"}
+                    )
+                    return
+
+                try:
+                    body = service.analyze(
+                        pair=params["pair"],
+                        timeframe=params["timeframe"],
+                        start_date=params["start"],
+                        notify=params.get("notify", "true").lower() != "false",
+                    )
+                except LookupError as e:
+                    self.__send_json(404, {"error": str(e)})
+                    return
+                except GoldDataUnavailable as e:
+                    logger.error(f"Analysis request failed: {e}")
+                    self.__send_json(503, {"error": str(e)})
+                    return
+                except Exception as e:
+                    logger.error(f"Analysis request failed: {e}")
+                    self.__send_json(500, {"error": str(e)})
+                    return
+                self.__send_json(200, body)
+
+            def log_message(self, format, *args):
+                logger.info(f"{self.address_string()} - {format % args}")
+
+        return ThreadingHTTPServer((host, port), Handler)
@@ -0,0 +1,215 @@
+import pandas as pd
+from pydantic import BaseModel
+
+from src.charts.image_encoder import EncodedImage, ImageEncoder
+from src.charts.ta_chart import create_ta_chart
+from src.config import get_settings
+from src.llm_analyzer.analysis_cache import AnalysisCache
+from src.llm_analyzer.anthropic_llm_strategy import AnthropicLLMStrategy
+from src.llm_analyzer.hedged_llm_strategy import HedgedLLMStrategy
+from src.llm_analyzer.llm_analyzer import LLMAnalyzer
+from src.llm_analyzer.prompt_builder import (
+    build_numeric_context,
+    build_prompt_template,
+)
+from src.notifiers.discord_notifier import DiscordMessage, DiscordNotifier
+from src.timescaledb_ops import TimescaleDBOps
+from src.utils.common_functions import get_base64_encoded_bytes
+from src.utils.logger import logger
+
+
+class TechnicalAnalysisRunner:
+    def __init__(
+        self,
+        mode: str = "image",
+        max_rows: int = 60,
+        token_budget: int = 2000,
+        max_image_bytes: int = 500_000,
+        max_image_tokens: int = 1600,
+        db_ops: TimescaleDBOps | None = None,
+        llm: LLMAnalyzer | None = None,
+        notifier: DiscordNotifier | None = None,
+    ):
+        """Load gold data, render the chart, ask the LLM and deliver the summary
+
+        Args:
+            mode (str, optional): context given to the LLM: "image", "numeric" or "hybrid". Defaults to "image".
+            max_rows (int, optional): maximum number of rows inside the numeric context. Defaults to 60.
+            token_budget (int, optional): target input-token budget of the numeric context. Defaults to 2000.
+            max_image_bytes (int, optional): byte budget of the chart image. Defaults to 500_000.
+            max_image_tokens (int, optional): token budget of the chart image. Defaults to 1600.
+            db_ops (TimescaleDBOps | None, optional): database operations. Defaults to a new connection.
+            llm (LLMAnalyzer | None, optional): LLM analyzer. Defaults to the hedged Anthropic analyzer with cache.
+            notifier (DiscordNotifier | None, optional): Discord notifier. Defaults to the configured webhook.
+        """
+        settings = get_settings()
+        self.mode = mode
+        self.max_rows = max_rows
+        self.token_budget = token_budget
+        self.image_encoder = ImageEncoder(
+            max_bytes=max_image_bytes, max_tokens=max_image_tokens
+        )
+        self.db_ops = db_ops or TimescaleDBOps()
+        self.llm = llm or LLMAnalyzer(
+            HedgedLLMStrategy(
+                AnthropicLLMStrategy(
+                    model="claude-sonnet-4-20250514",
+                    max_tokens=20000,
+                    temperature=0,
+                    timeout=None,
+                    max_retries=2,
+                ),
+                timeout=300,
+            ),
+            cache=AnalysisCache(
+                path=settings.llm_cache_path,
+                ttl_seconds=settings.llm_cache_ttl_seconds,
+                max_entries=settings.llm_cache_max_entries,
+            ),
+        )
+        self.notifier = notifier or DiscordNotifier(settings.discord_webhook_url)
+
+    def load_gold_data(
+        self, pair: str, timeframe: str, start_date: str
+    ) -> pd.DataFrame:
+        """Load and filter data from the gold layer
+
+        Args:
+            pair (str): pair that will be analyzed.
+            timeframe (str): timeframe of the chart.
+            start_date (str): first date of the chart in YYYY-MM-DD format.
+
+        Returns:
+            pd.DataFrame: gold data sorted by date.
+        """
+        columns, data = self.db_ops.read_range(
+            f"gold.ohlc_ta_{timeframe}", "date", pair=pair, start_date=start_date
+        )
+        df = pd.DataFrame(data=data, columns=columns)
+        df["date"] = pd.to_datetime(df["date"])
+        return df.reset_index(drop=True)
+
+    def render_chart(self, df: pd.DataFrame, pair: str) -> EncodedImage:
+        """Create the chart and shrink it to the byte/token budget
+
+        Args:
+            df (pd.DataFrame): gold data sorted by date.
+            pair (str): pair shown in the chart.
+
+        Returns:
+            EncodedImage: encoded chart.
+        """
+        fig = create_ta_chart(df, pair)
+
+        # The numeric context carries the exact values so the chart does not need
+        # to be high-resolution when it is sent
+        image_bytes = fig.to_image(
+            format="png",
+            width=1200,
+            height=800,
+            scale=2 if self.mode == "image" else 1,
+        )
+        return self.image_encoder.encode(image_bytes)
+
+    def analyze(
+        self,
+        df: pd.DataFrame,
+        encoded_image: EncodedImage,
+        pair: str,
+        timeframe: str,
+    ) -> dict | BaseModel:
+        """Give the chart and/or the numeric context to the LLM
+
+        Args:
+            df (pd.DataFrame): gold data sorted by date.
+            encoded_image (EncodedImage): encoded chart.
+            pair (str): pair that will be analyzed.
+            timeframe (str): timeframe of the chart.
+
+        Returns:
+            dict | BaseModel: output from LLM.
+        """
+        chat_prompt_template = build_prompt_template(
+            include_image=self.mode != "numeric",
+            include_numeric_context=self.mode != "image",
+            mime_type=encoded_image.mime_type,
+        )
+        numeric_context = (
+            build_numeric_context(
+                df, max_rows=self.max_rows, token_budget=self.token_budget
+            )
+            if self.mode != "image"
+            else None
+        )
+
+        response = self.llm.analyze(
+            prompt_template=chat_prompt_template,
+            image_base64=(
+                get_base64_encoded_bytes(encoded_image.data)
+                if self.mode != "numeric"
+                else None
+            ),
+            pair=pair,
+            timeframe=timeframe,
+            numeric_context=numeric_context,
+            # The mode and the budget change what the LLM sees for the same rows
+            fingerprint=AnalysisCache.fingerprint(
+                f"{self.mode}|{self.max_rows}|{self.token_budget}|{df.to_csv(index=False)}"
+            ),
+        )
+        if self.llm.cache is not None:
+            logger.info(f"LLM analysis cache stats: {self.llm.cache.stats()}")
+        return response
+
+    @staticmethod
+    def build_summary(response: dict | BaseModel) -> str:
+        summary = ""
+        summary += f"Action: **{response.action.value}**\n"
+        for num, (indicator, explanation) in enumerate(response.reasons.items()):
+            summary += f"**{indicator}**\n{explanation}.\n\n"
+        summary += "*^Disclaimer Alert.*"
+        return summary
+
+    def notify(
+        self, summary: str, encoded_image: EncodedImage, pair: str, timeframe: str
+    ):
+        """Queue the summary for the Discord channel"""
+        self.notifier.send(
+            DiscordMessage(
+                embed={
+                    "title": f"**{pair} {timeframe.capitalize()} Summary**",
+                    "description": summary,
+                    "color": 5814783,  # optional: light blue
+                },
+                file_name=f"{pair.lower()}_{timeframe}_ta.{encoded_image.extension}",
+                file_data=encoded_image.data,
+                mime_type=encoded_image.mime_type,
+            )
+        )
+
+    def run(self, pair: str, timeframe: str, start_date: str) -> dict | BaseModel:
+        # =========================================================================
+        # Load and filter data from Database
+        # =========================================================================
+        df = self.load_gold_data(pair, timeframe, start_date)
+
+        # =========================================================================
+        # Create an image containing charts and technical indicators
+        # =========================================================================
+        encoded_image = self.render_chart(df, pair)
+
+        # =========================================================================
+        # Give Prompt to LLM
+        # =========================================================================
+        response = self.analyze(df, encoded_image, pair, timeframe)
+
+        # =========================================================================
+        # Send the summary to Discord Channel via WebHook
+        # =========================================================================
+        self.notify(self.build_summary(response), encoded_image, pair, timeframe)
+        return response
+
+    def close(self):
+        """Deliver queued summaries and release the connections"""
+        self.notifier.close()
+        self.db_ops.close_connection()
@@ -0,0 +1,96 @@
+from datetime import timedelta
+
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+pytest.importorskip("dotenv")
+
+from psycopg2 import sql  # noqa: E402
+
+from src.timescaledb_ops import TimescaleDBOps  # noqa: E402
+
+SCHEMA = "test_hypertable"
+TABLE = f"{SCHEMA}.ohlc"
+
+
+@pytest.fixture
+def db_ops():
+    """Scratch hypertable in the configured TimescaleDB, skipped when none is reachable"""
+    try:
+        db_ops = TimescaleDBOps()
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"TimescaleDB is not reachable: {e}")
+    drop = sql.SQL("DROP SCHEMA IF EXISTS {schema} CASCADE").format(
+        schema=sql.Identifier(SCHEMA)
+    )
+    db_ops.execute_query(drop)
+    db_ops.create_schema(SCHEMA)
+    db_ops.create_table(
+        TABLE,
+        {"time": "TIMESTAMPTZ", "pair": "TEXT", "close": "DOUBLE PRECISION"},
+        primary_key=("time", "pair"),
+    )
+    yield db_ops
+    db_ops.execute_query(drop)
+    db_ops.close_connection()
+
+
+def test_chunk_sizing_compression_and_policies(db_ops):
+    db_ops.create_hypertable(TABLE, "time", chunk_time_interval="1 day")
+    db_ops.execute_query(
+        sql.SQL(
+            """
+            INSERT INTO {table}
+            SELECT time, pair, 1.0
+            FROM generate_series('2025-01-01 00:00+00'::timestamptz, '2025-01-03 23:00+00', INTERVAL '1 hour') AS time,
+                unnest(ARRAY['XXBTZUSD', 'XETHZUSD']) AS pair
+            """
+        ).format(table=sql.Identifier(SCHEMA, "ohlc"))
+    )
+
+    chunks = db_ops.get_chunk_stats(TABLE)
+    assert len(chunks) == 3
+    assert all(
+        chunk["range_end"] - chunk["range_start"] == timedelta(days=1)
+        for chunk in chunks
+    )
+    assert not any(chunk["is_compressed"] for chunk in chunks)
+
+    stats = db_ops.get_compression_stats(TABLE)
+    assert stats["compression_enabled"] is False
+    assert stats["chunk_time_interval"] == timedelta(days=1)
+    assert stats["total_chunks"] == 3
+
+    db_ops.set_chunk_interval(TABLE, "7 days")
+    db_ops.enable_compression(TABLE)
+    db_ops.add_compression_policy(TABLE, "30 days")
+    db_ops.add_retention_policy(TABLE, "5 years")
+    db_ops.read_query(
+        sql.SQL(
+            "SELECT compress_chunk(chunk) FROM show_chunks({table}) AS chunk"
+        ).format(table=sql.Literal(TABLE))
+    )
+
+    stats = db_ops.get_compression_stats(TABLE)
+    assert stats["compression_enabled"] is True
+    assert stats["chunk_time_interval"] == timedelta(days=7)
+    assert stats["number_compressed_chunks"] == 3
+    assert stats["compression_ratio"] is not None
+    assert all(chunk["is_compressed"] for chunk in db_ops.get_chunk_stats(TABLE))
+
+    _, jobs = db_ops.read_query(
+        sql.SQL(
+            "SELECT proc_name FROM timescaledb_information.jobs WHERE hypertable_schema = %s ORDER BY proc_name"
+        ),
+        (SCHEMA,),
+    )
+    assert [job for job, in jobs] == ["policy_compression", "policy_retention"]
+
+    db_ops.remove_policies(TABLE)
+    _, jobs = db_ops.read_query(
+        sql.SQL(
+            "SELECT proc_name FROM timescaledb_information.jobs WHERE hypertable_schema = %s"
+        ),
+        (SCHEMA,),
+    )
+    assert jobs == []
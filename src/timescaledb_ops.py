@@ -1,24 +1,54 @@
-import os
+import csv
+import json
+from io import StringIO
 
 import psycopg2
-from dotenv import load_dotenv
 from psycopg2 import sql
+from psycopg2.pool import ThreadedConnectionPool
 
+from src.config import get_settings
 from src.utils.logger import logger
+from src.utils.metrics import span
 
 
 class TimescaleDBOps:
-    def __init__(self):
-        load_dotenv()
-        self.__conn = psycopg2.connect(
-            dbname=os.getenv("POSTGRES_DB"),
-            user=os.getenv("POSTGRES_USER"),
-            password=os.getenv("POSTGRES_PASSWORD"),
-            host=os.getenv("POSTGRES_HOST"),
-            port=os.getenv("POSTGRES_PORT"),
-        )
+    def __init__(self, connection_pool: ThreadedConnectionPool | None = None):
+        self.__pool = connection_pool
+        if connection_pool is not None:
+            self.__conn = connection_pool.getconn()
+            logger.info(f"Connection to TimescaleDB taken from the pool.")
+            return
+
+        self.__conn = psycopg2.connect(**self.get_connection_params())
         logger.info(f"Connection to TimescaleDB created successfully.")
 
+    @staticmethod
+    def get_connection_params() -> dict:
+        """Get the connection parameters from the settings"""
+        settings = get_settings()
+        return dict(
+            dbname=settings.postgres_db,
+            user=settings.postgres_user,
+            password=settings.postgres_password,
+            host=settings.postgres_host,
+            port=settings.postgres_port,
+        )
+
+    @classmethod
+    def create_pool(cls, minconn: int = 1, maxconn: int = 8) -> ThreadedConnectionPool:
+        """Create a connection pool that can be shared between pipelines and threads
+
+        Args:
+            minconn (int, optional): connections opened upfront. Defaults to 1.
+            maxconn (int, optional): maximum number of connections. Defaults to 8.
+
+        Returns:
+            ThreadedConnectionPool: connection pool.
+        """
+        pool = ThreadedConnectionPool(minconn, maxconn, **cls.get_connection_params())
+        logger.info(f"Connection pool to TimescaleDB created successfully.")
+        return pool
+
     def create_table(self, table_name: str, columns: dict, primary_key=None):
         """Create a table in the TimescaleDB database"""
         try:
@@ -42,7 +72,7 @@ class TimescaleDBOps:
                 query = sql.SQL(
                     "CREATE TABLE IF NOT EXISTS {table_name} ({columns} {primary_key});"
                 ).format(
-                    table_name=sql.Identifier(table_name),
+                    table_name=sql.Identifier(*table_name.split(".")),
                     columns=sql.SQL(", ").join(columns),
                     primary_key=primary_key,
                 )
@@ -53,16 +83,32 @@ class TimescaleDBOps:
             logger.warning(error)
             self.__conn.rollback()
 
-    def create_hypertable(self, table_name: str, time_column: str):
-        """Create a hyper table in the TimescaleDB database"""
+    def create_hypertable(
+        self, table_name: str, time_column: str, chunk_time_interval: str | None = None
+    ):
+        """Create a hyper table in the TimescaleDB database
+
+        Args:
+            table_name (str): table, e.g. "bronze.ohlc".
+            time_column (str): partitioning column.
+            chunk_time_interval (str | None, optional): time range of each chunk, e.g. "7 days".
+                Defaults to TimescaleDB's default (7 days).
+        """
         try:
             with self.__conn.cursor() as cursor:
                 # Construct SQL String Composition for Hypertable Creation
                 query = sql.SQL(
-                    "SELECT create_hypertable({table_name}, by_range({time_column}));"
+                    "SELECT create_hypertable({table_name}, by_range({time_column}{interval}), if_not_exists => TRUE);"
                 ).format(
                     table_name=sql.Literal(table_name),
                     time_column=sql.Literal(time_column),
+                    interval=(
+                        sql.SQL(", INTERVAL {}").format(
+                            sql.Literal(chunk_time_interval)
+                        )
+                        if chunk_time_interval
+                        else sql.SQL("")
+                    ),
                 )
                 cursor.execute(query)
                 self.__conn.commit()
@@ -71,21 +117,188 @@ class TimescaleDBOps:
             logger.warning(error)
             self.__conn.rollback()
 
+    def set_chunk_interval(self, table_name: str, chunk_time_interval: str):
+        """Change the time range of the chunks created from now on (existing chunks keep theirs)
+
+        Args:
+            table_name (str): hypertable, e.g. "bronze.ohlc".
+            chunk_time_interval (str): time range of each chunk, e.g. "30 days".
+        """
+        self.execute_query(
+            sql.SQL(
+                "SELECT set_chunk_time_interval({table_name}, INTERVAL {interval})"
+            ).format(
+                table_name=sql.Literal(table_name),
+                interval=sql.Literal(chunk_time_interval),
+            )
+        )
+
+    def enable_compression(
+        self, table_name: str, segmentby: str = "pair", orderby: str = "time DESC"
+    ):
+        """Enable native compression of a hypertable
+
+        Rows of a segment (e.g. one pair) are stored together in columnar batches
+        ordered by `orderby`, so scans of one pair over time read few batches.
+
+        Args:
+            table_name (str): hypertable, e.g. "bronze.ohlc".
+            segmentby (str, optional): columns segmenting the compressed data. Defaults to "pair".
+            orderby (str, optional): order inside a segment, "date DESC" for the silver and
+                gold tables. Defaults to "time DESC".
+        """
+        self.execute_query(
+            sql.SQL(
+                """
+                ALTER TABLE {table_name} SET (
+                    timescaledb.compress,
+                    timescaledb.compress_segmentby = {segmentby},
+                    timescaledb.compress_orderby = {orderby}
+                )
+                """
+            ).format(
+                table_name=sql.Identifier(*table_name.split(".")),
+                segmentby=sql.Literal(segmentby),
+                orderby=sql.Literal(orderby),
+            )
+        )
+
+    def add_compression_policy(self, table_name: str, compress_after: str):
+        """Compress the chunks older than `compress_after` (e.g. "30 days") in the background
+
+        Chunks still written by the incremental loads should stay younger than it,
+        writes into compressed chunks are much slower.
+        """
+        self.execute_query(
+            sql.SQL(
+                "SELECT add_compression_policy({table_name}, INTERVAL {interval}, if_not_exists => true)"
+            ).format(
+                table_name=sql.Literal(table_name), interval=sql.Literal(compress_after)
+            )
+        )
+
+    def add_retention_policy(self, table_name: str, drop_after: str):
+        """Drop the chunks older than `drop_after` (e.g. "5 years") in the background"""
+        self.execute_query(
+            sql.SQL(
+                "SELECT add_retention_policy({table_name}, INTERVAL {interval}, if_not_exists => true)"
+            ).format(
+                table_name=sql.Literal(table_name), interval=sql.Literal(drop_after)
+            )
+        )
+
+    def remove_policies(self, table_name: str):
+        """Remove the compression and retention policies of a hypertable"""
+        for function in ("remove_compression_policy", "remove_retention_policy"):
+            self.execute_query(
+                sql.SQL("SELECT {function}({table_name}, if_exists => true)").format(
+                    function=sql.Identifier(function),
+                    table_name=sql.Literal(table_name),
+                )
+            )
+
+    def get_chunk_stats(self, table_name: str) -> list[dict]:
+        """Get the range, compression state and size of every chunk of a hypertable
+
+        Returns:
+            list[dict]: one entry per chunk, ordered by range.
+        """
+        schema, table = table_name.split(".")
+        result = self.read_query(
+            sql.SQL(
+                """
+                SELECT
+                    c.chunk_schema || '.' || c.chunk_name AS chunk,
+                    c.range_start,
+                    c.range_end,
+                    c.is_compressed,
+                    s.total_bytes
+                FROM timescaledb_information.chunks c
+                LEFT JOIN chunks_detailed_size({table_name}) s
+                    ON s.chunk_schema = c.chunk_schema AND s.chunk_name = c.chunk_name
+                WHERE c.hypertable_schema = %s AND c.hypertable_name = %s
+                ORDER BY c.range_start
+                """
+            ).format(table_name=sql.Literal(table_name)),
+            (schema, table),
+        )
+        if not result:
+            return []
+        columns, rows = result
+        return [dict(zip(columns, row)) for row in rows]
+
+    def get_compression_stats(self, table_name: str) -> dict | None:
+        """Get the compression state, chunk interval, chunk counts and sizes before/after compression
+
+        Returns:
+            dict | None: statistics, None when they cannot be read.
+        """
+        schema, table = table_name.split(".")
+        result = self.read_query(
+            sql.SQL(
+                """
+                SELECT
+                    (SELECT compression_enabled FROM timescaledb_information.hypertables
+                     WHERE hypertable_schema = %s AND hypertable_name = %s) AS compression_enabled,
+                    (SELECT time_interval FROM timescaledb_information.dimensions
+                     WHERE hypertable_schema = %s AND hypertable_name = %s
+                     ORDER BY dimension_number LIMIT 1) AS chunk_time_interval,
+                    (SELECT count(*) FROM timescaledb_information.chunks
+                     WHERE hypertable_schema = %s AND hypertable_name = %s) AS total_chunks,
+                    s.number_compressed_chunks,
+                    s.before_compression_total_bytes,
+                    s.after_compression_total_bytes,
+                    hypertable_size({table_name}) AS total_bytes
+                FROM (SELECT 1) AS one
+                LEFT JOIN hypertable_compression_stats({table_name}) s ON true
+                """
+            ).format(table_name=sql.Literal(table_name)),
+            (schema, table, schema, table, schema, table),
+        )
+        if not result:
+            return None
+        columns, rows = result
+        stats = dict(zip(columns, rows[0]))
+        before, after = (
+            stats["before_compression_total_bytes"],
+            stats["after_compression_total_bytes"],
+        )
+        stats["compression_ratio"] = before / after if before and after else None
+        return stats
+
     def execute_query(self, query: sql.SQL):
         try:
-            with self.__conn.cursor() as cursor:
+            with span("db.execute_query") as current, self.__conn.cursor() as cursor:
                 cursor.execute(query)
                 self.__conn.commit()
+                current.add(db_round_trips=2, rows_out=max(cursor.rowcount, 0))
                 logger.info(f"Query Execute Successfuly")
         except (psycopg2.DatabaseError, Exception) as error:
             logger.warning(error)
             self.__conn.rollback()
 
+    def notify(self, channel: str, payload: dict):
+        """Send a NOTIFY to the listeners of a channel (delivered once committed)
+
+        Args:
+            channel (str): channel, e.g. "bronze_ohlc_loaded".
+            payload (dict): JSON-serializable payload (at most ~8000 bytes).
+        """
+        self.execute_query(
+            sql.SQL("SELECT pg_notify({channel}, {payload})").format(
+                channel=sql.Literal(channel), payload=sql.Literal(json.dumps(payload))
+            )
+        )
+
     def executemany_query(self, query: sql.SQL, data: list):
         try:
-            with self.__conn.cursor() as cursor:
+            with span(
+                "db.executemany_query"
+            ) as current, self.__conn.cursor() as cursor:
                 cursor.executemany(query, data)
                 self.__conn.commit()
+                # executemany sends one statement per row
+                current.add(db_round_trips=len(data) + 1, rows_in=len(data))
                 logger.info(f"Query Execute Successfuly")
         except (psycopg2.DatabaseError, Exception) as error:
             logger.warning(error)
@@ -96,7 +309,9 @@ class TimescaleDBOps:
     ):
         """Insert data into the TimescaleDB database"""
         try:
-            with self.__conn.cursor() as cursor:
+            with span(
+                "db.insert_data", table=table_name
+            ) as current, self.__conn.cursor() as cursor:
                 query = sql.SQL(
                     """
                     INSERT INTO {table_name} ({columns}) 
@@ -127,6 +342,7 @@ class TimescaleDBOps:
                 )
                 cursor.execute(query)
                 self.__conn.commit()
+                current.add(db_round_trips=2, rows_in=1)
                 logger.info(f"Data inserted into {table_name} successfully.")
         except (psycopg2.DatabaseError, Exception) as error:
             logger.warning(error)
@@ -139,17 +355,17 @@ class TimescaleDBOps:
         columns: tuple,
         data: list,
         conflict_columns: list,
-    ):
-        """Insert data into the TimescaleDB database"""
-        try:
-            with self.__conn.cursor() as cursor:
-                # Set schema
-                query = sql.SQL("SET search_path TO {schema}").format(
-                    schema=sql.Identifier(schema)
-                )
-                cursor.execute(query)
+    ) -> bool:
+        """Insert data into the TimescaleDB database
 
-                # Insert Data
+        Returns:
+            bool: the batch was committed.
+        """
+        try:
+            with span(
+                "db.batch_insert_data", table=f"{schema}.{table}"
+            ) as current, self.__conn.cursor() as cursor:
+                # Schema-qualified, a session-level search_path would stay on the pooled connection
                 query = sql.SQL(
                     """
                     INSERT INTO {table} ({columns}) 
@@ -159,7 +375,7 @@ class TimescaleDBOps:
                         {updates}
                     """
                 ).format(
-                    table=sql.Identifier(table),
+                    table=sql.Identifier(schema, table),
                     columns=sql.SQL(", ").join(map(sql.Identifier, columns)),
                     values=sql.SQL(", ").join(sql.Placeholder() for _ in columns),
                     conflict_columns=sql.SQL(",").join(
@@ -180,7 +396,423 @@ class TimescaleDBOps:
                 )
                 cursor.executemany(query, data)
                 self.__conn.commit()
-                logger.info(f"Data inserted into {table} successfully.")
+                # One statement per row and the commit
+                current.add(db_round_trips=len(data) + 1, rows_in=len(data))
+                logger.info(f"Data inserted into {schema}.{table} successfully.")
+                return True
+        except (psycopg2.DatabaseError, Exception) as error:
+            logger.warning(error)
+            self.__conn.rollback()
+            return False
+
+    def copy_upsert_data(
+        self,
+        table: str,
+        schema: str,
+        columns: tuple,
+        data: list,
+        conflict_columns: list,
+    ) -> bool:
+        """Load data with COPY into a staging table, then upsert it into the target table
+
+        COPY avoids one round trip per row, the staging table keeps the upsert
+        semantics of `batch_insert_data`.
+
+        Returns:
+            bool: the data was committed.
+        """
+        try:
+            with span(
+                "db.copy_upsert_data", table=f"{schema}.{table}"
+            ) as current, self.__conn.cursor() as cursor:
+                target = sql.Identifier(schema, table)
+                staging, copied_bytes = self.__copy_to_staging(
+                    cursor, table, schema, columns, data
+                )
+
+                query = sql.SQL(
+                    """
+                    INSERT INTO {target} ({columns})
+                    SELECT {columns} FROM {staging}
+                    ON CONFLICT ({conflict_columns})
+                    DO UPDATE SET
+                        {updates}
+                    """
+                ).format(
+                    target=target,
+                    staging=staging,
+                    columns=sql.SQL(", ").join(map(sql.Identifier, columns)),
+                    conflict_columns=sql.SQL(",").join(
+                        map(sql.Identifier, conflict_columns)
+                    ),
+                    updates=sql.SQL(",").join(
+                        [
+                            sql.SQL("{column} = EXCLUDED.{column}").format(
+                                column=sql.Identifier(column)
+                            )
+                            for column in columns
+                            if column not in conflict_columns
+                        ]
+                    ),
+                )
+                cursor.execute(query)
+                self.__conn.commit()
+                # CREATE TEMP TABLE, COPY, INSERT ... SELECT and the commit
+                current.add(
+                    db_round_trips=4,
+                    rows_in=len(data),
+                    rows_out=max(cursor.rowcount, 0),
+                    bytes_out=copied_bytes,
+                )
+                logger.info(f"Data copied into {schema}.{table} successfully.")
+                return True
+        except (psycopg2.DatabaseError, Exception) as error:
+            logger.warning(error)
+            self.__conn.rollback()
+            return False
+
+    def copy_upsert_changed(
+        self,
+        table: str,
+        schema: str,
+        columns: tuple,
+        data: list,
+        conflict_columns: list,
+    ) -> dict | None:
+        """Like `copy_upsert_data`, but rows identical to the stored ones are not rewritten
+
+        Returns:
+            dict | None: inserted, updated and unchanged counts, None when the upsert failed.
+        """
+        try:
+            with span(
+                "db.copy_upsert_changed", table=f"{schema}.{table}"
+            ) as current, self.__conn.cursor() as cursor:
+                staging, copied_bytes = self.__copy_to_staging(
+                    cursor, table, schema, columns, data
+                )
+                cursor.execute(
+                    self.__changed_upsert_query(
+                        sql.Identifier(schema, table),
+                        sql.SQL("SELECT * FROM {staging}").format(staging=staging),
+                        columns,
+                        conflict_columns,
+                    )
+                )
+                counts = self.__upsert_counts(cursor.fetchone())
+                self.__conn.commit()
+                # CREATE TEMP TABLE, COPY, INSERT ... SELECT and the commit
+                current.add(
+                    db_round_trips=4,
+                    rows_in=len(data),
+                    rows_out=counts["inserted"] + counts["updated"],
+                    bytes_out=copied_bytes,
+                )
+                logger.info(
+                    f"Data copied into {schema}.{table} successfully ({counts})."
+                )
+                return counts
+        except (psycopg2.DatabaseError, Exception) as error:
+            logger.warning(error)
+            self.__conn.rollback()
+            return None
+
+    def upsert_query(
+        self,
+        table: str,
+        schema: str,
+        select_query: sql.Composable,
+        columns: tuple,
+        conflict_columns: list,
+    ) -> dict | None:
+        """Upsert the rows of a SELECT, rows identical to the stored ones are not rewritten
+
+        Args:
+            table (str): target table.
+            schema (str): schema of the target table.
+            select_query (sql.Composable): query returning `columns` in that order.
+            columns (tuple): columns of the target table.
+            conflict_columns (list): columns of the unique key.
+
+        Returns:
+            dict | None: inserted, updated and unchanged counts, None when the upsert failed.
+        """
+        try:
+            with span(
+                "db.upsert_query", table=f"{schema}.{table}"
+            ) as current, self.__conn.cursor() as cursor:
+                cursor.execute(
+                    self.__changed_upsert_query(
+                        sql.Identifier(schema, table),
+                        select_query,
+                        columns,
+                        conflict_columns,
+                    )
+                )
+                counts = self.__upsert_counts(cursor.fetchone())
+                self.__conn.commit()
+                current.add(
+                    db_round_trips=2,
+                    rows_in=sum(counts.values()),
+                    rows_out=counts["inserted"] + counts["updated"],
+                )
+                logger.info(
+                    f"Data upserted into {schema}.{table} successfully ({counts})."
+                )
+                return counts
+        except (psycopg2.DatabaseError, Exception) as error:
+            logger.warning(error)
+            self.__conn.rollback()
+            return None
+
+    def __copy_to_staging(
+        self, cursor, table: str, schema: str, columns: tuple, data: list
+    ) -> tuple[sql.Identifier, int]:
+        """COPY rows into a temporary table shaped like the target, emptied on commit"""
+        staging = sql.Identifier(f"_staging_{table}")
+        cursor.execute(
+            sql.SQL(
+                "CREATE TEMP TABLE IF NOT EXISTS {staging} (LIKE {target} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+            ).format(staging=staging, target=sql.Identifier(schema, table))
+        )
+
+        buffer = StringIO()
+        csv.writer(buffer).writerows(data)
+        buffer.seek(0)
+        cursor.copy_expert(
+            sql.SQL("COPY {staging} ({columns}) FROM STDIN WITH (FORMAT csv)")
+            .format(
+                staging=staging,
+                columns=sql.SQL(", ").join(map(sql.Identifier, columns)),
+            )
+            .as_string(cursor),
+            buffer,
+        )
+        return staging, len(buffer.getvalue())
+
+    @staticmethod
+    def __changed_upsert_query(
+        target: sql.Identifier,
+        source: sql.Composable,
+        columns: tuple,
+        conflict_columns: list,
+    ) -> sql.Composed:
+        # Every sub-statement sees the table as it was before the INSERT, so
+        # `existing` counts the keys already stored. The INSERT only returns the
+        # rows it inserted or changed.
+        updated_columns = [
+            column for column in columns if column not in conflict_columns
+        ]
+        return sql.SQL(
+            """
+            WITH source AS MATERIALIZED (
+                SELECT {columns} FROM ({source}) AS source_rows
+            ),
+            existing AS (
+                SELECT count(*) AS n FROM source JOIN {target} AS t USING ({conflict_columns})
+            ),
+            written AS (
+                INSERT INTO {target} AS t ({columns})
+                SELECT {columns} FROM source
+                ON CONFLICT ({conflict_columns})
+                DO UPDATE SET
+                    {updates}
+                WHERE ({stored}) IS DISTINCT FROM ({excluded})
+                RETURNING 1
+            )
+            SELECT (SELECT count(*) FROM source), (SELECT n FROM existing), (SELECT count(*) FROM written)
+            """
+        ).format(
+            target=target,
+            source=source,
+            columns=sql.SQL(", ").join(map(sql.Identifier, columns)),
+            conflict_columns=sql.SQL(", ").join(map(sql.Identifier, conflict_columns)),
+            updates=sql.SQL(", ").join(
+                sql.SQL("{column} = EXCLUDED.{column}").format(
+                    column=sql.Identifier(column)
+                )
+                for column in updated_columns
+            ),
+            stored=sql.SQL(", ").join(
+                sql.Identifier("t", column) for column in updated_columns
+            ),
+            excluded=sql.SQL(", ").join(
+                sql.Identifier("excluded", column) for column in updated_columns
+            ),
+        )
+
+    @staticmethod
+    def __upsert_counts(row: tuple) -> dict:
+        total, existing, written = row
+        inserted = total - existing
+        updated = written - inserted
+        return {
+            "inserted": inserted,
+            "updated": updated,
+            "unchanged": existing - updated,
+        }
+
+    def copy_data(self, table: str, schema: str, columns: tuple, data: list) -> int:
+        """Load data with COPY straight into the target table
+
+        Without staging table nor ON CONFLICT, only for ranges known to be empty
+        (a duplicate key fails the whole COPY).
+
+        Returns:
+            int: number of rows copied, 0 when the COPY failed.
+        """
+        try:
+            with span(
+                "db.copy_data", table=f"{schema}.{table}"
+            ) as current, self.__conn.cursor() as cursor:
+                buffer = StringIO()
+                csv.writer(buffer).writerows(data)
+                buffer.seek(0)
+                cursor.copy_expert(
+                    sql.SQL("COPY {target} ({columns}) FROM STDIN WITH (FORMAT csv)")
+                    .format(
+                        target=sql.Identifier(schema, table),
+                        columns=sql.SQL(", ").join(map(sql.Identifier, columns)),
+                    )
+                    .as_string(cursor),
+                    buffer,
+                )
+                self.__conn.commit()
+                # COPY and the commit
+                current.add(
+                    db_round_trips=2,
+                    rows_in=len(data),
+                    rows_out=len(data),
+                    bytes_out=len(buffer.getvalue()),
+                )
+                logger.info(
+                    f"{len(data)} rows copied into {schema}.{table} successfully."
+                )
+                return len(data)
+        except (psycopg2.DatabaseError, Exception) as error:
+            logger.warning(error)
+            self.__conn.rollback()
+            return 0
+
+    def get_indexes(self, table: str, schema: str) -> list[tuple[str, str]]:
+        """Get the secondary indexes of a table (indexes backing a constraint excluded)
+
+        Returns:
+            list[tuple[str, str]]: name and `CREATE INDEX` statement of every index.
+        """
+        result = self.read_query(
+            sql.SQL(
+                """
+                SELECT i.relname, pg_get_indexdef(x.indexrelid)
+                FROM pg_index x
+                JOIN pg_class i ON i.oid = x.indexrelid
+                WHERE x.indrelid = {target}::regclass
+                  AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid)
+                ORDER BY i.relname
+                """
+            ).format(target=sql.Literal(f"{schema}.{table}"))
+        )
+        return [tuple(row) for row in result[1]] if result else []
+
+    def get_constraints(self, table: str, schema: str) -> list[tuple[str, str]]:
+        """Get the primary key and unique constraints of a table
+
+        Returns:
+            list[tuple[str, str]]: name and definition (e.g. "PRIMARY KEY (time, pair)").
+        """
+        result = self.read_query(
+            sql.SQL(
+                """
+                SELECT conname, pg_get_constraintdef(oid)
+                FROM pg_constraint
+                WHERE conrelid = {target}::regclass AND contype IN ('p', 'u')
+                ORDER BY conname
+                """
+            ).format(target=sql.Literal(f"{schema}.{table}"))
+        )
+        return [tuple(row) for row in result[1]] if result else []
+
+    def analyze_table(self, table: str, schema: str):
+        """Refresh the planner statistics of a table (and of its chunks for a hypertable)"""
+        self.execute_query(
+            sql.SQL("ANALYZE {target}").format(target=sql.Identifier(schema, table))
+        )
+
+    def create_schema(self, schema: str):
+        """Create a schema if it does not exist"""
+        self.execute_query(
+            sql.SQL("CREATE SCHEMA IF NOT EXISTS {schema}").format(
+                schema=sql.Identifier(schema)
+            )
+        )
+
+    def create_index(
+        self,
+        table_name: str,
+        columns: list[str],
+        name: str | None = None,
+        unique: bool = False,
+    ):
+        """Create an index if it does not exist (on a hypertable, every chunk gets it)
+
+        Args:
+            table_name (str): table, e.g. "silver.ohlc_daily".
+            columns (list[str]): indexed columns with an optional order, e.g. ["pair", "date DESC"].
+            name (str | None, optional): index name. Defaults to "<table>_<columns>_idx".
+            unique (bool, optional): create a unique index. Defaults to False.
+        """
+        schema, table = table_name.split(".")
+        keys = []
+        for column in columns:
+            column_name, *order = column.split()
+            order = " ".join(order).upper()
+            if order not in ("", "ASC", "DESC"):
+                raise ValueError(
+                    f"Unsupported order {order!r} for index column {column_name}"
+                )
+            keys.append(
+                sql.SQL("{} {}").format(sql.Identifier(column_name), sql.SQL(order))
+            )
+        name = name or "_".join(
+            [table, *("_".join(column.lower().split()) for column in columns), "idx"]
+        )
+        self.execute_query(
+            sql.SQL(
+                "CREATE {unique}INDEX IF NOT EXISTS {name} ON {table_name} ({keys})"
+            ).format(
+                unique=sql.SQL("UNIQUE " if unique else ""),
+                name=sql.Identifier(name),
+                table_name=sql.Identifier(schema, table),
+                keys=sql.SQL(", ").join(keys),
+            )
+        )
+
+    def explain_query(
+        self,
+        query: sql.Composable,
+        params: tuple | dict | None = None,
+        disable_seqscan: bool = True,
+    ) -> dict | None:
+        """Get the plan picked for a query, without running it
+
+        With `disable_seqscan`, a sequential scan is only planned when no index
+        can serve the query, so the plan does not depend on the table size.
+
+        Returns:
+            dict | None: root node of the JSON plan, None on failure.
+        """
+        try:
+            with span("db.explain_query") as current, self.__conn.cursor() as cursor:
+                if disable_seqscan:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+                cursor.execute(
+                    sql.SQL("EXPLAIN (FORMAT JSON) {query}").format(query=query), params
+                )
+                plan = cursor.fetchone()[0]
+                current.add(db_round_trips=3 if disable_seqscan else 2)
+                # SET LOCAL ends with the transaction
+                self.__conn.rollback()
+                return plan[0]["Plan"]
         except (psycopg2.DatabaseError, Exception) as error:
             logger.warning(error)
             self.__conn.rollback()
@@ -188,7 +820,9 @@ class TimescaleDBOps:
     def read_data(self, table_name):
         """Read data from the TimescaleDB database"""
         try:
-            with self.__conn.cursor() as cursor:
+            with span(
+                "db.read_data", table=table_name
+            ) as current, self.__conn.cursor() as cursor:
                 select_query = sql.SQL(
                     """
                     SELECT * FROM {table_name}
@@ -200,6 +834,7 @@ class TimescaleDBOps:
                 )
                 cursor.execute(select_query)
                 rows = cursor.fetchall()
+                current.add(db_round_trips=1, rows_out=len(rows))
                 columns = [desc[0] for desc in cursor.description]
                 logger.info(f"Data read from {table_name} successfully.")
                 return (columns, rows)
@@ -207,9 +842,96 @@ class TimescaleDBOps:
             logger.warning(error)
             self.__conn.rollback()
 
+    def read_query(self, query: sql.Composable, params: tuple | dict | None = None):
+        """Run a SELECT query and return its columns and rows"""
+        try:
+            with span("db.read_query") as current, self.__conn.cursor() as cursor:
+                cursor.execute(query, params)
+                rows = cursor.fetchall()
+                current.add(db_round_trips=2, rows_out=len(rows))
+                columns = [desc[0] for desc in cursor.description]
+                self.__conn.commit()
+                return (columns, rows)
+        except (psycopg2.DatabaseError, Exception) as error:
+            logger.warning(error)
+            self.__conn.rollback()
+
+    @staticmethod
+    def range_query(
+        table_name: str,
+        time_column: str,
+        pair: str | list[str] | None = None,
+        start_date=None,
+        end_date=None,
+    ) -> sql.Composed:
+        """Build the SELECT of the rows of a table inside [start_date, end_date], optionally of some pairs
+
+        Filtering in the database lets the `(pair, <time> DESC)` indexes serve
+        the read instead of a full table scan.
+
+        Args:
+            table_name (str): table, e.g. "gold.ohlc_ta_daily".
+            time_column (str): "time" for bronze, "date" for silver and gold.
+            pair (str | list[str] | None, optional): pair or pairs, None for every pair. Defaults to None.
+            start_date (optional): first date, None for no lower bound. Defaults to None.
+            end_date (optional): last date (inclusive), None for no upper bound. Defaults to None.
+
+        Returns:
+            sql.Composed: query ordered by `time_column`.
+        """
+        conditions = []
+        if isinstance(pair, list):
+            conditions.append(sql.SQL("pair = ANY({})").format(sql.Literal(pair)))
+        elif pair is not None:
+            conditions.append(sql.SQL("pair = {}").format(sql.Literal(pair)))
+        if start_date is not None:
+            conditions.append(
+                sql.SQL("{} >= {}").format(
+                    sql.Identifier(time_column), sql.Literal(start_date)
+                )
+            )
+        if end_date is not None:
+            conditions.append(
+                sql.SQL("{} <= {}").format(
+                    sql.Identifier(time_column), sql.Literal(end_date)
+                )
+            )
+        return sql.SQL(
+            "SELECT * FROM {table_name}{where} ORDER BY {time_column}"
+        ).format(
+            table_name=sql.Identifier(*table_name.split(".")),
+            where=(
+                sql.SQL(" WHERE ") + sql.SQL(" AND ").join(conditions)
+                if conditions
+                else sql.SQL("")
+            ),
+            time_column=sql.Identifier(time_column),
+        )
+
+    def read_range(
+        self,
+        table_name: str,
+        time_column: str,
+        pair: str | list[str] | None = None,
+        start_date=None,
+        end_date=None,
+    ):
+        """Read the rows of a table inside [start_date, end_date], optionally of some pairs
+
+        Returns:
+            tuple[list, list] | None: columns and rows, None on failure.
+        """
+        return self.read_query(
+            self.range_query(table_name, time_column, pair, start_date, end_date)
+        )
+
     def close_connection(self):
-        """Close the TimescaleDB database connection"""
-        if self.__conn:
+        """Close the TimescaleDB database connection (or give it back to the pool)"""
+        if self.__conn and self.__pool is not None:
+            self.__pool.putconn(self.__conn)
+            self.__conn = None
+            logger.info("TimescaleDB connection returned to the pool.")
+        elif self.__conn:
             self.__conn.close()
             logger.info("TimescaleDB connection closed.")
         else:
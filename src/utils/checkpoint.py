@@ -0,0 +1,135 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from src.config import get_settings
+from src.utils.logger import logger
+
+
+class CheckpointStore:
+    def __init__(self, path: str | None = None):
+        """Completed units of work (pages, objects, batches) per run id
+
+        A unit is only recorded once its work is committed, so a rerun with the
+        same run id skips what is done and resumes from the first missing unit.
+        Callers clear a run once it succeeded, the checkpoints only outlive
+        failed runs.
+
+        Args:
+            path (str | None, optional): SQLite file. Defaults to the `checkpoint_path` setting.
+        """
+        self.path = path or get_settings().checkpoint_path
+        self.__lock = threading.Lock()
+        self.__conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.__conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                run_id TEXT NOT NULL,
+                unit TEXT NOT NULL,
+                payload TEXT,
+                completed_at REAL NOT NULL,
+                PRIMARY KEY (run_id, unit)
+            )
+            """
+        )
+        self.__conn.commit()
+
+    @staticmethod
+    def make_run_id(name: str, **parts) -> str:
+        """Build a run id from the pipeline name and the parameters defining its work
+
+        The same parameters give the same run id, so rerunning a failed command
+        resumes it without passing an explicit run id. Its checkpoints are cleared
+        once it succeeded, so a later run with the same parameters does the work again.
+
+        Args:
+            name (str): pipeline name, e.g. "bronze.ohlc".
+            **parts: pair, interval, dates, etc.
+
+        Returns:
+            str: "<name>:<12 hex digits>".
+        """
+        payload = json.dumps(parts, sort_keys=True, default=str)
+        return f"{name}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()[:12]}"
+
+    def is_done(self, run_id: str, unit: str) -> bool:
+        with self.__lock:
+            row = self.__conn.execute(
+                "SELECT 1 FROM checkpoints WHERE run_id = ? AND unit = ?",
+                (run_id, unit),
+            ).fetchone()
+        return row is not None
+
+    def done_units(self, run_id: str, prefix: str = "") -> dict[str, dict | None]:
+        """Get the completed units of a run
+
+        Args:
+            run_id (str): run id.
+            prefix (str, optional): only units starting with it, e.g. "page:". Defaults to "".
+
+        Returns:
+            dict[str, dict | None]: payload by unit.
+        """
+        with self.__lock:
+            rows = self.__conn.execute(
+                "SELECT unit, payload FROM checkpoints WHERE run_id = ? AND unit LIKE ? ORDER BY completed_at",
+                (run_id, f"{prefix}%"),
+            ).fetchall()
+        return {
+            unit: json.loads(payload) if payload else None for unit, payload in rows
+        }
+
+    def mark_done(self, run_id: str, unit: str, payload: dict | None = None):
+        """Record a committed unit of work
+
+        Args:
+            run_id (str): run id.
+            unit (str): unit, e.g. "batch:1700000000:1700086400".
+            payload (dict | None, optional): data needed to resume after the unit (e.g. a cursor). Defaults to None.
+        """
+        with self.__lock:
+            self.__conn.execute(
+                """
+                INSERT INTO checkpoints (run_id, unit, payload, completed_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (run_id, unit) DO UPDATE SET
+                    payload = excluded.payload,
+                    completed_at = excluded.completed_at
+                """,
+                (
+                    run_id,
+                    unit,
+                    json.dumps(payload) if payload is not None else None,
+                    time.time(),
+                ),
+            )
+            self.__conn.commit()
+
+    def clear(self, run_id: str):
+        """Forget a run, its next execution starts from scratch"""
+        with self.__lock:
+            self.__conn.execute("DELETE FROM checkpoints WHERE run_id = ?", (run_id,))
+            self.__conn.commit()
+        logger.info(f"Checkpoints of {run_id} cleared.")
+
+    def runs(self) -> list[dict]:
+        """Get every run with its number of completed units and last update"""
+        with self.__lock:
+            rows = self.__conn.execute(
+                """
+                SELECT run_id, COUNT(*), MAX(completed_at)
+                FROM checkpoints
+                GROUP BY run_id
+                ORDER BY MAX(completed_at) DESC
+                """
+            ).fetchall()
+        return [
+            {"run_id": run_id, "units": units, "updated_at": updated_at}
+            for run_id, units, updated_at in rows
+        ]
+
+    def close(self):
+        """Close the SQLite connection"""
+        self.__conn.close()
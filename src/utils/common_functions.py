@@ -7,3 +7,7 @@ def get_base64_encoded_image(image_path):
         base64_encoded_data = base64.b64encode(binary_data)
         base64_string = base64_encoded_data.decode("utf-8")
         return base64_string
+
+
+def get_base64_encoded_bytes(data: bytes) -> str:
+    return base64.b64encode(data).decode("utf-8")
@@ -0,0 +1,55 @@
+import math
+import threading
+from collections import deque
+
+
+class LatencyTracker:
+    def __init__(self, window: int = 500):
+        """Keep the latest latencies to compute percentiles over a sliding window
+
+        Args:
+            window (int, optional): number of latencies kept. Defaults to 500.
+        """
+        self.__latencies = deque(maxlen=window)
+        self.__lock = threading.Lock()
+
+    def record(self, seconds: float):
+        """Record a latency
+
+        Args:
+            seconds (float): latency in seconds.
+        """
+        with self.__lock:
+            self.__latencies.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self.__latencies)
+
+    def percentile(self, percentile: float) -> float | None:
+        """Get a latency percentile (nearest-rank)
+
+        Args:
+            percentile (float): percentile between 0 and 100.
+
+        Returns:
+            float | None: latency in seconds, None when nothing was recorded.
+        """
+        with self.__lock:
+            latencies = sorted(self.__latencies)
+        if not latencies:
+            return None
+        rank = max(math.ceil(percentile / 100 * len(latencies)), 1)
+        return latencies[rank - 1]
+
+    def summary(self) -> dict:
+        """Get p50/p95/p99 latencies and the number of samples
+
+        Returns:
+            dict: latency summary.
+        """
+        return {
+            "count": len(self),
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
@@ -0,0 +1,276 @@
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from src.utils.logger import logger
+
+# Counters carried by every span
+COUNTERS = ("rows_in", "rows_out", "bytes_in", "bytes_out", "db_round_trips")
+
+# Counters that are also added to the parent span when a span ends, rows are
+# not because a stage usually transforms the rows of its children
+ROLLUP_COUNTERS = ("bytes_in", "bytes_out", "db_round_trips")
+
+# Spans ending a pipeline run, the Prometheus textfile is rewritten when one ends
+PIPELINE_PREFIX = "pipeline."
+
+
+class Span:
+    def __init__(self, name: str, labels: dict, parent: "Span | None" = None):
+        """Timed unit of work (a stage, a request, a query)
+
+        Args:
+            name (str): name of the span, e.g. "db.copy_upsert_data".
+            labels (dict): labels of the span, e.g. {"table": "bronze.ohlc"}.
+            parent (Span | None, optional): enclosing span. Defaults to None.
+        """
+        self.name = name
+        self.labels = {key: str(value) for key, value in labels.items()}
+        self.parent = parent
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.wall_seconds = 0.0
+        self.error = None
+        self.__started = time.perf_counter()
+        # Children running in worker threads add their counters concurrently
+        self.__lock = threading.Lock()
+
+    def add(self, **counters: int):
+        """Increment counters of the span, e.g. `span.add(rows_out=len(rows))`"""
+        for key in counters:
+            if key not in self.counters:
+                raise ValueError(f"Unknown counter '{key}', expected one of {COUNTERS}")
+        with self.__lock:
+            for key, value in counters.items():
+                self.counters[key] += value or 0
+
+    def finish(self):
+        self.wall_seconds = time.perf_counter() - self.__started
+
+    def to_dict(self) -> dict:
+        return {
+            "span": self.name,
+            "labels": self.labels,
+            "parent": self.parent.name if self.parent else None,
+            "wall_seconds": self.wall_seconds,
+            **self.counters,
+            "error": self.error,
+        }
+
+
+class MetricsRecorder:
+    def __init__(
+        self, jsonl_path: str | None = None, prometheus_path: str | None = None
+    ):
+        """Collect spans and export them as JSON lines and/or a Prometheus textfile
+
+        Every finished span is appended to the JSON lines file. Spans are also
+        aggregated per name and labels, the Prometheus textfile (for the node
+        exporter textfile collector) is rewritten each time a pipeline span
+        (named "pipeline.*") ends.
+
+        The open span is tracked in a context variable, so asyncio tasks inherit
+        it. Threads do not: functions handed to a worker thread are wrapped with
+        `bind` to keep their spans under the span that started them.
+
+        Args:
+            jsonl_path (str | None, optional): JSON lines file receiving every span. Defaults to None.
+            prometheus_path (str | None, optional): Prometheus textfile. Defaults to None.
+        """
+        self.jsonl_path = jsonl_path
+        self.prometheus_path = prometheus_path
+        self.__current = contextvars.ContextVar(
+            f"metrics_span_{id(self)}", default=None
+        )
+        self.__lock = threading.Lock()
+        self.__totals = (
+            {}
+        )  # (name, labels) -> {"count", "errors", "wall_seconds", counters...}
+        self.__hooks = []
+
+    def add_hook(self, hook):
+        """Register an object with `on_span_start(span)` and `on_span_end(span)` methods,
+        called in the thread running the span (e.g. to profile selected spans)"""
+        self.__hooks.append(hook)
+
+    def remove_hook(self, hook):
+        self.__hooks.remove(hook)
+
+    def current(self) -> Span:
+        """Get the innermost open span of the context (a detached span when there is none)"""
+        return self.__current.get() or Span("detached", {})
+
+    def bind(self, function: Callable) -> Callable:
+        """Wrap a function so its spans are children of the current span wherever it runs
+
+        Args:
+            function (Callable): function handed to another thread, e.g. `executor.submit(bind(work))`.
+
+        Returns:
+            Callable: wrapped function, it may be called from several threads at once.
+        """
+        parent = self.__current.get()
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            token = self.__current.set(parent)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.__current.reset(token)
+
+        return wrapper
+
+    @contextmanager
+    def span(self, name: str, **labels) -> Iterator[Span]:
+        """Time a block of code
+
+        Args:
+            name (str): name of the span.
+            **labels: labels of the span.
+
+        Yields:
+            Span: the span, use `add` to record rows, bytes and round trips.
+        """
+        current = Span(name, labels, parent=self.__current.get())
+        token = self.__current.set(current)
+        for hook in list(self.__hooks):
+            hook.on_span_start(current)
+        try:
+            yield current
+        except BaseException as e:
+            current.error = type(e).__name__
+            raise
+        finally:
+            self.__current.reset(token)
+            current.finish()
+            for hook in list(self.__hooks):
+                hook.on_span_end(current)
+            if current.parent is not None:
+                current.parent.add(
+                    **{key: current.counters[key] for key in ROLLUP_COUNTERS}
+                )
+            self.__record(current)
+
+    def timed(self, name: str, **labels) -> Callable:
+        """Decorator running a function inside a span"""
+
+        def decorator(function: Callable) -> Callable:
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.span(name, **labels):
+                    return function(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def __record(self, span: Span):
+        key = (span.name, tuple(sorted(span.labels.items())))
+        with self.__lock:
+            totals = self.__totals.setdefault(
+                key,
+                {
+                    "count": 0,
+                    "errors": 0,
+                    "wall_seconds": 0.0,
+                    **dict.fromkeys(COUNTERS, 0),
+                },
+            )
+            totals["count"] += 1
+            totals["errors"] += span.error is not None
+            totals["wall_seconds"] += span.wall_seconds
+            for counter, value in span.counters.items():
+                totals[counter] += value
+
+            try:
+                if self.jsonl_path:
+                    with open(self.jsonl_path, "a") as file:
+                        file.write(
+                            json.dumps({"timestamp": time.time(), **span.to_dict()})
+                            + "\n"
+                        )
+                if self.prometheus_path and span.name.startswith(PIPELINE_PREFIX):
+                    self.__write_prometheus()
+            except OSError as e:
+                logger.warning(f"Failed to export metrics: {e}")
+
+    def snapshot(self) -> list[dict]:
+        """Get the aggregated metrics per span name and labels"""
+        with self.__lock:
+            return [
+                {"span": name, "labels": dict(labels), **totals}
+                for (name, labels), totals in sorted(self.__totals.items())
+            ]
+
+    def reset(self):
+        with self.__lock:
+            self.__totals.clear()
+
+    @staticmethod
+    def __format_labels(name: str, labels: tuple) -> str:
+        def escape(value: str) -> str:
+            return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+        pairs = [("span", name), *labels]
+        return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in pairs) + "}"
+
+    def __write_prometheus(self):
+        lines = []
+        metrics = [
+            ("count", "Number of finished spans"),
+            ("errors", "Number of spans that raised an exception"),
+            ("wall_seconds", "Wall time spent inside spans"),
+            *(
+                (counter, f"Total {counter.replace('_', ' ')} of spans")
+                for counter in COUNTERS
+            ),
+        ]
+        for metric, help in metrics:
+            full_name = f"pipeline_span_{metric}_total"
+            lines.append(f"# HELP {full_name} {help}")
+            lines.append(f"# TYPE {full_name} counter")
+            for (name, labels), totals in sorted(self.__totals.items()):
+                lines.append(
+                    f"{full_name}{self.__format_labels(name, labels)} {totals[metric]}"
+                )
+
+        # Write then rename so the collector never reads a partial file
+        tmp_path = f"{self.prometheus_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as file:
+            file.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.prometheus_path)
+
+
+class _SettingsMetricsRecorder(MetricsRecorder):
+    """Recorder whose export paths are read from the settings on first use"""
+
+    def __init__(self):
+        super().__init__()
+        self.__configured = False
+
+    def configure(self):
+        from src.config import get_settings
+
+        settings = get_settings()
+        self.jsonl_path = self.jsonl_path or settings.metrics_jsonl_path
+        self.prometheus_path = self.prometheus_path or settings.metrics_prometheus_path
+        self.__configured = True
+
+    @contextmanager
+    def span(self, name: str, **labels) -> Iterator[Span]:
+        if not self.__configured:
+            self.configure()
+        with super().span(name, **labels) as current:
+            yield current
+
+
+metrics = _SettingsMetricsRecorder()
+span = metrics.span
+timed = metrics.timed
+current_span = metrics.current
+bind_span = metrics.bind
@@ -0,0 +1,89 @@
+import io
+import json
+import re
+
+import pandas as pd
+
+from src.minio_ops import MinioOPS
+from src.model.ohlc import OHLC
+
+# Objects written by the source pipelines
+SOURCE_PATTERN = re.compile(
+    r"^(?P<start>\d{8})_(?P<end>\d{8})_(?P<pair>[^/]+)_ohlc_(?P<interval>\d+)\.parquet$"
+)
+COMPACTED_PREFIX = "compacted/ohlc"
+
+
+def group_prefix(pair: str, interval: int) -> str:
+    return f"{COMPACTED_PREFIX}/pair={pair}/interval={interval}"
+
+
+def manifest_name(pair: str, interval: int) -> str:
+    return f"{group_prefix(pair, interval)}/_manifest.json"
+
+
+def read_manifest(
+    minio_ops: MinioOPS, bucket_name: str, pair: str, interval: int
+) -> dict:
+    """Read the manifest of a pair and interval
+
+    The manifest is the only reference to the compacted files: `months` maps
+    "YYYY-MM" to the current file of the month and `sources` maps every
+    compacted source object to its [first, last] bar. It is replaced with a
+    single PUT, so readers see either the old or the new set of files.
+
+    Returns:
+        dict: manifest, empty when nothing was compacted yet.
+    """
+    name = manifest_name(pair, interval)
+    if name not in minio_ops.list_objects(bucket_name, prefix=name):
+        return {"pair": pair, "interval": interval, "months": {}, "sources": {}}
+    return json.loads(minio_ops.read_object(bucket_name, name))
+
+
+def read_ohlc_object(
+    minio_ops: MinioOPS, bucket_name: str, object_name: str
+) -> pd.DataFrame:
+    """Read an object written by a source pipeline, even once it was compacted
+
+    Args:
+        minio_ops (MinioOPS): MinIO operations.
+        bucket_name (str): bucket of the object.
+        object_name (str): e.g. "20250101_20250102_XXBTZUSD_ohlc_240.parquet".
+
+    Returns:
+        pd.DataFrame: rows of the object (deduplicated values when read from the compacted files).
+    """
+    if object_name in minio_ops.list_objects(bucket_name, prefix=object_name):
+        return pd.read_parquet(
+            io.BytesIO(minio_ops.read_object(bucket_name, object_name))
+        )
+
+    match = SOURCE_PATTERN.match(object_name)
+    manifest = (
+        read_manifest(minio_ops, bucket_name, match["pair"], int(match["interval"]))
+        if match
+        else {"sources": {}}
+    )
+    if object_name not in manifest["sources"]:
+        raise FileNotFoundError(
+            f"{object_name} is neither in {bucket_name} nor compacted"
+        )
+    first, last = manifest["sources"][object_name]
+    if first is None:
+        return pd.DataFrame(columns=list(OHLC.model_fields))
+
+    months = bar_month(pd.Series([first, last])).tolist()
+    frames = [
+        pd.read_parquet(io.BytesIO(minio_ops.read_object(bucket_name, name)))
+        for month, name in sorted(manifest["months"].items())
+        if months[0] <= month <= months[1]
+    ]
+    df = pd.concat(frames, ignore_index=True)
+    df = df[(df["time"] >= first) & (df["time"] <= last)]
+    return df.drop(columns="pair").reset_index(drop=True)
+
+
+def bar_month(times: pd.Series) -> pd.Series:
+    """Month ("YYYY-MM", UTC) of Unix timestamps"""
+    return pd.to_datetime(times, unit="s", utc=True).dt.strftime("%Y-%m")
@@ -0,0 +1,363 @@
+import argparse
+import cProfile
+import fnmatch
+import functools
+import importlib
+import os
+import sys
+import threading
+import tracemalloc
+import types
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator
+
+from src.utils.logger import logger
+from src.utils.metrics import Span, metrics
+
+
+def add_profiling_arguments(parser: argparse.ArgumentParser):
+    group = parser.add_argument_group("profiling")
+    group.add_argument(
+        "--profile",
+        action="store_true",
+        help="Write a pstats file and a collapsed-stack flamegraph of the run",
+    )
+    group.add_argument(
+        "--trace-malloc",
+        action="store_true",
+        help="Write the top allocation sites of the run (tracemalloc)",
+    )
+    group.add_argument(
+        "--profile-dir",
+        type=str,
+        default="profiles",
+        help="Folder receiving the profiling files",
+    )
+    group.add_argument(
+        "--profile-span",
+        type=str,
+        action="append",
+        default=[],
+        help="Only profile inside spans matching this pattern (e.g. 'gold.indicators', 'pipeline.*'), repeatable",
+    )
+    group.add_argument(
+        "--profile-function",
+        type=str,
+        action="append",
+        default=[],
+        help="Only profile calls of this function, as module:attribute (e.g. 'pipelines.bronze.ohlc:transform_rows'), "
+        "also where it was imported with 'from module import ...', repeatable",
+    )
+    group.add_argument(
+        "--trace-malloc-top",
+        type=int,
+        default=25,
+        help="Number of allocation sites in the tracemalloc report",
+    )
+    group.add_argument(
+        "--sample-interval",
+        type=float,
+        default=0.005,
+        help="Seconds between two stack samples of the flamegraph",
+    )
+
+
+class StackSampler:
+    def __init__(self, interval: float = 0.005):
+        """Sample the stack of selected threads into collapsed stacks
+
+        The output ("frame;frame;frame count" per line) can be rendered by
+        flamegraph.pl, speedscope or inferno.
+
+        Args:
+            interval (float, optional): seconds between two samples. Defaults to 0.005.
+        """
+        self.interval = interval
+        self.all_threads = False
+        self.stacks = Counter()
+        self.__thread_ids = set()
+        self.__lock = threading.Lock()
+        self.__stop = threading.Event()
+        self.__thread = None
+
+    def add_thread(self, thread_id: int):
+        with self.__lock:
+            self.__thread_ids.add(thread_id)
+
+    def remove_thread(self, thread_id: int):
+        with self.__lock:
+            self.__thread_ids.discard(thread_id)
+
+    def start(self):
+        self.__thread = threading.Thread(
+            target=self.__run, name="stack-sampler", daemon=True
+        )
+        self.__thread.start()
+
+    def stop(self):
+        self.__stop.set()
+        if self.__thread is not None:
+            self.__thread.join()
+
+    def __run(self):
+        while not self.__stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self.__lock:
+                thread_ids = set(frames) if self.all_threads else set(self.__thread_ids)
+            thread_ids.discard(threading.get_ident())
+            for thread_id in thread_ids:
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(
+                        f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                    )
+                    frame = frame.f_back
+                if stack:
+                    self.stacks[";".join(reversed(stack))] += 1
+
+    def write(self, path: str):
+        with open(path, "w") as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+
+
+class Profiler:
+    def __init__(
+        self,
+        name: str,
+        output_dir: str = "profiles",
+        cpu: bool = True,
+        memory: bool = False,
+        span_patterns: list[str] | None = None,
+        functions: list[str] | None = None,
+        memory_top: int = 25,
+        sample_interval: float = 0.005,
+    ):
+        """Profile a whole run, or only selected spans and functions
+
+        Without span patterns and functions the whole run is profiled. Otherwise the
+        profilers are only active while a matching span is open or a selected
+        function runs, in the thread running it. Nested activations count once.
+        A selected function is replaced in its module and in every loaded module
+        that imported it by name; references kept elsewhere (callbacks, bound
+        methods, ...) still call the original.
+
+        Outputs (prefixed by `<name>_<timestamp>`):
+            - `.pstats`: cProfile statistics, open with `python -m pstats` or snakeviz.
+            - `.collapsed`: collapsed stacks for a flamegraph.
+            - `.tracemalloc.txt`: top allocation sites.
+
+        Args:
+            name (str): name of the run, used in the file names.
+            output_dir (str, optional): folder receiving the files. Defaults to "profiles".
+            cpu (bool, optional): write the pstats and flamegraph files. Defaults to True.
+            memory (bool, optional): write the tracemalloc report. Defaults to False.
+            span_patterns (list[str] | None, optional): glob patterns of the spans to profile. Defaults to None.
+            functions (list[str] | None, optional): functions to profile, as "module:attribute". Defaults to None.
+            memory_top (int, optional): number of allocation sites in the report. Defaults to 25.
+            sample_interval (float, optional): seconds between two stack samples. Defaults to 0.005.
+        """
+        self.name = name
+        self.output_dir = output_dir
+        self.cpu = cpu
+        self.memory = memory
+        self.span_patterns = span_patterns or []
+        self.functions = functions or []
+        self.memory_top = memory_top
+        self.sampler = StackSampler(sample_interval)
+        self.__profile = cProfile.Profile()
+        self.__lock = threading.Lock()
+        self.__owner = None  # (thread id, depth) of the active selective activation
+        self.__memory_diffs = []
+        self.__memory_before = None
+        self.__patched = []
+
+    @property
+    def selective(self) -> bool:
+        return bool(self.span_patterns or self.functions)
+
+    # =========================================================================
+    # Activation
+    # =========================================================================
+    def __activate(self, label: str) -> bool:
+        thread_id = threading.get_ident()
+        with self.__lock:
+            if self.__owner is not None:
+                owner_id, depth = self.__owner
+                if owner_id == thread_id:
+                    self.__owner = (owner_id, depth + 1)
+                else:
+                    logger.warning(
+                        f"Profiler busy in another thread, '{label}' not profiled."
+                    )
+                return False
+            self.__owner = (thread_id, 1)
+
+        if self.memory:
+            self.__memory_before = tracemalloc.take_snapshot()
+        if self.cpu:
+            self.sampler.add_thread(thread_id)
+            self.__profile.enable()
+        return True
+
+    def __deactivate(self, label: str):
+        thread_id = threading.get_ident()
+        with self.__lock:
+            if self.__owner is None or self.__owner[0] != thread_id:
+                return
+            owner_id, depth = self.__owner
+            if depth > 1:
+                self.__owner = (owner_id, depth - 1)
+                return
+            self.__owner = None
+
+        if self.cpu:
+            self.__profile.disable()
+            self.sampler.remove_thread(thread_id)
+        if self.memory:
+            diff = tracemalloc.take_snapshot().compare_to(
+                self.__memory_before, "lineno"
+            )
+            self.__memory_diffs.append((label, diff))
+
+    def on_span_start(self, span: Span):
+        if any(fnmatch.fnmatch(span.name, pattern) for pattern in self.span_patterns):
+            self.__activate(span.name)
+
+    def on_span_end(self, span: Span):
+        if any(fnmatch.fnmatch(span.name, pattern) for pattern in self.span_patterns):
+            self.__deactivate(span.name)
+
+    def __wrap(self, function, label: str):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            self.__activate(label)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.__deactivate(label)
+
+        return wrapper
+
+    def __patch_functions(self):
+        for target in self.functions:
+            module_name, _, attribute = target.partition(":")
+            if not attribute:
+                raise ValueError(f"Expected 'module:attribute', got '{target}'")
+            owner = importlib.import_module(module_name)
+            *parents, name = attribute.split(".")
+            for parent in parents:
+                owner = getattr(owner, parent)
+            original = getattr(owner, name)
+            wrapper = self.__wrap(original, target)
+            setattr(owner, name, wrapper)
+            self.__patched.append((owner, name, original))
+            if not isinstance(owner, types.ModuleType):
+                # Methods are looked up on the class, patching it is enough
+                continue
+            # `from module import function` copies the reference into the importer
+            for module in list(sys.modules.values()):
+                if module is owner:
+                    continue
+                for alias, value in list(getattr(module, "__dict__", {}).items()):
+                    if value is original:
+                        setattr(module, alias, wrapper)
+                        self.__patched.append((module, alias, original))
+
+    def __unpatch_functions(self):
+        for owner, name, original in reversed(self.__patched):
+            setattr(owner, name, original)
+        self.__patched.clear()
+
+    # =========================================================================
+    # Session
+    # =========================================================================
+    def start(self):
+        if self.memory:
+            tracemalloc.start(25)
+        if self.cpu:
+            self.sampler.start()
+        if self.span_patterns:
+            metrics.add_hook(self)
+        self.__patch_functions()
+        if not self.selective:
+            # The flamegraph of a whole run covers the stage and worker threads too
+            self.sampler.all_threads = True
+            self.__activate(self.name)
+
+    def stop(self):
+        if not self.selective:
+            self.__deactivate(self.name)
+        self.__unpatch_functions()
+        if self.span_patterns:
+            metrics.remove_hook(self)
+        if self.cpu:
+            self.sampler.stop()
+        self.__write()
+        if self.memory:
+            tracemalloc.stop()
+
+    def __write(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        prefix = os.path.join(
+            self.output_dir, f"{self.name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        )
+        if self.cpu:
+            self.__profile.dump_stats(f"{prefix}.pstats")
+            logger.info(f"Profile written to {prefix}.pstats")
+            self.sampler.write(f"{prefix}.collapsed")
+            logger.info(f"Collapsed stacks written to {prefix}.collapsed")
+        if self.memory:
+            self.__write_memory_report(f"{prefix}.tracemalloc.txt")
+            logger.info(f"Allocation report written to {prefix}.tracemalloc.txt")
+
+    def __write_memory_report(self, path: str):
+        current, peak = tracemalloc.get_traced_memory()
+        with open(path, "w") as file:
+            file.write(
+                f"current: {current / 1024 / 1024:.1f} MiB, peak: {peak / 1024 / 1024:.1f} MiB\n"
+            )
+            for label, diff in self.__memory_diffs:
+                file.write(
+                    f"\n# {label}: top {self.memory_top} allocation sites (size diff)\n"
+                )
+                for stat in diff[: self.memory_top]:
+                    file.write(f"{stat}\n")
+
+
+@contextmanager
+def profiling_session(args: argparse.Namespace, name: str) -> Iterator[Profiler | None]:
+    """Profile a run according to the profiling options of the command line
+
+    Args:
+        args (argparse.Namespace): parsed arguments holding the profiling options.
+        name (str): name of the run, used in the file names.
+
+    Yields:
+        Profiler | None: active profiler, None when profiling is disabled.
+    """
+    cpu = getattr(args, "profile", False)
+    memory = getattr(args, "trace_malloc", False)
+    if not (cpu or memory):
+        yield None
+        return
+
+    profiler = Profiler(
+        name=name,
+        output_dir=args.profile_dir,
+        cpu=cpu,
+        memory=memory,
+        span_patterns=args.profile_span,
+        functions=args.profile_function,
+        memory_top=args.trace_malloc_top,
+        sample_interval=args.sample_interval,
+    )
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
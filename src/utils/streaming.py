@@ -0,0 +1,139 @@
+import queue
+import threading
+from typing import Any, Callable, Iterator
+
+from src.utils.logger import logger
+from src.utils.metrics import bind_span, span
+
+# Marks the end of a stream inside a queue
+END = object()
+
+
+class StageAborted(Exception):
+    """Raised inside a stage when another stage failed"""
+
+
+class StagePipeline:
+    def __init__(self):
+        """Run stages on separate threads connected by bounded queues.
+
+        Memory is bounded by the queue depths, a failing stage stops every other stage.
+        """
+        self.stop_event = threading.Event()
+        self.errors = []
+        self.__threads = []
+
+    def queue(self, maxsize: int = 4) -> queue.Queue:
+        return queue.Queue(maxsize=maxsize)
+
+    def put(self, q: queue.Queue, item: Any):
+        """Put an item, giving up when another stage failed"""
+        while not self.stop_event.is_set():
+            try:
+                q.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+        raise StageAborted()
+
+    def get(self, q: queue.Queue) -> Any:
+        """Get an item, giving up when another stage failed"""
+        while not self.stop_event.is_set():
+            try:
+                return q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+        raise StageAborted()
+
+    def iterate(self, q: queue.Queue) -> Iterator[Any]:
+        """Iterate over the items of a queue until the END marker"""
+        while (item := self.get(q)) is not END:
+            yield item
+
+    def add_stage(self, name: str, target: Callable, *args):
+        """Register a stage, it starts when `run` is called
+
+        Args:
+            name (str): name of the stage, used in logs.
+            target (Callable): function of the stage.
+            *args: arguments of the function.
+        """
+
+        def run():
+            try:
+                with span("stage", stage=name):
+                    target(*args)
+            except StageAborted:
+                pass
+            except Exception as e:
+                logger.error(f"Stage '{name}' failed: {e}")
+                self.errors.append(e)
+                self.stop_event.set()
+
+        self.__threads.append(
+            threading.Thread(target=bind_span(run), name=name, daemon=True)
+        )
+
+    def run(self):
+        """Start every stage and wait for all of them, re-raises the first error"""
+        for thread in self.__threads:
+            thread.start()
+        for thread in self.__threads:
+            thread.join()
+        if self.errors:
+            raise self.errors[0]
+
+
+class QueueWriter:
+    def __init__(self, pipeline: StagePipeline, q: queue.Queue):
+        """Writable file-like object pushing every write into a queue"""
+        self.__pipeline = pipeline
+        self.__queue = q
+        self.__position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        if data:
+            self.__pipeline.put(self.__queue, data)
+            self.__position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.__position
+
+    def writable(self) -> bool:
+        return True
+
+    def flush(self):
+        pass
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.__pipeline.put(self.__queue, END)
+
+
+class QueueReader:
+    def __init__(self, pipeline: StagePipeline, q: queue.Queue):
+        """Readable file-like object pulling bytes from a queue until the END marker"""
+        self.__pipeline = pipeline
+        self.__queue = q
+        self.__buffer = bytearray()
+        self.__finished = False
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        while not self.__finished and (size < 0 or len(self.__buffer) < size):
+            chunk = self.__pipeline.get(self.__queue)
+            if chunk is END:
+                self.__finished = True
+            else:
+                self.__buffer.extend(chunk)
+
+        if size < 0:
+            size = len(self.__buffer)
+        data = bytes(self.__buffer[:size])
+        del self.__buffer[:size]
+        self.bytes_read += len(data)
+        return data
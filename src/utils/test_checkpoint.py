@@ -0,0 +1,27 @@
+import pytest
+
+pytest.importorskip("dotenv")
+
+from src.utils.checkpoint import CheckpointStore  # noqa: E402
+
+
+def test_run_resumes_until_cleared(tmp_path):
+    store = CheckpointStore(path=str(tmp_path / "checkpoints.sqlite"))
+    run_id = CheckpointStore.make_run_id("bronze.ohlc", pair="XXBTZUSD", interval=240)
+    assert run_id == CheckpointStore.make_run_id(
+        "bronze.ohlc", interval=240, pair="XXBTZUSD"
+    )
+
+    store.mark_done(run_id, "batch:1:2", {"last_time": 2})
+    store.mark_done(run_id, "batch:3:4")
+    assert store.done_units(run_id, prefix="batch:") == {
+        "batch:1:2": {"last_time": 2},
+        "batch:3:4": None,
+    }
+    assert store.is_done(run_id, "batch:3:4")
+
+    # Once the run succeeded, the same parameters start from scratch
+    store.clear(run_id)
+    assert store.done_units(run_id) == {}
+    assert store.runs() == []
+    store.close()
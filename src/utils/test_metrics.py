@@ -0,0 +1,26 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from src.utils.metrics import MetricsRecorder
+
+
+def test_spans_of_bound_worker_threads_roll_up_into_the_caller(tmp_path):
+    recorder = MetricsRecorder(prometheus_path=str(tmp_path / "metrics.prom"))
+    parents = []
+
+    def load_chunk(num: int):
+        with recorder.span("db.copy_data") as current:
+            current.add(db_round_trips=1)
+            parents.append(current.parent.name)
+
+    with recorder.span("pipeline.bronze.ohlc_bulk") as pipeline:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(recorder.bind(load_chunk), range(20)))
+        # Only the end of the pipeline span exports the textfile
+        assert not (tmp_path / "metrics.prom").exists()
+
+    assert parents == ["pipeline.bronze.ohlc_bulk"] * 20
+    assert pipeline.counters["db_round_trips"] == 20
+    assert (tmp_path / "metrics.prom").exists()
+    # Unbound threads start without a span
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        assert executor.submit(recorder.current).result().name == "detached"
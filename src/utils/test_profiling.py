@@ -0,0 +1,33 @@
+import sys
+import types
+
+from src.utils.profiling import Profiler
+
+
+def test_profiled_function_is_patched_where_it_was_imported(tmp_path, monkeypatch):
+    source = types.ModuleType("profiled_source")
+    exec("def work():\n    return 42\n", source.__dict__)
+    # `from profiled_source import work as job`
+    consumer = types.ModuleType("profiled_consumer")
+    consumer.job = source.work
+    monkeypatch.setitem(sys.modules, "profiled_source", source)
+    monkeypatch.setitem(sys.modules, "profiled_consumer", consumer)
+    original = source.work
+
+    profiler = Profiler(
+        "test",
+        output_dir=str(tmp_path),
+        functions=["profiled_source:work"],
+        sample_interval=0.001,
+    )
+    profiler.start()
+    try:
+        assert source.work is not original
+        assert consumer.job is source.work
+        assert consumer.job() == 42
+    finally:
+        profiler.stop()
+
+    assert source.work is original
+    assert consumer.job is original
+    assert len(list(tmp_path.glob("test_*.pstats"))) == 1